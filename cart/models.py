@@ -1,8 +1,21 @@
+from decimal import Decimal
 from django.db import models
+from django.db.models import DecimalField, F, Sum, Value
+from django.db.models.functions import Coalesce, NullIf
 from django.conf import settings
 from products.models import Medicine
 
 
+# Orders below this subtotal pay a flat shipping fee
+FREE_SHIPPING_THRESHOLD = Decimal('2000.00')
+SHIPPING_COST = Decimal('100.00')
+
+
+def shipping_cost_for(subtotal):
+    """Shipping fee for a given cart subtotal"""
+    return Decimal('0.00') if subtotal >= FREE_SHIPPING_THRESHOLD else SHIPPING_COST
+
+
 class Cart(models.Model):
     """Shopping cart model"""
     
@@ -20,15 +33,49 @@ class Cart(models.Model):
     def __str__(self):
         return f"Cart for {self.user.username}"
     
+    def summary(self):
+        """Item count, subtotal, shipping and total for this cart in one query"""
+        return self.items.summary()
+    
     @property
     def total_items(self):
         """Total number of items in cart"""
-        return sum(item.quantity for item in self.items.all())
+        return self.summary()['item_count']
     
     @property
     def total_price(self):
         """Total price of all items in cart"""
-        return sum(item.total_price for item in self.items.all())
+        return self.summary()['subtotal']
+
+
+class CartItemQuerySet(models.QuerySet):
+    """QuerySet with aggregated cart totals"""
+    
+    def summary(self):
+        """Return item count, subtotal, shipping and total using a single aggregate query"""
+        # Same rule as Medicine.current_price: a missing or zero discount
+        # price falls back to the regular price.
+        unit_price = Coalesce(
+            NullIf('medicine__discount_price', Value(Decimal('0'))),
+            'medicine__price',
+        )
+        money = DecimalField(max_digits=12, decimal_places=2)
+        totals = self.aggregate(
+            item_count=Coalesce(Sum('quantity'), 0),
+            subtotal=Coalesce(
+                Sum(F('quantity') * unit_price, output_field=money),
+                Value(Decimal('0.00')),
+                output_field=money,
+            ),
+        )
+        subtotal = Decimal(totals['subtotal']).quantize(Decimal('0.01'))
+        shipping_cost = shipping_cost_for(subtotal)
+        return {
+            'item_count': totals['item_count'],
+            'subtotal': subtotal,
+            'shipping_cost': shipping_cost,
+            'total_amount': subtotal + shipping_cost,
+        }
 
 
 class CartItem(models.Model):
@@ -40,6 +87,8 @@ class CartItem(models.Model):
     added_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = CartItemQuerySet.as_manager()
+    
     class Meta:
         unique_together = ['cart', 'medicine']
     
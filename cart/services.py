@@ -0,0 +1,68 @@
+import threading
+
+from django.db import transaction
+from pharmazone.shared_cache import shared_cache
+from .models import Cart, CartItem
+
+
+class CartCountService:
+    """
+    Cart badge count for each user, kept in the shared cache so an
+    invalidation made by one worker is seen by all of them. A badge poll is
+    one GET on that cache: a query with the default database backend, so
+    production should point the 'shared' alias at Redis or memcached (see
+    CACHES in settings).
+    """
+    
+    TIMEOUT = 60 * 60 * 24
+    # Carts being cleared in this thread, invalidated once by clear()
+    _clearing = threading.local()
+    
+    @classmethod
+    def cache_key(cls, user_id):
+        return f'cart:count:{user_id}'
+    
+    @classmethod
+    def get_count(cls, user):
+        """Return the user's cart item count, served from cache when possible"""
+        key = cls.cache_key(user.pk)
+        count = shared_cache().get(key)
+        if count is None:
+            count = CartItem.objects.filter(cart__user=user).summary()['item_count']
+            shared_cache().set(key, count, cls.TIMEOUT)
+        return count
+    
+    @classmethod
+    def invalidate(cls, user_id):
+        """Drop the cached count once the current transaction commits"""
+        key = cls.cache_key(user_id)
+        transaction.on_commit(lambda: shared_cache().delete(key))
+    
+    @classmethod
+    def _clearing_carts(cls):
+        if not hasattr(cls._clearing, 'cart_ids'):
+            cls._clearing.cart_ids = set()
+        return cls._clearing.cart_ids
+    
+    @classmethod
+    def clear(cls, cart):
+        """Delete every item in cart, invalidating the count once rather than per item"""
+        clearing = cls._clearing_carts()
+        clearing.add(cart.pk)
+        try:
+            cart.items.all().delete()
+        finally:
+            clearing.discard(cart.pk)
+        cls.invalidate(cart.user_id)
+    
+    @classmethod
+    def invalidate_for_item(cls, cart_item):
+        """Drop the cached count for the owner of a cart item"""
+        if cart_item.cart_id in cls._clearing_carts():
+            return
+        if CartItem.cart.is_cached(cart_item):
+            user_id = cart_item.cart.user_id
+        else:
+            user_id = Cart.objects.filter(pk=cart_item.cart_id).values_list('user_id', flat=True).first()
+        if user_id is not None:
+            cls.invalidate(user_id)
@@ -0,0 +1,16 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import CartItem
+from .services import CartCountService
+
+
+@receiver(post_save, sender=CartItem)
+def invalidate_cart_count_on_save(sender, instance, **kwargs):
+    """Refresh the cart badge when an item is added or its quantity changes"""
+    CartCountService.invalidate_for_item(instance)
+
+
+@receiver(post_delete, sender=CartItem)
+def invalidate_cart_count_on_delete(sender, instance, **kwargs):
+    """Refresh the cart badge when an item is removed"""
+    CartCountService.invalidate_for_item(instance)
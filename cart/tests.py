@@ -1,3 +1,115 @@
+from decimal import Decimal
+
 from django.test import TestCase
+from django.urls import reverse
+
+from accounts.models import User
+from orders.tests import create_medicine
+from pharmazone.shared_cache import shared_cache
+from pharmazone.testing import QueryBudgetMixin
+from .models import FREE_SHIPPING_THRESHOLD, SHIPPING_COST, Cart, CartItem
+from .services import CartCountService
+
+
+class CartSummaryTests(QueryBudgetMixin, TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='customer', password='pass12345')
+        self.cart = Cart.objects.create(user=self.user)
+
+    def add(self, name, quantity, price, discount_price=None):
+        medicine = create_medicine(name, stock=100, price=price)
+        if discount_price is not None:
+            medicine.discount_price = Decimal(discount_price)
+            medicine.save()
+        return CartItem.objects.create(cart=self.cart, medicine=medicine, quantity=quantity)
+
+    def test_summary_matches_the_item_prices(self):
+        self.add('Paracetamol', 3, '50.00')
+        self.add('Ibuprofen', 2, '120.00', discount_price='99.50')
+        # A zero discount price means no discount
+        self.add('Cetirizine', 1, '80.00', discount_price='0.00')
+
+        with self.assertNumQueries(1):
+            summary = self.cart.summary()
+
+        subtotal = sum(item.total_price for item in self.cart.items.select_related('medicine'))
+        self.assertEqual(subtotal, Decimal('429.00'))
+        self.assertEqual(summary, {
+            'item_count': 6,
+            'subtotal': subtotal,
+            'shipping_cost': SHIPPING_COST,
+            'total_amount': subtotal + SHIPPING_COST,
+        })
+
+    def test_shipping_is_free_from_the_threshold(self):
+        self.add('Insulin', 1, str(FREE_SHIPPING_THRESHOLD))
+
+        summary = self.cart.summary()
+        self.assertEqual(summary['shipping_cost'], Decimal('0.00'))
+        self.assertEqual(summary['total_amount'], FREE_SHIPPING_THRESHOLD)
+
+    def test_empty_cart(self):
+        self.assertEqual(self.cart.summary(), {
+            'item_count': 0,
+            'subtotal': Decimal('0.00'),
+            'shipping_cost': SHIPPING_COST,
+            'total_amount': SHIPPING_COST,
+        })
+
+    def test_cart_page_queries_do_not_grow_with_items(self):
+        for i in range(5):
+            self.add(f'Medicine {i}', 1, '50.00')
+        self.client.login(username='customer', password='pass12345')
+
+        response = self.assertViewQueryBudget(reverse('cart:cart'), max_queries=10)
+        self.assertEqual(response.context['item_count'], 5)
+
+
+class CartCountServiceTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='customer', password='pass12345')
+        self.cart = Cart.objects.create(user=self.user)
+        self.medicines = [create_medicine(f'Medicine {i}') for i in range(3)]
+        self.client.login(username='customer', password='pass12345')
+
+    def fill_cart(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for medicine in self.medicines:
+                CartItem.objects.create(cart=self.cart, medicine=medicine, quantity=2)
+
+    def test_count_is_cached_until_the_cart_changes(self):
+        self.fill_cart()
+        self.assertEqual(CartCountService.get_count(self.user), 6)
+        self.assertEqual(shared_cache().get(CartCountService.cache_key(self.user.pk)), 6)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            item = CartItem.objects.get(cart=self.cart, medicine=self.medicines[0])
+            item.quantity = 5
+            item.save()
+
+        self.assertIsNone(shared_cache().get(CartCountService.cache_key(self.user.pk)))
+        self.assertEqual(CartCountService.get_count(self.user), 9)
+
+    def test_clear_invalidates_once_without_a_query_per_item(self):
+        self.fill_cart()
+        self.assertEqual(CartCountService.get_count(self.user), 6)
+
+        # Fetch the items for the delete signals and delete them; the count is dropped on commit
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertNumQueries(2):
+                CartCountService.clear(self.cart)
+
+        self.assertEqual(len(callbacks), 1)
+        self.assertFalse(CartItem.objects.filter(cart=self.cart).exists())
+        self.assertEqual(CartCountService.get_count(self.user), 0)
+
+    def test_clear_cart_view_resets_the_badge(self):
+        self.fill_cart()
+        self.assertEqual(self.client.get(reverse('cart:cart_count')).json(), {'count': 6})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('cart:clear_cart'))
 
-# Create your tests here.
+        self.assertEqual(self.client.get(reverse('cart:cart_count')).json(), {'count': 0})
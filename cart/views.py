@@ -5,7 +5,9 @@ from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
 from products.models import Medicine
-from .models import Cart, CartItem
+from django.utils.cache import get_conditional_response, patch_cache_control
+from .models import Cart, CartItem, FREE_SHIPPING_THRESHOLD
+from .services import CartCountService
 
 
 def is_secure_admin(user):
@@ -24,20 +26,20 @@ def cart_view(request):
         return redirect('doctor_appointments:admin_dashboard')
     
     cart, created = Cart.objects.get_or_create(user=request.user)
-    cart_items = cart.items.all()
+    cart_items = cart.items.select_related('medicine__manufacturer')
     
     # Calculate totals
-    from decimal import Decimal
-    subtotal = float(cart.total_price) if cart.total_price else 0.0
+    summary = cart.summary()
+    subtotal = float(summary['subtotal'])
     tax_amount = 0.0  # No tax
-    shipping_cost = 0.0 if subtotal >= 2000 else 100.0
-    total_amount = round(subtotal + shipping_cost, 2)
-    free_shipping_threshold = 2000.0
-    amount_needed_for_free_shipping = max(0, round(free_shipping_threshold - subtotal, 2))
+    shipping_cost = float(summary['shipping_cost'])
+    total_amount = float(summary['total_amount'])
+    amount_needed_for_free_shipping = max(0, round(float(FREE_SHIPPING_THRESHOLD) - subtotal, 2))
     
     context = {
         'cart': cart,
         'cart_items': cart_items,
+        'item_count': summary['item_count'],
         'subtotal': subtotal,
         'tax_amount': tax_amount,
         'shipping_cost': shipping_cost,
@@ -170,7 +172,7 @@ def clear_cart(request):
         return redirect('doctor_appointments:admin_dashboard')
     
     cart, created = Cart.objects.get_or_create(user=request.user)
-    cart.items.all().delete()
+    CartCountService.clear(cart)
     
     messages.success(request, 'Cart cleared successfully.')
     return redirect('cart:cart')
@@ -181,16 +183,17 @@ def clear_cart(request):
 def cart_count(request):
     """AJAX endpoint to get cart item count"""
     # Admin users don't have carts
-    if is_secure_admin(request.user):
-        return JsonResponse({'count': 0})
-    
-    if request.user.is_authenticated:
-        cart, created = Cart.objects.get_or_create(user=request.user)
-        count = cart.total_items
-    else:
+    if is_secure_admin(request.user) or not request.user.is_authenticated:
         count = 0
+    else:
+        count = CartCountService.get_count(request.user)
     
-    return JsonResponse({'count': count})
+    # Let polling tabs revalidate with If-None-Match and get a 304 back
+    etag = f'"cart-{request.user.pk}-{count}"'
+    response = JsonResponse({'count': count})
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return get_conditional_response(request, etag=etag, response=response)
 
 
 @login_required
@@ -265,7 +268,7 @@ def add_to_cart_ajax(request, medicine_id):
         return JsonResponse({
             'success': True,
             'message': message,
-            'cart_count': cart.total_items
+            'cart_count': CartCountService.get_count(request.user)
         })
     
     return JsonResponse({'success': False, 'message': 'Invalid request'})
\ No newline at end of file
@@ -7,7 +7,7 @@ class DoctorAdmin(admin.ModelAdmin):
     list_display = ['full_name', 'specialization', 'status', 'consultation_fee', 'rating', 'total_appointments', 'is_verified']
     list_filter = ['specialization', 'status', 'is_verified', 'created_at']
     search_fields = ['full_name', 'license_number', 'email']
-    readonly_fields = ['total_appointments', 'rating', 'created_at', 'updated_at']
+    readonly_fields = ['total_appointments', 'rating', 'review_count', 'created_at', 'updated_at']
 
 
 @admin.register(DoctorSchedule)
@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class DoctorAppointmentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'doctor_appointments'
-    verbose_name = 'Doctor Appointments'
\ No newline at end of file
+    verbose_name = 'Doctor Appointments'
+
+    def ready(self):
+        from . import signals  # noqa: F401
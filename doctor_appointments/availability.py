@@ -0,0 +1,149 @@
+"""
+Slot availability for doctors over a range of dates.
+
+DoctorAvailability loads the weekly schedules and the booked appointments
+for a set of doctors with one query each, then works out the free 30-minute
+slots in memory: every schedule window is expanded into slot start times and
+the booked (doctor, date, time) tuples are subtracted as a set. Views that
+show availability for many doctors or many days build one of these instead
+of checking each slot against the database.
+
+The doctor directory goes one step further and reads DoctorAvailabilitySummary
+rows, which are refreshed when schedules or appointments change, by the
+refresh_doctor_availability command, and on read once they get stale.
+"""
+import datetime
+
+from django.utils import timezone
+
+from .models import Appointment, DoctorAvailabilitySummary, DoctorSchedule
+
+
+SLOT_MINUTES = 30
+
+# Appointments in these states occupy their slot
+BOOKED_STATUSES = ['confirmed', 'in_progress']
+
+# Days covered by each DoctorAvailabilitySummary, starting today
+SUMMARY_DAYS = 30
+
+# Today's free slots shrink as time passes, so summaries older than this are
+# recomputed when read even if nothing was booked
+SUMMARY_MAX_AGE = datetime.timedelta(minutes=15)
+
+
+def _slot_times(start_time, end_time):
+    """Start times of the slots that begin inside a schedule window"""
+    start = start_time.hour * 3600 + start_time.minute * 60 + start_time.second
+    end = end_time.hour * 3600 + end_time.minute * 60 + end_time.second
+    return [
+        datetime.time(seconds // 3600, seconds // 60 % 60, seconds % 60)
+        for seconds in range(start, end, SLOT_MINUTES * 60)
+    ]
+
+
+class DoctorAvailability:
+    """Free slots for a set of doctors from start_date over the following days"""
+
+    def __init__(self, doctors, start_date, days=1):
+        self.doctor_ids = [getattr(doctor, 'pk', doctor) for doctor in doctors]
+        self.dates = [start_date + datetime.timedelta(days=i) for i in range(days)]
+
+        # (doctor_id, weekday) -> active schedules ordered by start time
+        self.schedules = {}
+        schedules = DoctorSchedule.objects.filter(
+            doctor_id__in=self.doctor_ids,
+            is_active=True
+        ).order_by('start_time')
+        for schedule in schedules:
+            self.schedules.setdefault((schedule.doctor_id, schedule.weekday), []).append(schedule)
+
+        self.booked = set(
+            Appointment.objects.filter(
+                doctor_id__in=self.doctor_ids,
+                appointment_date__range=(self.dates[0], self.dates[-1]),
+                status__in=BOOKED_STATUSES
+            ).values_list('doctor_id', 'appointment_date', 'appointment_time')
+        ) if self.dates else set()
+
+        self.now = timezone.localtime(timezone.now()).replace(tzinfo=None)
+        self._slots = {}
+
+    def schedules_for(self, doctor_id, day):
+        """Active schedule windows for the doctor on that date"""
+        return self.schedules.get((doctor_id, day.weekday()), [])
+
+    def slots_for(self, doctor_id, day):
+        """Free future slots for the doctor on that date, in the model's slot format"""
+        key = (doctor_id, day)
+        if key not in self._slots:
+            slots = []
+            for schedule in self.schedules_for(doctor_id, day):
+                for slot_time in _slot_times(schedule.start_time, schedule.end_time):
+                    if (doctor_id, day, slot_time) in self.booked:
+                        continue
+                    slot_datetime = datetime.datetime.combine(day, slot_time)
+                    if slot_datetime > self.now:
+                        slots.append({
+                            'time': slot_time,
+                            'display_time': slot_datetime.strftime('%I:%M %p')
+                        })
+            self._slots[key] = slots
+        return self._slots[key]
+
+    def next_available(self, doctor_id):
+        """First date in the range with a free slot, or None"""
+        for day in self.dates:
+            if self.slots_for(doctor_id, day):
+                return day
+        return None
+
+
+def refresh_summaries(doctors, start_date=None):
+    """Recompute and store availability summaries, returning them keyed by doctor id"""
+    start_date = start_date or datetime.date.today()
+    availability = DoctorAvailability(doctors, start_date, days=SUMMARY_DAYS)
+    computed_at = timezone.now()
+
+    summaries = {}
+    for doctor_id in availability.doctor_ids:
+        next_date = availability.next_available(doctor_id)
+        summaries[doctor_id] = DoctorAvailabilitySummary(
+            doctor_id=doctor_id,
+            computed_for=start_date,
+            computed_at=computed_at,
+            next_available_date=next_date,
+            next_available_time=availability.slots_for(doctor_id, next_date)[0]['time'] if next_date else None,
+            daily_free_slots=[len(availability.slots_for(doctor_id, day)) for day in availability.dates],
+        )
+
+    if summaries:
+        DoctorAvailabilitySummary.objects.bulk_create(
+            summaries.values(),
+            update_conflicts=True,
+            unique_fields=['doctor'],
+            update_fields=['computed_for', 'computed_at', 'next_available_date',
+                           'next_available_time', 'daily_free_slots'],
+        )
+    return summaries
+
+
+def get_summaries(doctors, today=None):
+    """Current availability summaries keyed by doctor id, refreshing missing or stale ones"""
+    today = today or datetime.date.today()
+    doctor_ids = [getattr(doctor, 'pk', doctor) for doctor in doctors]
+    cutoff = timezone.now() - SUMMARY_MAX_AGE
+
+    summaries = {
+        summary.doctor_id: summary
+        for summary in DoctorAvailabilitySummary.objects.filter(doctor_id__in=doctor_ids)
+    }
+    stale = [
+        doctor_id for doctor_id in doctor_ids
+        if doctor_id not in summaries
+        or summaries[doctor_id].computed_for != today
+        or summaries[doctor_id].computed_at < cutoff
+    ]
+    if stale:
+        summaries.update(refresh_summaries(stale, today))
+    return summaries
@@ -0,0 +1,181 @@
+"""
+Data layer for admin_appointment_dashboard.
+
+Each section is one aggregate query. Order, payment and appointment numbers
+are summed from the daily rollup tables in the reports app, so a month is a
+few dozen rollup rows rather than a scan of the transactional tables; the
+remaining sections use conditional Count expressions over their own table.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Count, DecimalField, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+from reports.models import DailyAppointmentRollup, DailyOrderRollup, DailyPaymentRollup
+from .models import Appointment, Doctor
+
+
+def _money(field, condition=None):
+    """Sum of a money field that is 0.00 rather than None when nothing matches"""
+    return Coalesce(
+        Sum(field, filter=condition),
+        Value(Decimal('0.00')),
+        output_field=DecimalField(max_digits=12, decimal_places=2),
+    )
+
+
+def _total(field, condition=None):
+    """Sum of a rollup counter that is 0 rather than None when nothing matches"""
+    return Coalesce(Sum(field, filter=condition), 0)
+
+
+def _status_stats(model, totals):
+    """Turn status_<code> aggregate keys into the dashboard's {code: {name, count}} shape"""
+    return {
+        status_code: {'name': status_name, 'count': totals[f'status_{status_code}']}
+        for status_code, status_name in model.STATUS_CHOICES
+    }
+
+
+def _status_counts(model, counter):
+    return {
+        f'status_{status_code}': _total(counter, Q(status=status_code))
+        for status_code, status_name in model.STATUS_CHOICES
+    }
+
+
+def get_periods(today):
+    """Start and end dates of the current week and the month start"""
+    week_start = today - timedelta(days=today.weekday())
+    return {
+        'today': today,
+        'week_start': week_start,
+        'week_end': week_start + timedelta(days=6),
+        'month_start': today.replace(day=1),
+    }
+
+
+def appointment_metrics(periods):
+    today = periods['today']
+    totals = DailyAppointmentRollup.objects.aggregate(
+        weekly=_total('appointment_count', Q(date__range=[periods['week_start'], periods['week_end']])),
+        monthly=_total('appointment_count', Q(date__gte=periods['month_start'])),
+        **_status_counts(Appointment, 'appointment_count')
+    )
+    return {
+        'todays_appointments': Appointment.objects.filter(
+            appointment_date=today
+        ).select_related('patient', 'doctor').order_by('appointment_time'),
+        'weekly_appointments': totals['weekly'],
+        'monthly_appointments': totals['monthly'],
+        'appointment_status_stats': _status_stats(Appointment, totals),
+        'upcoming_pending': Appointment.objects.filter(
+            status='pending',
+            appointment_date__gte=today
+        ).select_related('patient', 'doctor').order_by('appointment_date', 'appointment_time')[:5],
+    }
+
+
+def order_metrics(periods):
+    from orders.models import Order
+
+    today_q = Q(date=periods['today'])
+    week_q = Q(date__range=[periods['week_start'], periods['week_end']])
+    month_q = Q(date__gte=periods['month_start'])
+    totals = DailyOrderRollup.objects.aggregate(
+        todays_count=_total('order_count', today_q),
+        todays_revenue=_money('revenue', today_q),
+        weekly_count=_total('order_count', week_q),
+        weekly_revenue=_money('revenue', week_q),
+        monthly_count=_total('order_count', month_q),
+        monthly_revenue=_money('revenue', month_q),
+        **_status_counts(Order, 'order_count')
+    )
+    return {
+        'todays_orders_count': totals['todays_count'],
+        'todays_revenue': totals['todays_revenue'],
+        'weekly_orders_count': totals['weekly_count'],
+        'weekly_revenue': totals['weekly_revenue'],
+        'monthly_orders_count': totals['monthly_count'],
+        'monthly_revenue': totals['monthly_revenue'],
+        'order_status_stats': _status_stats(Order, totals),
+        'recent_orders': Order.objects.select_related('user').order_by('-created_at')[:5],
+    }
+
+
+def payment_metrics(periods):
+    from payments.models import Invoice
+
+    totals = DailyPaymentRollup.objects.filter(status='completed').aggregate(
+        count=_total('payment_count'),
+        amount=_money('amount'),
+    )
+    return {
+        'total_payments': totals['count'],
+        'total_payment_amount': totals['amount'],
+        'recent_invoices': Invoice.objects.select_related('order').order_by('-created_at')[:5],
+    }
+
+
+def user_metrics(periods):
+    from accounts.models import User
+
+    return User.objects.aggregate(
+        total_customers=Count('id', filter=Q(user_type='customer')),
+        total_pharmacies=Count('id', filter=Q(user_type='pharmacy')),
+        new_users_today=Count('id', filter=Q(date_joined__date=periods['today'])),
+        new_users_week=Count('id', filter=Q(date_joined__date__range=[periods['week_start'], periods['week_end']])),
+    )
+
+
+def product_metrics(periods):
+    from products.models import Medicine, Category
+
+    totals = Medicine.objects.aggregate(
+        total_medicines=Count('id'),
+        featured_medicines=Count('id', filter=Q(is_featured=True)),
+    )
+    totals['total_categories'] = Category.objects.count()
+    return totals
+
+
+def doctor_metrics(periods):
+    return {
+        'doctor_stats': Doctor.objects.annotate(
+            appointment_count=Count('appointments'),
+            pending_count=Count('appointments', filter=Q(appointments__status='pending')),
+            confirmed_count=Count('appointments', filter=Q(appointments__status='confirmed'))
+        ).order_by('-appointment_count')[:5],
+        'total_doctors': Doctor.objects.filter(is_verified=True).count(),
+    }
+
+
+def chat_metrics(periods):
+    from pharmacist_chat.models import PharmacistChat
+
+    return PharmacistChat.objects.aggregate(
+        total_chats=Count('id'),
+        active_chats=Count('id', filter=Q(status='open')),
+        todays_chats=Count('id', filter=Q(created_at__date=periods['today'])),
+    )
+
+
+SECTIONS = [
+    appointment_metrics,
+    order_metrics,
+    payment_metrics,
+    user_metrics,
+    product_metrics,
+    doctor_metrics,
+    chat_metrics,
+]
+
+
+def get_dashboard_context(today):
+    """All dashboard numbers for the given day"""
+    periods = get_periods(today)
+    context = {'today': today}
+    for section in SECTIONS:
+        context.update(section(periods))
+    return context
@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+from doctor_appointments.availability import refresh_summaries
+from doctor_appointments.models import Doctor
+
+
+class Command(BaseCommand):
+    help = 'Recompute the precomputed availability summaries used by the doctor directory'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep running and refresh every --interval seconds',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=300,
+            help='Seconds between refreshes when running with --loop',
+        )
+
+    def refresh(self):
+        doctor_ids = list(Doctor.objects.values_list('id', flat=True))
+        started = time.perf_counter()
+        refresh_summaries(doctor_ids)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Refreshed availability for {len(doctor_ids)} doctors in {elapsed:.2f}s'
+        ))
+
+    def handle(self, *args, **options):
+        self.refresh()
+        if not options['loop']:
+            return
+
+        try:
+            while True:
+                time.sleep(options['interval'])
+                self.refresh()
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping availability refresh')
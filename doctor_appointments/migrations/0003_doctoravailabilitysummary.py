@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-16 23:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctor_appointments', '0002_alter_appointmentpayment_payment_method'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DoctorAvailabilitySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('computed_for', models.DateField(help_text='First day covered by daily_free_slots')),
+                ('computed_at', models.DateTimeField()),
+                ('next_available_date', models.DateField(blank=True, null=True)),
+                ('next_available_time', models.TimeField(blank=True, null=True)),
+                ('daily_free_slots', models.JSONField(default=list, help_text='Free slot count for each day from computed_for')),
+                ('doctor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='availability_summary', to='doctor_appointments.doctor')),
+            ],
+            options={
+                'verbose_name_plural': 'Doctor availability summaries',
+            },
+        ),
+    ]
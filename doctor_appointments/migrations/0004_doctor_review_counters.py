@@ -0,0 +1,47 @@
+# Generated by Django 5.2.7 on 2026-10-17 00:02
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_review_counters(apps, schema_editor):
+    Doctor = apps.get_model('doctor_appointments', 'Doctor')
+    AppointmentReview = apps.get_model('doctor_appointments', 'AppointmentReview')
+    reviews = AppointmentReview.objects.filter(doctor=OuterRef('pk')).order_by().values('doctor')
+    Doctor.objects.update(
+        review_count=Coalesce(Subquery(reviews.annotate(n=Count('pk')).values('n')), 0),
+        rating_sum=Coalesce(Subquery(reviews.annotate(n=Sum('rating')).values('n')), 0),
+    )
+
+
+def backfill_total_appointments(apps, schema_editor):
+    # total_appointments now counts completed appointments only
+    Doctor = apps.get_model('doctor_appointments', 'Doctor')
+    Appointment = apps.get_model('doctor_appointments', 'Appointment')
+    completed = Appointment.objects.filter(doctor=OuterRef('pk'), status='completed').order_by().values('doctor')
+    Doctor.objects.update(
+        total_appointments=Coalesce(Subquery(completed.annotate(n=Count('pk')).values('n')), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctor_appointments', '0003_doctoravailabilitysummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='doctor',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='doctor',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_review_counters, migrations.RunPython.noop),
+        migrations.RunPython(backfill_total_appointments, migrations.RunPython.noop),
+    ]
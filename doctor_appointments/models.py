@@ -41,6 +41,8 @@ class Doctor(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='available')
     rating = models.DecimalField(max_digits=3, decimal_places=2, default=Decimal('5.00'))
     total_appointments = models.PositiveIntegerField(default=0)
+    review_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
     is_verified = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -50,37 +52,8 @@ class Doctor(models.Model):
     
     def get_available_slots_for_date(self, date):
         """Get available time slots for a specific date"""
-        weekday = date.weekday()
-        
-        # Get doctor's schedule for this weekday
-        schedules = self.schedules.filter(weekday=weekday, is_active=True)
-        
-        available_slots = []
-        for schedule in schedules:
-            # Generate 30-minute slots
-            current_time = datetime.datetime.combine(date, schedule.start_time)
-            end_time = datetime.datetime.combine(date, schedule.end_time)
-            
-            while current_time < end_time:
-                # Check if this slot is already booked
-                is_booked = Appointment.objects.filter(
-                    doctor=self,
-                    appointment_date=date,
-                    appointment_time=current_time.time(),
-                    status__in=['confirmed', 'in_progress']
-                ).exists()
-                
-                # Only add if not booked and in the future
-                slot_datetime = timezone.make_aware(datetime.datetime.combine(date, current_time.time()))
-                if not is_booked and slot_datetime > timezone.now():
-                    available_slots.append({
-                        'time': current_time.time(),
-                        'display_time': current_time.strftime('%I:%M %p')
-                    })
-                
-                current_time += datetime.timedelta(minutes=30)
-        
-        return available_slots
+        from .availability import DoctorAvailability
+        return DoctorAvailability([self], date).slots_for(self.id, date)
 
 
 class DoctorSchedule(models.Model):
@@ -210,4 +183,26 @@ class AppointmentReview(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     
     def __str__(self):
-        return f"Review: {self.rating} stars for Dr. {self.doctor.full_name}"
\ No newline at end of file
+        return f"Review: {self.rating} stars for Dr. {self.doctor.full_name}"
+
+class DoctorAvailabilitySummary(models.Model):
+    """Precomputed free-slot counts for the doctor directory"""
+    doctor = models.OneToOneField(Doctor, on_delete=models.CASCADE, related_name='availability_summary')
+    computed_for = models.DateField(help_text='First day covered by daily_free_slots')
+    computed_at = models.DateTimeField()
+    next_available_date = models.DateField(blank=True, null=True)
+    next_available_time = models.TimeField(blank=True, null=True)
+    daily_free_slots = models.JSONField(default=list, help_text='Free slot count for each day from computed_for')
+    
+    class Meta:
+        verbose_name_plural = 'Doctor availability summaries'
+    
+    def __str__(self):
+        return f"Availability for Dr. {self.doctor.full_name} from {self.computed_for}"
+    
+    def free_slots_on(self, day):
+        """Free slot count for a date, or None if it is outside the summary"""
+        offset = (day - self.computed_for).days
+        if 0 <= offset < len(self.daily_free_slots):
+            return self.daily_free_slots[offset]
+        return None
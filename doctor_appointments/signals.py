@@ -0,0 +1,45 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from imaging import variants
+from pharmazone import counters
+from .availability import refresh_summaries
+from .models import Appointment, AppointmentReview, Doctor, DoctorSchedule
+
+
+def refresh_doctor_summary(doctor_id):
+    """Recompute the doctor's availability summary once the change commits"""
+    # The doctor may be gone when this fires for a cascade delete
+    transaction.on_commit(
+        lambda: refresh_summaries(Doctor.objects.filter(pk=doctor_id).values_list('pk', flat=True))
+    )
+
+
+@receiver(post_save, sender=Appointment)
+@receiver(post_delete, sender=Appointment)
+def appointment_changed(sender, instance, **kwargs):
+    refresh_doctor_summary(instance.doctor_id)
+
+
+@receiver(post_save, sender=DoctorSchedule)
+@receiver(post_delete, sender=DoctorSchedule)
+def schedule_changed(sender, instance, **kwargs):
+    refresh_doctor_summary(instance.doctor_id)
+
+
+counters.register(
+    AppointmentReview, 'doctor',
+    review_count=counters.CountOf(),
+    rating_sum=counters.SumOf('rating'),
+    rating=counters.MeanOf('rating_sum', 'review_count', default=Decimal('5.00')),
+)
+
+counters.register(
+    Appointment, 'doctor',
+    total_appointments=counters.CountOf(status='completed'),
+)
+
+variants.register(Doctor, 'profile_image')
@@ -0,0 +1,158 @@
+import datetime
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.models import User
+from orders.models import Order
+from payments.models import Payment
+from .availability import DoctorAvailability, get_summaries
+from .dashboard import get_dashboard_context
+from .models import Appointment, Doctor, DoctorSchedule
+
+
+def create_doctor(index):
+    user = User.objects.create_user(username=f'doctor{index}', password='pass12345')
+    return Doctor.objects.create(
+        user=user,
+        full_name=f'Doctor {index}',
+        specialization='general',
+        license_number=f'LIC-{index}',
+        qualification='MBBS',
+        experience_years=5,
+        phone_number='9800000000',
+        email=f'doctor{index}@example.com',
+    )
+
+
+def create_activity(patient, doctor, count, offset=0):
+    """Orders, completed payments and appointments for today"""
+    today = datetime.date.today()
+    for i in range(offset, offset + count):
+        order = Order.objects.create(
+            user=patient,
+            subtotal=Decimal('100.00'),
+            total_amount=Decimal('200.00'),
+            status='pending' if i % 2 else 'delivered',
+            shipping_name='Test Customer',
+            shipping_address='Baneshwor',
+            shipping_city='Kathmandu',
+            shipping_phone='9800000000',
+        )
+        Payment.objects.create(
+            payment_id=f'PAY-{i}',
+            order=order,
+            user=patient,
+            amount=Decimal('200.00'),
+            payment_method='cod',
+            status='completed',
+        )
+        Appointment.objects.create(
+            patient=patient,
+            doctor=doctor,
+            appointment_date=today,
+            appointment_time=datetime.time(9 + i % 8, 30 * (i // 8 % 2)),
+            fee=Decimal('800.00'),
+            status='pending' if i % 2 else 'confirmed',
+            patient_age=30,
+            patient_gender='female',
+            chief_complaint='Headache',
+        )
+
+
+class AdminDashboardQueryTests(TestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='admin', password='pass12345', is_staff=True, is_superuser=True, user_type='admin'
+        )
+        self.patient = User.objects.create_user(username='patient', password='pass12345')
+        self.doctor = create_doctor(1)
+        self.client.force_login(self.admin)
+
+    def test_metrics_use_one_query_per_section(self):
+        create_activity(self.patient, self.doctor, 4)
+
+        with self.assertNumQueries(8):
+            context = get_dashboard_context(datetime.date.today())
+
+        self.assertEqual(context['todays_orders_count'], 4)
+        self.assertEqual(context['todays_revenue'], Decimal('800.00'))
+        self.assertEqual(context['total_payments'], 4)
+        self.assertEqual(context['total_payment_amount'], Decimal('800.00'))
+        self.assertEqual(context['order_status_stats']['pending']['count'], 2)
+        self.assertEqual(context['appointment_status_stats']['confirmed']['count'], 2)
+
+    def test_page_query_count_does_not_grow_with_data(self):
+        url = reverse('doctor_appointments:admin_dashboard')
+        create_activity(self.patient, self.doctor, 2)
+        with CaptureQueriesContext(connection) as small:
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+        create_activity(self.patient, create_doctor(2), 14, offset=2)
+        with CaptureQueriesContext(connection) as large:
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+        self.assertEqual(len(small), len(large))
+
+
+class DoctorAvailabilityTests(TestCase):
+
+    def setUp(self):
+        self.patient = User.objects.create_user(username='patient', password='pass12345')
+        self.doctor = create_doctor(1)
+        # Next week's Monday and Tuesday, so no slot is in the past
+        today = datetime.date.today()
+        self.monday = today + datetime.timedelta(days=7 - today.weekday())
+        self.tuesday = self.monday + datetime.timedelta(days=1)
+        DoctorSchedule.objects.create(doctor=self.doctor, weekday=0, start_time=datetime.time(9), end_time=datetime.time(11))
+        DoctorSchedule.objects.create(doctor=self.doctor, weekday=0, start_time=datetime.time(14), end_time=datetime.time(15))
+        DoctorSchedule.objects.create(
+            doctor=self.doctor, weekday=1, start_time=datetime.time(9), end_time=datetime.time(10), is_active=False
+        )
+
+    def book(self, day, time, status='confirmed'):
+        return Appointment.objects.create(
+            patient=self.patient, doctor=self.doctor, appointment_date=day, appointment_time=time,
+            fee=Decimal('800.00'), status=status, patient_age=30, patient_gender='female', chief_complaint='Headache',
+        )
+
+    def slot_times(self, availability, day):
+        return [slot['time'].strftime('%H:%M') for slot in availability.slots_for(self.doctor.pk, day)]
+
+    def test_schedule_windows_minus_booked_slots(self):
+        self.book(self.monday, datetime.time(9, 30))
+        self.book(self.monday, datetime.time(14), status='in_progress')
+        # Pending and cancelled appointments do not hold their slot
+        self.book(self.monday, datetime.time(10), status='pending')
+        self.book(self.monday, datetime.time(10, 30), status='cancelled')
+
+        with self.assertNumQueries(2):
+            availability = DoctorAvailability([self.doctor], self.monday, days=2)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.slot_times(availability, self.monday), ['09:00', '10:00', '10:30', '14:30'])
+            self.assertEqual(self.slot_times(availability, self.tuesday), [])
+        self.assertEqual(availability.slots_for(self.doctor.pk, self.monday)[0]['display_time'], '09:00 AM')
+
+    def test_past_days_have_no_slots_and_next_available_skips_full_days(self):
+        last_monday = self.monday - datetime.timedelta(days=7)
+        self.assertEqual(self.slot_times(DoctorAvailability([self.doctor], last_monday), last_monday), [])
+
+        for hour, minute in ((9, 0), (9, 30), (10, 0), (10, 30), (14, 0), (14, 30)):
+            self.book(self.monday, datetime.time(hour, minute))
+        availability = DoctorAvailability([self.doctor], self.monday, days=8)
+
+        self.assertEqual(availability.next_available(self.doctor.pk), self.monday + datetime.timedelta(days=7))
+
+    def test_summaries_are_computed_once_and_reused(self):
+        summary = get_summaries([self.doctor])[self.doctor.pk]
+        # Today may be a Monday with slots left, so next Monday is the latest it can be
+        self.assertLessEqual(summary.next_available_date, self.monday)
+        self.assertEqual(summary.daily_free_slots[(self.monday - datetime.date.today()).days], 6)
+
+        with self.assertNumQueries(1):
+            get_summaries([self.doctor])
@@ -3,11 +3,14 @@ from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
 from django.http import JsonResponse
 from django.utils import timezone
-from django.db.models import Q, Avg, Count
+from django.db.models import Q, Count
 from django.core.paginator import Paginator
 from datetime import datetime, timedelta, date
 from .models import Doctor, DoctorSchedule, Appointment, AppointmentPayment, AppointmentReview
 from .forms import AppointmentBookingForm, AppointmentReviewForm
+from .availability import DoctorAvailability, SUMMARY_DAYS, get_summaries
+from .dashboard import get_dashboard_context
+from pharmazone.exports import Column, choice_labels, export_response
 import json
 
 
@@ -74,43 +77,38 @@ def doctor_list(request):
         )
     
     # If date is selected, filter doctors who have availability on that date
+    today = date.today()
+    selected_date_obj = None
     if selected_date:
         try:
             selected_date_obj = datetime.strptime(selected_date, '%Y-%m-%d').date()
-            weekday = selected_date_obj.weekday()
-            
-            # Get doctors who have schedules for this weekday
-            doctors_with_schedule = DoctorSchedule.objects.filter(
-                weekday=weekday,
-                is_active=True
-            ).values_list('doctor_id', flat=True)
-            
-            doctors = doctors.filter(id__in=doctors_with_schedule)
         except ValueError:
             selected_date = None
     
-    # Add availability info for each doctor
+    if selected_date_obj and not today <= selected_date_obj < today + timedelta(days=SUMMARY_DAYS):
+        # Outside the precomputed window: fall back to the weekly schedule
+        doctors_with_schedule = DoctorSchedule.objects.filter(
+            weekday=selected_date_obj.weekday(),
+            is_active=True
+        ).values_list('doctor_id', flat=True)
+        
+        doctors = doctors.filter(id__in=doctors_with_schedule)
+    
+    # Add availability info for each doctor from the precomputed summaries
+    doctors = list(doctors)
+    summaries = get_summaries(doctors, today)
+    
     doctors_with_availability = []
     for doctor in doctors:
+        summary = summaries[doctor.id]
+        if selected_date_obj and summary.free_slots_on(selected_date_obj) == 0:
+            continue
+        
         doctor_info = {
             'doctor': doctor,
-            'next_available': None,
-            'available_today': False
+            'next_available': summary.next_available_date,
+            'available_today': bool(summary.free_slots_on(today))
         }
-        
-        # Check if doctor has availability today
-        today = date.today()
-        today_slots = doctor.get_available_slots_for_date(today)
-        doctor_info['available_today'] = len(today_slots) > 0
-        
-        # Find next available date (within next 7 days)
-        for i in range(7):
-            check_date = today + timedelta(days=i)
-            slots = doctor.get_available_slots_for_date(check_date)
-            if slots:
-                doctor_info['next_available'] = check_date
-                break
-        
         doctors_with_availability.append(doctor_info)
     
     # Get specializations for filter
@@ -136,21 +134,15 @@ def doctor_detail(request, doctor_id):
     
     # Get doctor's schedule for next 7 days
     today = date.today()
+    availability = DoctorAvailability([doctor], today, days=7)
     weekly_schedule = []
     
-    for i in range(7):
-        check_date = today + timedelta(days=i)
-        weekday = check_date.weekday()
-        
+    for check_date in availability.dates:
         # Get schedule for this weekday
-        day_schedules = DoctorSchedule.objects.filter(
-            doctor=doctor,
-            weekday=weekday,
-            is_active=True
-        ).order_by('start_time')
+        day_schedules = availability.schedules_for(doctor.id, check_date)
         
         # Get available slots
-        available_slots = doctor.get_available_slots_for_date(check_date)
+        available_slots = availability.slots_for(doctor.id, check_date)
         
         weekly_schedule.append({
             'date': check_date,
@@ -198,11 +190,10 @@ def book_appointment(request, doctor_id):
     
     # Get available dates (next 30 days)
     available_dates = []
-    today = date.today()
+    availability = DoctorAvailability([doctor], date.today(), days=30)
     
-    for i in range(30):
-        check_date = today + timedelta(days=i)
-        slots = doctor.get_available_slots_for_date(check_date)
+    for check_date in availability.dates:
+        slots = availability.slots_for(doctor.id, check_date)
         if slots:
             available_dates.append({
                 'date': check_date,
@@ -350,15 +341,9 @@ def review_appointment(request, appointment_id):
             review.appointment = appointment
             review.doctor = appointment.doctor
             review.patient = request.user
+            # Doctor.rating is updated from the review counters
             review.save()
             
-            # Update doctor's rating
-            avg_rating = AppointmentReview.objects.filter(doctor=appointment.doctor).aggregate(
-                avg_rating=Avg('rating')
-            )['avg_rating']
-            appointment.doctor.rating = round(avg_rating, 2) if avg_rating else 5.0
-            appointment.doctor.save()
-            
             messages.success(request, 'Thank you for your review!')
             return redirect('doctor_appointments:appointment_detail', appointment_id=appointment.id)
     else:
@@ -373,6 +358,22 @@ def review_appointment(request, appointment_id):
 
 # Admin Appointment Management Views
 
+APPOINTMENT_EXPORT_COLUMNS = [
+    Column('Appointment ID', 'id'),
+    Column('Date', 'appointment_date'),
+    Column('Time', 'appointment_time'),
+    Column('Doctor', 'doctor__full_name'),
+    Column('Patient', 'patient__username'),
+    Column('Patient Email', 'patient__email'),
+    Column('Type', 'appointment_type', choice_labels(Appointment.APPOINTMENT_TYPE_CHOICES)),
+    Column('Duration (min)', 'duration_minutes'),
+    Column('Fee', 'fee'),
+    Column('Status', 'status', choice_labels(Appointment.STATUS_CHOICES)),
+    Column('Booked', 'created_at'),
+    Column('Completed', 'completed_at'),
+]
+
+
 @user_passes_test(is_admin)
 def admin_appointment_list(request):
     """Admin view to list and manage all appointments"""
@@ -411,6 +412,11 @@ def admin_appointment_list(request):
     # Order by date and time
     appointments = appointments.order_by('-appointment_date', '-appointment_time')
     
+    # ?export=csv|xlsx streams every matching appointment instead of one page
+    response = export_response(request, appointments, APPOINTMENT_EXPORT_COLUMNS, 'appointments')
+    if response:
+        return response
+    
     # Pagination
     paginator = Paginator(appointments, 20)
     page_number = request.GET.get('page')
@@ -502,13 +508,9 @@ def admin_update_appointment_status(request, appointment_id):
         else:
             appointment.doctor_notes = f"[Admin Update - {timezone.now().strftime('%Y-%m-%d %H:%M')}]: {admin_notes}"
     
+    # Doctor.total_appointments is counted from completed appointments on save
     appointment.save()
     
-    # Update doctor's total appointments count
-    if new_status == 'completed':
-        appointment.doctor.total_appointments += 1
-        appointment.doctor.save()
-    
     messages.success(request, f'Appointment status updated to {appointment.get_status_display()}.')
     return redirect('doctor_appointments:admin_appointment_detail', appointment_id=appointment_id)
 
@@ -534,11 +536,10 @@ def admin_reschedule_appointment(request, appointment_id):
     
     # Get available dates (next 30 days)
     available_dates = []
-    today = date.today()
+    availability = DoctorAvailability([appointment.doctor], date.today(), days=30)
     
-    for i in range(30):
-        check_date = today + timedelta(days=i)
-        slots = appointment.doctor.get_available_slots_for_date(check_date)
+    for check_date in availability.dates:
+        slots = availability.slots_for(appointment.doctor.id, check_date)
         if slots:
             available_dates.append({
                 'date': check_date,
@@ -557,165 +558,7 @@ def admin_reschedule_appointment(request, appointment_id):
 @user_passes_test(is_admin)
 def admin_appointment_dashboard(request):
     """Comprehensive admin dashboard with all business metrics"""
-    today = date.today()
-    
-    # === APPOINTMENT METRICS ===
-    # Today's appointments
-    todays_appointments = Appointment.objects.filter(appointment_date=today).order_by('appointment_time')
-    
-    # This week's appointments
-    week_start = today - timedelta(days=today.weekday())
-    week_end = week_start + timedelta(days=6)
-    weekly_appointments = Appointment.objects.filter(
-        appointment_date__range=[week_start, week_end]
-    ).count()
-    
-    # Monthly appointments
-    month_start = today.replace(day=1)
-    monthly_appointments = Appointment.objects.filter(
-        appointment_date__gte=month_start
-    ).count()
-    
-    # Appointment status statistics
-    appointment_status_stats = {}
-    for status_code, status_name in Appointment.STATUS_CHOICES:
-        appointment_status_stats[status_code] = {
-            'name': status_name,
-            'count': Appointment.objects.filter(status=status_code).count()
-        }
-    
-    # Upcoming pending appointments
-    upcoming_pending = Appointment.objects.filter(
-        status='pending',
-        appointment_date__gte=today
-    ).order_by('appointment_date', 'appointment_time')[:5]
-    
-    # === ORDER METRICS ===
-    from orders.models import Order
-    from decimal import Decimal
-    
-    # Today's orders
-    todays_orders = Order.objects.filter(created_at__date=today)
-    todays_revenue = sum(order.total_amount for order in todays_orders)
-    
-    # Weekly orders
-    weekly_orders = Order.objects.filter(
-        created_at__date__range=[week_start, week_end]
-    )
-    weekly_revenue = sum(order.total_amount for order in weekly_orders)
-    
-    # Monthly orders
-    monthly_orders = Order.objects.filter(
-        created_at__date__gte=month_start
-    )
-    monthly_revenue = sum(order.total_amount for order in monthly_orders)
-    
-    # Order status statistics
-    order_status_stats = {}
-    for status_code, status_name in Order.STATUS_CHOICES:
-        order_status_stats[status_code] = {
-            'name': status_name,
-            'count': Order.objects.filter(status=status_code).count()
-        }
-    
-    # Recent orders
-    recent_orders = Order.objects.select_related('user').order_by('-created_at')[:5]
-    
-    # === PAYMENT METRICS ===
-    from payments.models import Payment, Invoice
-    
-    # Payment statistics (using 'status' field instead of 'payment_status')
-    total_payments = Payment.objects.filter(status='completed').count()
-    total_payment_amount = sum(
-        payment.amount for payment in Payment.objects.filter(status='completed')
-    )
-    
-    # Recent invoices
-    recent_invoices = Invoice.objects.select_related('order').order_by('-created_at')[:5]
-    
-    # === USER METRICS ===
-    from accounts.models import User
-    
-    # User statistics
-    total_customers = User.objects.filter(user_type='customer').count()
-    total_pharmacies = User.objects.filter(user_type='pharmacy').count()
-    new_users_today = User.objects.filter(date_joined__date=today).count()
-    new_users_week = User.objects.filter(
-        date_joined__date__range=[week_start, week_end]
-    ).count()
-    
-    # === PRODUCT METRICS ===
-    from products.models import Medicine, Category
-    
-    # Product statistics
-    total_medicines = Medicine.objects.count()
-    featured_medicines = Medicine.objects.filter(is_featured=True).count()
-    total_categories = Category.objects.count()
-    
-    # === DOCTOR METRICS ===
-    # Doctor statistics
-    doctor_stats = Doctor.objects.annotate(
-        appointment_count=Count('appointments'),
-        pending_count=Count('appointments', filter=Q(appointments__status='pending')),
-        confirmed_count=Count('appointments', filter=Q(appointments__status='confirmed'))
-    ).order_by('-appointment_count')[:5]
-    
-    total_doctors = Doctor.objects.filter(is_verified=True).count()
-    
-    # === CHAT METRICS ===
-    from pharmacist_chat.models import PharmacistChat
-    
-    # Chat statistics (using PharmacistChat model)
-    total_chats = PharmacistChat.objects.count()
-    active_chats = PharmacistChat.objects.filter(status='open').count()  # Using 'open' status instead of is_active
-    todays_chats = PharmacistChat.objects.filter(created_at__date=today).count()
-    
-    context = {
-        # Appointment data
-        'todays_appointments': todays_appointments,
-        'weekly_appointments': weekly_appointments,
-        'monthly_appointments': monthly_appointments,
-        'appointment_status_stats': appointment_status_stats,
-        'upcoming_pending': upcoming_pending,
-        
-        # Order data
-        'todays_orders_count': todays_orders.count(),
-        'todays_revenue': todays_revenue,
-        'weekly_orders_count': weekly_orders.count(),
-        'weekly_revenue': weekly_revenue,
-        'monthly_orders_count': monthly_orders.count(),
-        'monthly_revenue': monthly_revenue,
-        'order_status_stats': order_status_stats,
-        'recent_orders': recent_orders,
-        
-        # Payment data
-        'total_payments': total_payments,
-        'total_payment_amount': total_payment_amount,
-        'recent_invoices': recent_invoices,
-        
-        # User data
-        'total_customers': total_customers,
-        'total_pharmacies': total_pharmacies,
-        'new_users_today': new_users_today,
-        'new_users_week': new_users_week,
-        
-        # Product data
-        'total_medicines': total_medicines,
-        'featured_medicines': featured_medicines,
-        'total_categories': total_categories,
-        
-        # Doctor data
-        'doctor_stats': doctor_stats,
-        'total_doctors': total_doctors,
-        
-        # Chat data
-        'total_chats': total_chats,
-        'active_chats': active_chats,
-        'todays_chats': todays_chats,
-        
-        # General
-        'today': today,
-    }
+    context = get_dashboard_context(date.today())
     
     return render(request, 'doctor_appointments/admin_dashboard_working.html', context)
 
@@ -0,0 +1,73 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from imaging import variants
+
+
+class Command(BaseCommand):
+    help = 'Generate the thumbnail, card and detail variants of existing images'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'models',
+            nargs='*',
+            help='Only process images of these models (app_label.ModelName). Defaults to all.',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Number of images resized in parallel',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Regenerate variants that already exist',
+        )
+
+    def images(self, models):
+        """(name, storage) of every stored image in the registered fields"""
+        images = {}
+        for model, field in variants.registered_fields():
+            if models is not None and model not in models:
+                continue
+            storage = model._meta.get_field(field).storage
+            names = model._default_manager.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True})
+            for name in names.values_list(field, flat=True):
+                images[name] = storage
+        return sorted(images.items())
+
+    def generate(self, image, force):
+        # Pillow releases the GIL while decoding, resizing and encoding, so threads run in parallel
+        name, storage = image
+        try:
+            variants.generate(name, storage, force=force)
+            return name, None
+        except Exception as e:
+            return name, str(e)
+
+    def handle(self, *args, **options):
+        models = None
+        if options['models']:
+            try:
+                models = [apps.get_model(label) for label in options['models']]
+            except (LookupError, ValueError) as exc:
+                raise CommandError(str(exc))
+
+        images = self.images(models)
+        self.stdout.write(f'{len(images)} images with {options["workers"]} workers')
+
+        started = time.perf_counter()
+        failed = 0
+        with ThreadPoolExecutor(max_workers=max(options['workers'], 1)) as executor:
+            results = executor.map(lambda image: self.generate(image, options['force']), images)
+            for name, error in results:
+                if error:
+                    failed += 1
+                    self.stdout.write(self.style.WARNING(f'{name}: {error}'))
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated variants for {len(images) - failed} images in {elapsed:.2f}s, {failed} failed'
+        ))
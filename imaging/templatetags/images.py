@@ -0,0 +1,50 @@
+from django import template
+from django.utils.html import format_html, format_html_join
+
+from imaging import variants
+
+register = template.Library()
+
+
+def _srcset(image, sizes, extension):
+    # Small originals give several variants of the same width; list each width once
+    by_width = {}
+    for variant, (width, height) in sizes.items():
+        by_width.setdefault(width, variant)
+    return ', '.join(
+        f'{image.storage.url(variants.variant_path(image.name, variant, extension))} {width}w'
+        for width, variant in sorted(by_width.items())
+    )
+
+
+@register.simple_tag
+def responsive_image(image, variant='card', sizes=None, **attrs):
+    """
+    <picture> for an image field with WebP and JPEG srcsets of its variants,
+    sized for the given variant; a plain <img> of the original until the
+    variants exist. Extra keyword arguments become <img> attributes.
+
+        {% responsive_image medicine.image 'card' alt=medicine.name class='card-img-top' %}
+    """
+    if not image:
+        return ''
+
+    attrs.setdefault('loading', 'lazy')
+    attrs.setdefault('decoding', 'async')
+    extra = format_html_join(' ', '{}="{}"', ((name.replace('_', '-'), value) for name, value in attrs.items()))
+
+    available = variants.manifest(image.name, image.storage)
+    if variant not in available:
+        return format_html('<img src="{}" {}>', image.url, extra)
+
+    sizes = sizes or f'{available[variant][0]}px'
+    return format_html(
+        '<picture>'
+        '<source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" {}>'
+        '</picture>',
+        _srcset(image, available, 'webp'), sizes,
+        image.storage.url(variants.variant_path(image.name, variant, 'jpg')),
+        _srcset(image, available, 'jpg'), sizes,
+        extra,
+    )
@@ -0,0 +1,84 @@
+import io
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+
+from notifications.models import NotificationJob
+from notifications.queue import claim_jobs, run_job
+from products.models import Category
+from . import variants
+
+
+def png(width, height, mode='RGBA'):
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new(mode, (width, height), (200, 30, 30, 128) if mode == 'RGBA' else (200, 30, 30)).save(buffer, 'PNG')
+    return ContentFile(buffer.getvalue(), name='photo.png')
+
+
+class VariantTests(TestCase):
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        # Manifests are cached by file name, which repeats across tests
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def render(self, image, variant='card'):
+        template = Template("{% load images %}{% responsive_image image variant alt='Photo' %}")
+        return template.render(Context({'image': image, 'variant': variant}))
+
+    def test_variants_are_resized_and_never_enlarged(self):
+        from PIL import Image
+
+        category = Category.objects.create(name='Pain Relief', image=png(1000, 500))
+
+        sizes = variants.generate(category.image.name, category.image.storage)
+
+        self.assertEqual(sizes, {'thumbnail': (160, 80), 'card': (400, 200), 'detail': (800, 400)})
+        self.assertEqual(variants.manifest(category.image.name, category.image.storage), sizes)
+        storage = category.image.storage
+        with storage.open(variants.variant_path(category.image.name, 'card', 'webp')) as f:
+            self.assertEqual(Image.open(f).format, 'WEBP')
+        # JPEG has no alpha channel, so the transparent original is flattened
+        with storage.open(variants.variant_path(category.image.name, 'card', 'jpg')) as f:
+            self.assertEqual(Image.open(f).mode, 'RGB')
+
+        small = Category.objects.create(name='Allergy', image=png(300, 300, mode='RGB'))
+        self.assertEqual(set(variants.generate(small.image.name, small.image.storage).values()), {(160, 160), (300, 300)})
+
+    def test_tag_falls_back_to_the_original_until_variants_exist(self):
+        category = Category.objects.create(name='Pain Relief', image=png(1000, 500))
+
+        html = self.render(category.image)
+        self.assertTrue(html.startswith('<img src="/media/categories/'))
+
+        variants.generate(category.image.name, category.image.storage)
+        html = self.render(category.image)
+
+        self.assertTrue(html.startswith('<picture><source type="image/webp"'))
+        self.assertIn('card.webp 400w', html)
+        self.assertIn('detail.jpg 800w', html)
+        self.assertIn('sizes="400px"', html)
+        self.assertIn('alt="Photo" loading="lazy" decoding="async"', html)
+
+    def test_upload_queues_a_job_that_generates_the_variants(self):
+        category = Category.objects.create(name='Pain Relief', image=png(1000, 500))
+        category.name = 'Pain and Fever'
+        category.save()
+
+        jobs = NotificationJob.objects.filter(job_type='image_variants')
+        self.assertEqual(jobs.count(), 1)
+
+        self.assertEqual([run_job(job) for job in claim_jobs(10)], [True])
+        cache.clear()
+        self.assertEqual(variants.manifest(category.image.name, category.image.storage)['card'], (400, 200))
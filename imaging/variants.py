@@ -0,0 +1,194 @@
+"""
+Resized derivatives of uploaded images.
+
+Every image field registered here gets a thumbnail, card and detail variant,
+each encoded as WebP and JPEG, written next to a small manifest under
+
+    variants/<original name>/card.webp
+    variants/<original name>/card.jpg
+    variants/<original name>/manifest.json
+
+Variants are never produced inside a request: saving a model whose image
+changed queues an 'image_variants' job on the notifications outbox, which
+run_notification_worker processes with its thread pool, and the
+generate_image_variants command backfills existing images. Until the
+variants of an image exist the responsive_image tag falls back to the
+original file.
+
+Pillow is only imported by the worker, not by web processes.
+"""
+import io
+import json
+import logging
+import posixpath
+
+from django.apps import apps
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db.models.signals import post_init, post_save
+
+from notifications.queue import enqueue, register_job
+
+logger = logging.getLogger(__name__)
+
+VARIANT_ROOT = 'variants'
+
+# Variant name -> longest side in pixels; images are never enlarged
+VARIANTS = {
+    'thumbnail': 160,
+    'card': 400,
+    'detail': 800,
+}
+
+# File extension -> (Pillow format, save options)
+FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+MANIFEST_CACHE_TIMEOUT = 24 * 60 * 60
+# Images without variants are looked up again after this long
+MISSING_CACHE_TIMEOUT = 5 * 60
+
+# Model -> names of its registered image fields
+REGISTRY = {}
+
+
+def variant_path(name, variant, extension):
+    return posixpath.join(VARIANT_ROOT, name, f'{variant}.{extension}')
+
+
+def manifest_path(name):
+    return posixpath.join(VARIANT_ROOT, name, 'manifest.json')
+
+
+def _cache_key(name):
+    return f'imaging:manifest:{name}'
+
+
+def manifest(name, storage):
+    """
+    {variant: (width, height)} for the generated variants of the image
+    stored under name, or {} if they have not been generated yet
+    """
+    key = _cache_key(name)
+    sizes = cache.get(key)
+    if sizes is None:
+        try:
+            with storage.open(manifest_path(name)) as f:
+                sizes = {variant: tuple(size) for variant, size in json.load(f)['variants'].items()}
+        except (OSError, ValueError, KeyError):
+            sizes = {}
+        cache.set(key, sizes, MANIFEST_CACHE_TIMEOUT if sizes else MISSING_CACHE_TIMEOUT)
+    return sizes
+
+
+def _encode(image, extension):
+    from PIL import Image
+
+    pillow_format, options = FORMATS[extension]
+    if pillow_format == 'JPEG' and image.mode != 'RGB':
+        # JPEG has no alpha channel: flatten onto white
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        if 'A' in image.getbands():
+            background.paste(image, mask=image.getchannel('A'))
+        else:
+            background.paste(image.convert('RGB'))
+        image = background
+    buffer = io.BytesIO()
+    image.save(buffer, pillow_format, **options)
+    return buffer.getvalue()
+
+
+def generate(name, storage, force=False):
+    """Write every variant of the stored image name; returns its manifest"""
+    from PIL import Image, ImageOps
+
+    if not force:
+        cache.delete(_cache_key(name))
+        existing = manifest(name, storage)
+        if existing:
+            return existing
+
+    with storage.open(name) as f:
+        original = ImageOps.exif_transpose(Image.open(f))
+        if original.mode not in ('RGB', 'RGBA'):
+            has_alpha = 'A' in original.getbands() or 'transparency' in original.info
+            original = original.convert('RGBA' if has_alpha else 'RGB')
+        original.load()
+
+    sizes = {}
+    for variant, longest_side in VARIANTS.items():
+        image = original.copy()
+        image.thumbnail((longest_side, longest_side), Image.LANCZOS)
+        for extension in FORMATS:
+            path = variant_path(name, variant, extension)
+            if storage.exists(path):
+                storage.delete(path)
+            storage.save(path, ContentFile(_encode(image, extension)))
+        sizes[variant] = image.size
+
+    path = manifest_path(name)
+    if storage.exists(path):
+        storage.delete(path)
+    storage.save(path, ContentFile(json.dumps({'source': name, 'variants': sizes}).encode('utf-8')))
+    cache.set(_cache_key(name), {variant: tuple(size) for variant, size in sizes.items()}, MANIFEST_CACHE_TIMEOUT)
+    return sizes
+
+
+def register(model, *fields):
+    """Produce variants for the given image fields of model whenever they change"""
+    if model not in REGISTRY:
+        REGISTRY[model] = []
+        uid = model._meta.label_lower
+        post_init.connect(_remember, sender=model, dispatch_uid=f'imaging_init_{uid}')
+        post_save.connect(_saved, sender=model, dispatch_uid=f'imaging_save_{uid}')
+    REGISTRY[model].extend(fields)
+
+
+def registered_fields():
+    """(model, field name) for every registered image field"""
+    return [(model, field) for model, fields in REGISTRY.items() for field in fields]
+
+
+def _file_names(instance):
+    deferred = instance.get_deferred_fields()
+    return {
+        field: getattr(instance, field).name
+        for field in REGISTRY[type(instance)]
+        if field not in deferred
+    }
+
+
+def _remember(sender, instance, **kwargs):
+    instance._image_names = _file_names(instance)
+
+
+def _saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    old_names = getattr(instance, '_image_names', {})
+    new_names = _file_names(instance)
+    for field, name in new_names.items():
+        if name and name != old_names.get(field):
+            enqueue('image_variants', model=sender._meta.label, pk=instance.pk, field=field)
+    instance._image_names = new_names
+
+
+@register_job('image_variants')
+def generate_for_instance(model, pk, field):
+    """Worker handler for variants queued when an image is uploaded"""
+    instance = apps.get_model(model)._default_manager.filter(pk=pk).first()
+    if instance is None:
+        return
+    image = getattr(instance, field)
+    if not image:
+        return
+
+    from PIL import UnidentifiedImageError
+
+    try:
+        generate(image.name, image.storage)
+    except (FileNotFoundError, UnidentifiedImageError) as e:
+        # Retrying will not help
+        logger.warning(f'No variants for {image.name} of {model} #{pk}: {e}')
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Notification, EmailTemplate, NotificationSettings
+from django.utils import timezone
+from .models import Notification, EmailTemplate, NotificationSettings, NotificationJob
 
 
 @admin.register(Notification)
@@ -27,4 +28,17 @@ class EmailTemplateAdmin(admin.ModelAdmin):
 class NotificationSettingsAdmin(admin.ModelAdmin):
     list_display = ['user', 'email_new_orders', 'email_payments', 'app_new_orders', 'app_payments']
     list_filter = ['email_new_orders', 'email_payments', 'app_new_orders', 'app_payments']
-    search_fields = ['user__username', 'user__email']
\ No newline at end of file
+    search_fields = ['user__username', 'user__email']
+
+
+@admin.register(NotificationJob)
+class NotificationJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'job_type', 'status', 'attempts', 'run_after', 'created_at', 'completed_at']
+    list_filter = ['job_type', 'status', 'created_at']
+    readonly_fields = ['created_at', 'updated_at', 'completed_at', 'locked_at', 'last_error']
+    
+    def retry_jobs(self, request, queryset):
+        queryset.exclude(status='done').update(status='pending', attempts=0, run_after=timezone.now(), locked_at=None)
+    retry_jobs.short_description = "Retry selected jobs now"
+    
+    actions = [retry_jobs]
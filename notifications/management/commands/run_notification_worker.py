@@ -0,0 +1,74 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from notifications.queue import claim_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = 'Run queued outbox jobs (new-order alerts, emails, pharmacist auto-replies, image variants) with a pool of worker threads'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Number of jobs delivered in parallel',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=20,
+            help='Maximum number of jobs claimed per poll',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=2.0,
+            help='Seconds to sleep when the queue is empty',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Drain the jobs that are currently due and exit',
+        )
+
+    def deliver(self, job):
+        # Each pool thread gets its own DB connection; close it so a
+        # long-running worker doesn't hold stale connections open.
+        try:
+            return run_job(job)
+        finally:
+            connection.close()
+
+    def handle(self, *args, **options):
+        workers = max(options['workers'], 1)
+        batch_size = max(options['batch_size'], 1)
+        poll_interval = options['poll_interval']
+
+        self.stdout.write(f'Notification worker started with {workers} threads')
+        delivered = failed = 0
+
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                while True:
+                    jobs = claim_jobs(batch_size)
+                    if not jobs:
+                        if options['once']:
+                            break
+                        time.sleep(poll_interval)
+                        continue
+
+                    for job, ok in zip(jobs, executor.map(self.deliver, jobs)):
+                        if ok:
+                            delivered += 1
+                        else:
+                            failed += 1
+                            self.stdout.write(self.style.WARNING(
+                                f'Job #{job.id} ({job.job_type}) failed, attempt {job.attempts}/{job.max_attempts}'
+                            ))
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping notification worker')
+
+        self.stdout.write(self.style.SUCCESS(f'Delivered {delivered} jobs, {failed} failed'))
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.7 on 2026-10-17 00:47
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def remove_duplicate_order_notifications(apps, schema_editor):
+    """Keep the earliest of each (order, recipient, type) so the constraint can be added"""
+    Notification = apps.get_model('notifications', 'Notification')
+    duplicates = (
+        Notification.objects.filter(order__isnull=False)
+        .values('order', 'recipient', 'notification_type')
+        .annotate(first_id=Min('id'), rows=Count('id'))
+        .filter(rows__gt=1)
+    )
+    for group in duplicates:
+        Notification.objects.filter(
+            order=group['order'],
+            recipient=group['recipient'],
+            notification_type=group['notification_type'],
+        ).exclude(id=group['first_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctor_appointments', '0004_doctor_review_counters'),
+        ('notifications', '0002_notificationjob'),
+        ('orders', '0005_listing_keyset_indexes'),
+        ('products', '0004_listing_keyset_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_order_notifications, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='notification',
+            constraint=models.UniqueConstraint(condition=models.Q(('order__isnull', False)), fields=('order', 'recipient', 'notification_type'), name='unique_order_notification'),
+        ),
+    ]
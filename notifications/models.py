@@ -48,6 +48,15 @@ class Notification(models.Model):
             models.Index(fields=['notification_type']),
             models.Index(fields=['created_at']),
         ]
+        constraints = [
+            # One notification of each type per order and recipient, so a
+            # retried delivery job cannot insert the same rows twice
+            models.UniqueConstraint(
+                fields=['order', 'recipient', 'notification_type'],
+                condition=models.Q(order__isnull=False),
+                name='unique_order_notification',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.recipient.username}"
@@ -96,4 +105,38 @@ class NotificationSettings(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
-        return f"Notification settings for {self.user.username}"
\ No newline at end of file
+        return f"Notification settings for {self.user.username}"
+
+class NotificationJob(models.Model):
+    """Outbox row for notification delivery, drained by run_notification_worker"""
+    
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    
+    job_type = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    
+    # Retry bookkeeping
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'run_after']),
+        ]
+    
+    def __str__(self):
+        return f"{self.job_type} job #{self.id} - {self.status}"
@@ -0,0 +1,98 @@
+"""
+Database-backed outbox for notification delivery.
+
+Request code enqueues a single NotificationJob row inside its own
+transaction, so the job only exists if the surrounding work commits. The
+run_notification_worker command claims due jobs, runs the registered
+handler off the request path and retries failures with exponential backoff.
+"""
+from datetime import timedelta
+import logging
+import traceback
+
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import NotificationJob
+
+logger = logging.getLogger(__name__)
+
+# Job type -> callable taking the job payload as keyword arguments
+HANDLERS = {}
+
+# Backoff between retries: 30s, 1m, 2m, 4m ... capped at one hour
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 60 * 60
+
+# A job stuck in processing this long is assumed to belong to a dead worker
+LOCK_TIMEOUT = timedelta(minutes=10)
+
+
+def register_job(job_type):
+    """Decorator registering the handler for a job type"""
+    def decorator(func):
+        HANDLERS[job_type] = func
+        return func
+    return decorator
+
+
+def enqueue(job_type, **payload):
+    """Add a job to the outbox"""
+    return NotificationJob.objects.create(job_type=job_type, payload=payload)
+
+
+def retry_delay(attempts):
+    """Seconds to wait before the next attempt after a failure"""
+    return min(RETRY_BASE_SECONDS * (2 ** max(attempts - 1, 0)), RETRY_MAX_SECONDS)
+
+
+def claim_jobs(limit):
+    """
+    Mark up to limit due jobs as processing and return them.
+
+    Each job is claimed with a conditional UPDATE, so when several workers
+    race for the same row only one of them gets it.
+    """
+    now = timezone.now()
+    due = Q(status='pending', run_after__lte=now) | Q(status='processing', locked_at__lt=now - LOCK_TIMEOUT)
+    candidate_ids = list(
+        NotificationJob.objects.filter(due).order_by('run_after', 'id').values_list('id', flat=True)[:limit]
+    )
+
+    claimed_ids = []
+    for job_id in candidate_ids:
+        claimed = NotificationJob.objects.filter(due, id=job_id).update(
+            status='processing',
+            locked_at=now,
+            attempts=F('attempts') + 1,
+        )
+        if claimed:
+            claimed_ids.append(job_id)
+
+    return list(NotificationJob.objects.filter(id__in=claimed_ids).order_by('run_after', 'id'))
+
+
+def run_job(job):
+    """Run a claimed job and record the outcome. Returns True on success."""
+    handler = HANDLERS.get(job.job_type)
+    try:
+        if handler is None:
+            raise LookupError(f"No handler registered for job type '{job.job_type}'")
+        handler(**job.payload)
+    except Exception as e:
+        logger.error(f"Notification job #{job.id} ({job.job_type}) failed: {e}")
+        job.last_error = traceback.format_exc()
+        job.locked_at = None
+        if job.attempts >= job.max_attempts or handler is None:
+            job.status = 'failed'
+        else:
+            job.status = 'pending'
+            job.run_after = timezone.now() + timedelta(seconds=retry_delay(job.attempts))
+        job.save(update_fields=['status', 'run_after', 'locked_at', 'last_error', 'updated_at'])
+        return False
+
+    job.status = 'done'
+    job.locked_at = None
+    job.completed_at = timezone.now()
+    job.save(update_fields=['status', 'locked_at', 'completed_at', 'updated_at'])
+    return True
@@ -1,10 +1,13 @@
 from django.core.mail import send_mail
+from django.template import TemplateDoesNotExist
 from django.template.loader import render_to_string
+from django.utils.html import strip_tags
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db import models
 from django.utils import timezone
 from .models import Notification, NotificationSettings, EmailTemplate
+from .queue import enqueue, register_job
 import logging
 
 User = get_user_model()
@@ -35,11 +38,18 @@ class NotificationService:
             return None
     
     @staticmethod
-    def send_email_notification(recipient_email, subject, template_name, context):
-        """Send email notification using template"""
+    def send_email_notification(recipient_email, subject, template_name, context, fail_silently=True):
+        """
+        Send email notification using template. Failures are logged and
+        return False unless fail_silently is False, when they are raised
+        so an outbox job can retry.
+        """
         try:
             html_message = render_to_string(f'notifications/emails/{template_name}.html', context)
-            text_message = render_to_string(f'notifications/emails/{template_name}.txt', context)
+            try:
+                text_message = render_to_string(f'notifications/emails/{template_name}.txt', context)
+            except TemplateDoesNotExist:
+                text_message = strip_tags(html_message)
             
             send_mail(
                 subject=subject,
@@ -51,33 +61,98 @@ class NotificationService:
             )
             return True
         except Exception as e:
+            if not fail_silently:
+                raise
             logger.error(f"Failed to send email to {recipient_email}: {e}")
             return False
     
     @staticmethod
-    def notify_new_order(order):
-        """Send notifications for new order"""
-        # Get all admin users
-        admin_users = User.objects.filter(
-            models.Q(is_staff=True) | models.Q(user_type='admin')
+    def get_admin_recipients():
+        """
+        Return (admin, settings) pairs for every admin user.
+
+        Settings come from the same query via select_related; admins that
+        have none get defaults created in one bulk_create.
+        """
+        admin_users = list(
+            User.objects.filter(
+                models.Q(is_staff=True) | models.Q(user_type='admin')
+            ).select_related('notification_settings')
         )
         
+        missing = []
         for admin in admin_users:
-            # Check user preferences
-            settings_obj, created = NotificationSettings.objects.get_or_create(user=admin)
-            
-            # Create in-app notification
-            if settings_obj.app_new_orders:
-                NotificationService.create_notification(
-                    recipient=admin,
-                    notification_type='new_order',
-                    title=f'New Order #{order.id}',
-                    message=f'New order from {order.user.username} for Rs. {order.total_amount}',
-                    priority='high',
-                    order=order
-                )
-            
-            # Send email notification
+            try:
+                admin.notification_settings
+            except NotificationSettings.DoesNotExist:
+                missing.append(NotificationSettings(user=admin))
+        
+        if missing:
+            # ignore_conflicts: another worker may create the same rows concurrently
+            NotificationSettings.objects.bulk_create(missing, ignore_conflicts=True)
+            for settings_obj in missing:
+                settings_obj.user.notification_settings = settings_obj
+        
+        return [(admin, admin.notification_settings) for admin in admin_users]
+    
+    @staticmethod
+    def bulk_create_notifications(recipients, notification_type, title, message, priority='medium',
+                                  order=None, appointment=None, medicine=None, fail_silently=True):
+        """
+        Create the same in-app notification for many recipients in one query.
+        Recipients who already have this notification for the order are
+        skipped, so repeating the call is harmless.
+        """
+        notifications = [
+            Notification(
+                recipient=recipient,
+                notification_type=notification_type,
+                title=title,
+                message=message,
+                priority=priority,
+                order=order,
+                appointment=appointment,
+                medicine=medicine
+            )
+            for recipient in recipients
+        ]
+        if not notifications:
+            return []
+        try:
+            return Notification.objects.bulk_create(notifications, ignore_conflicts=True)
+        except Exception as e:
+            if not fail_silently:
+                raise
+            logger.error(f"Failed to create notifications: {e}")
+            return []
+    
+    @staticmethod
+    def enqueue_new_order(order):
+        """Queue all new-order notifications for the worker instead of sending inline"""
+        return enqueue('new_order', order_id=order.id)
+    
+    @staticmethod
+    def notify_new_order(order):
+        """
+        Send notifications for new order. Runs in the outbox worker, so
+        failures are raised for the job to be retried; the in-app rows are
+        not duplicated by a retry, emails already sent may be.
+        """
+        recipients = NotificationService.get_admin_recipients()
+        
+        # In-app notifications for every admin in one insert
+        NotificationService.bulk_create_notifications(
+            [admin for admin, settings_obj in recipients if settings_obj.app_new_orders],
+            notification_type='new_order',
+            title=f'New Order #{order.id}',
+            message=f'New order from {order.user.username} for Rs. {order.total_amount}',
+            priority='high',
+            order=order,
+            fail_silently=False
+        )
+        
+        # Send email notification
+        for admin, settings_obj in recipients:
             if settings_obj.email_new_orders:
                 context = {
                     'order': order,
@@ -88,7 +163,8 @@ class NotificationService:
                     recipient_email=admin.email,
                     subject=f'New Order #{order.id} - Pharmazone',
                     template_name='new_order_admin',
-                    context=context
+                    context=context,
+                    fail_silently=False
                 )
         
         # Send confirmation email to customer
@@ -102,28 +178,23 @@ class NotificationService:
                 recipient_email=order.user.email,
                 subject=f'Order Confirmation #{order.id} - Pharmazone',
                 template_name='order_confirmation_customer',
-                context=context
+                context=context,
+                fail_silently=False
             )
     
     @staticmethod
     def notify_payment_received(order):
         """Send notifications for payment received"""
-        admin_users = User.objects.filter(
-            models.Q(is_staff=True) | models.Q(user_type='admin')
-        )
+        recipients = NotificationService.get_admin_recipients()
         
-        for admin in admin_users:
-            settings_obj, created = NotificationSettings.objects.get_or_create(user=admin)
-            
-            if settings_obj.app_payments:
-                NotificationService.create_notification(
-                    recipient=admin,
-                    notification_type='payment_received',
-                    title=f'Payment Received - Order #{order.id}',
-                    message=f'Payment of Rs. {order.total_amount} received for order #{order.id}',
-                    priority='medium',
-                    order=order
-                )
+        NotificationService.bulk_create_notifications(
+            [admin for admin, settings_obj in recipients if settings_obj.app_payments],
+            notification_type='payment_received',
+            title=f'Payment Received - Order #{order.id}',
+            message=f'Payment of Rs. {order.total_amount} received for order #{order.id}',
+            priority='medium',
+            order=order
+        )
         
         # Send payment confirmation to customer
         if order.user.email:
@@ -141,63 +212,46 @@ class NotificationService:
     
     @staticmethod
     def notify_prescription_order(order):
-        """Send notifications for prescription orders"""
-        admin_users = User.objects.filter(
-            models.Q(is_staff=True) | models.Q(user_type='admin')
-        )
+        """Send notifications for prescription orders; runs in the outbox worker, so failures are raised"""
+        recipients = NotificationService.get_admin_recipients()
         
-        for admin in admin_users:
-            settings_obj, created = NotificationSettings.objects.get_or_create(user=admin)
-            
-            if settings_obj.app_new_orders:
-                NotificationService.create_notification(
-                    recipient=admin,
-                    notification_type='prescription_order',
-                    title=f'Prescription Order #{order.id}',
-                    message=f'New prescription order requires review - Order #{order.id}',
-                    priority='urgent',
-                    order=order
-                )
+        NotificationService.bulk_create_notifications(
+            [admin for admin, settings_obj in recipients if settings_obj.app_new_orders],
+            notification_type='prescription_order',
+            title=f'Prescription Order #{order.id}',
+            message=f'New prescription order requires review - Order #{order.id}',
+            priority='urgent',
+            order=order,
+            fail_silently=False
+        )
     
     @staticmethod
     def notify_low_stock(medicine):
         """Send notifications for low stock"""
-        admin_users = User.objects.filter(
-            models.Q(is_staff=True) | models.Q(user_type='admin')
-        )
+        recipients = NotificationService.get_admin_recipients()
         
-        for admin in admin_users:
-            settings_obj, created = NotificationSettings.objects.get_or_create(user=admin)
-            
-            if settings_obj.app_low_stock:
-                NotificationService.create_notification(
-                    recipient=admin,
-                    notification_type='low_stock',
-                    title=f'Low Stock Alert - {medicine.name}',
-                    message=f'{medicine.name} is running low (Only {medicine.stock_quantity} left)',
-                    priority='high',
-                    medicine=medicine
-                )
+        NotificationService.bulk_create_notifications(
+            [admin for admin, settings_obj in recipients if settings_obj.app_low_stock],
+            notification_type='low_stock',
+            title=f'Low Stock Alert - {medicine.name}',
+            message=f'{medicine.name} is running low (Only {medicine.stock_quantity} left)',
+            priority='high',
+            medicine=medicine
+        )
     
     @staticmethod
     def notify_appointment_booked(appointment):
         """Send notifications for new appointments"""
-        admin_users = User.objects.filter(
-            models.Q(is_staff=True) | models.Q(user_type='admin')
-        )
+        recipients = NotificationService.get_admin_recipients()
         
-        for admin in admin_users:
-            settings_obj, created = NotificationSettings.objects.get_or_create(user=admin)
-            
-            if settings_obj.app_appointments:
-                NotificationService.create_notification(
-                    recipient=admin,
-                    notification_type='appointment_booked',
-                    title=f'New Appointment Booked',
-                    message=f'New appointment with Dr. {appointment.doctor.name} on {appointment.appointment_date}',
-                    priority='medium',
-                    appointment=appointment
-                )
+        NotificationService.bulk_create_notifications(
+            [admin for admin, settings_obj in recipients if settings_obj.app_appointments],
+            notification_type='appointment_booked',
+            title=f'New Appointment Booked',
+            message=f'New appointment with Dr. {appointment.doctor.name} on {appointment.appointment_date}',
+            priority='medium',
+            appointment=appointment
+        )
     
     @staticmethod
     def get_unread_count(user):
@@ -210,4 +264,16 @@ class NotificationService:
         Notification.objects.filter(recipient=user, is_read=False).update(
             is_read=True,
             read_at=timezone.now()
-        )
\ No newline at end of file
+        )
+
+
+@register_job('new_order')
+def deliver_new_order(order_id):
+    """Worker handler for orders queued by NotificationService.enqueue_new_order"""
+    from orders.models import Order
+    
+    order = Order.objects.select_related('user').get(pk=order_id)
+    NotificationService.notify_new_order(order)
+    
+    if order.requires_prescription:
+        NotificationService.notify_prescription_order(order)
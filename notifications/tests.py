@@ -0,0 +1,128 @@
+from datetime import timedelta
+from smtplib import SMTPException
+from unittest import mock
+
+from django.core import mail
+from django.test import TestCase
+from django.utils import timezone
+
+from accounts.models import User
+from orders.tests import create_medicine, create_order
+from .models import Notification, NotificationJob, NotificationSettings
+from .queue import HANDLERS, claim_jobs, enqueue, register_job, retry_delay, run_job
+from .services import NotificationService
+
+
+def run_due_jobs():
+    """Make every pending job due and run what the worker would claim"""
+    NotificationJob.objects.filter(status='pending').update(run_after=timezone.now())
+    return [run_job(job) for job in claim_jobs(10)]
+
+
+class OutboxTests(TestCase):
+
+    def setUp(self):
+        self.calls = []
+        register_job('test_flaky')(self.flaky)
+        self.addCleanup(HANDLERS.pop, 'test_flaky')
+
+    def flaky(self, fail_times):
+        self.calls.append(fail_times)
+        if len(self.calls) <= fail_times:
+            raise SMTPException('Mail server unavailable')
+
+    def test_failures_are_retried_with_backoff(self):
+        job = enqueue('test_flaky', fail_times=1)
+
+        before = timezone.now()
+        self.assertEqual([run_job(claimed) for claimed in claim_jobs(10)], [False])
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'pending')
+        self.assertIn('Mail server unavailable', job.last_error)
+        self.assertGreaterEqual(job.run_after, before + timedelta(seconds=retry_delay(1)))
+        # Not due yet, so not claimed
+        self.assertEqual(claim_jobs(10), [])
+
+        self.assertEqual(run_due_jobs(), [True])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('done', 2))
+
+    def test_job_is_dead_lettered_after_max_attempts(self):
+        job = enqueue('test_flaky', fail_times=10)
+        NotificationJob.objects.filter(pk=job.pk).update(max_attempts=3)
+
+        for i in range(4):
+            run_due_jobs()
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 3))
+        self.assertEqual(len(self.calls), 3)
+
+    def test_unknown_job_type_fails_at_once(self):
+        job = enqueue('no_such_job')
+
+        run_due_jobs()
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 1))
+
+
+class DeliverNewOrderTests(TestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='manager', password='pass12345', email='manager@example.com', is_staff=True
+        )
+        customer = User.objects.create_user(username='customer', password='pass12345', email='customer@example.com')
+        self.order = create_order(customer)
+
+    def test_email_failure_retries_without_duplicating_in_app_notifications(self):
+        job = NotificationService.enqueue_new_order(self.order)
+
+        with mock.patch('notifications.services.send_mail', side_effect=SMTPException('Mail server unavailable')):
+            self.assertEqual(run_due_jobs(), [False])
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'pending')
+        self.assertEqual(Notification.objects.filter(order=self.order, recipient=self.admin).count(), 1)
+
+        self.assertEqual(run_due_jobs(), [True])
+        self.assertEqual(Notification.objects.filter(order=self.order, recipient=self.admin).count(), 1)
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), ['customer@example.com', 'manager@example.com'])
+
+
+class FanOutTests(TestCase):
+
+    def create_admins(self, count, start=0):
+        return [
+            User.objects.create_user(username=f'admin{i}', password='pass12345', is_staff=True)
+            for i in range(start, start + count)
+        ]
+
+    def test_missing_settings_are_created_for_every_admin(self):
+        admins = self.create_admins(2)
+        other_admin = User.objects.create_user(username='owner', password='pass12345', user_type='admin')
+        User.objects.create_user(username='customer', password='pass12345')
+
+        recipients = NotificationService.get_admin_recipients()
+
+        self.assertEqual(sorted(admin.username for admin, settings_obj in recipients), ['admin0', 'admin1', 'owner'])
+        self.assertEqual(
+            set(NotificationSettings.objects.values_list('user', flat=True)),
+            {admins[0].pk, admins[1].pk, other_admin.pk},
+        )
+
+    def test_queries_do_not_grow_with_admins_and_preferences_apply(self):
+        medicine = create_medicine(stock=3)
+        self.create_admins(2)
+        NotificationService.get_admin_recipients()
+        with self.assertNumQueries(2):
+            NotificationService.notify_low_stock(medicine)
+
+        muted = self.create_admins(4, start=2)[0]
+        NotificationService.get_admin_recipients()
+        NotificationSettings.objects.filter(user=muted).update(app_low_stock=False)
+        with self.assertNumQueries(2):
+            NotificationService.notify_low_stock(medicine)
+
+        self.assertEqual(Notification.objects.filter(medicine=medicine).count(), 2 + 5)
+        self.assertFalse(Notification.objects.filter(recipient=muted).exists())
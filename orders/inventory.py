@@ -0,0 +1,126 @@
+from collections import OrderedDict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, F, Q, When, PositiveIntegerField
+
+from cart.models import shipping_cost_for
+from products.models import Medicine
+from .models import OrderItem
+from .signals import order_items_created
+
+
+class InsufficientStockError(Exception):
+    """Raised when a cart line cannot be fulfilled from current stock"""
+
+    def __init__(self, medicine_name, requested, available):
+        self.medicine_name = medicine_name
+        self.requested = requested
+        self.available = available
+        super().__init__(
+            f'Only {available} of {medicine_name} available in stock '
+            f'(requested {requested}).'
+        )
+
+
+def reserve_stock(order, cart_items):
+    """
+    Turn cart items into order items and take them out of stock.
+
+    The affected Medicine rows are locked once, in id order so concurrent
+    checkouts cannot deadlock. Every quantity is validated before anything is
+    written, then the stock is decremented with one UPDATE using
+    F-expressions and all OrderItems are inserted with one bulk_create.
+
+    The UPDATE only touches rows that still hold enough stock, so even where
+    select_for_update() locks nothing (SQLite) a checkout that lost a race
+    raises InsufficientStockError instead of overselling.
+    """
+    if not transaction.get_connection().in_atomic_block:
+        raise RuntimeError('reserve_stock() must be called inside transaction.atomic()')
+
+    # Total quantity per medicine, keeping the cart order for the order items
+    quantities = OrderedDict()
+    for cart_item in cart_items:
+        quantities[cart_item.medicine_id] = quantities.get(cart_item.medicine_id, 0) + cart_item.quantity
+
+    medicines = {
+        medicine.id: medicine
+        for medicine in Medicine.objects.select_for_update().filter(id__in=quantities).order_by('id')
+    }
+
+    for medicine_id, quantity in quantities.items():
+        medicine = medicines.get(medicine_id)
+        if medicine is None or not medicine.is_active:
+            name = medicine.name if medicine else f'medicine #{medicine_id}'
+            raise InsufficientStockError(name, quantity, 0)
+        if medicine.stock_quantity < quantity:
+            raise InsufficientStockError(medicine.name, quantity, medicine.stock_quantity)
+
+    _take_stock(quantities, medicines)
+
+    # bulk_create skips OrderItem.save(), so fill in what save() would compute
+    order_items = []
+    for medicine_id, quantity in quantities.items():
+        medicine = medicines[medicine_id]
+        unit_price = medicine.current_price
+        order_items.append(OrderItem(
+            order=order,
+            medicine=medicine,
+            quantity=quantity,
+            unit_price=unit_price,
+            total_price=unit_price * quantity,
+            medicine_name=medicine.name,
+            medicine_strength=medicine.strength,
+            medicine_dosage_form=medicine.dosage_form,
+        ))
+    OrderItem.objects.bulk_create(order_items)
+    order_items_created.send(sender=OrderItem, order=order, items=order_items)
+
+    return order_items
+
+
+def _take_stock(quantities, medicines, retries=1):
+    """Decrement stock in one UPDATE guarded by stock_quantity >= quantity, all rows or none"""
+    enough = Q()
+    for medicine_id, quantity in quantities.items():
+        enough |= Q(id=medicine_id, stock_quantity__gte=quantity)
+    with transaction.atomic():
+        updated = Medicine.objects.filter(enough).update(
+            stock_quantity=Case(
+                *[When(id=medicine_id, then=F('stock_quantity') - quantity)
+                  for medicine_id, quantity in quantities.items()],
+                output_field=PositiveIntegerField(),
+            )
+        )
+        if updated != len(quantities):
+            # Stock was taken since it was read; undo the rows that still had enough
+            transaction.set_rollback(True)
+    if updated == len(quantities):
+        return
+
+    available = dict(Medicine.objects.filter(id__in=quantities).values_list('id', 'stock_quantity'))
+    for medicine_id, quantity in quantities.items():
+        if available.get(medicine_id, 0) < quantity:
+            raise InsufficientStockError(medicines[medicine_id].name, quantity, available.get(medicine_id, 0))
+    # Restocked again in between: try once more, then give up on the last line
+    if not retries:
+        raise InsufficientStockError(medicines[medicine_id].name, quantity, available.get(medicine_id, 0))
+    _take_stock(quantities, medicines, retries - 1)
+
+
+def price_order(order, order_items):
+    """
+    Set the order's subtotal, shipping and total from the items reserve_stock
+    priced off the locked Medicine rows, so a price change that lands between
+    reading the cart and taking the locks cannot leave the totals stale.
+    Saves only when they differ from what the order already holds.
+    """
+    subtotal = sum((item.total_price for item in order_items), Decimal('0.00'))
+    shipping_cost = shipping_cost_for(subtotal)
+    total_amount = subtotal + shipping_cost + (order.tax_amount or Decimal('0.00'))
+    if (order.subtotal, order.shipping_cost, order.total_amount) != (subtotal, shipping_cost, total_amount):
+        order.subtotal = subtotal
+        order.shipping_cost = shipping_cost
+        order.total_amount = total_amount
+        order.save(update_fields=['subtotal', 'shipping_cost', 'total_amount', 'updated_at'])
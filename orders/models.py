@@ -94,7 +94,9 @@ class Order(models.Model):
             models.Index(fields=['order_number']),
             models.Index(fields=['user']),
             models.Index(fields=['status']),
-            models.Index(fields=['created_at']),
+            # Keyset pagination of the admin order list
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['status', 'created_at', 'id']),
         ]
     
     def __str__(self):
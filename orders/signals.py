@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# Sent by reserve_stock after OrderItems are inserted with bulk_create, which
+# skips post_save. Receivers get order= and items= keyword arguments.
+order_items_created = Signal()
@@ -1,3 +1,180 @@
-from django.test import TestCase
+import threading
+from decimal import Decimal
 
-# Create your tests here.
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
+
+from accounts.models import User
+from cart.models import SHIPPING_COST, Cart, CartItem
+from products.models import Category, Manufacturer, Medicine
+from .inventory import price_order, reserve_stock, InsufficientStockError
+from .models import Order, OrderItem
+
+
+def create_medicine(name='Paracetamol', stock=10, price='50.00'):
+    category, _ = Category.objects.get_or_create(name='Pain Relief')
+    manufacturer, _ = Manufacturer.objects.get_or_create(name='Nepal Pharma', defaults={'country': 'Nepal'})
+    return Medicine.objects.create(
+        name=name,
+        description='Test medicine',
+        category=category,
+        manufacturer=manufacturer,
+        price=Decimal(price),
+        stock_quantity=stock,
+        strength='500mg',
+    )
+
+
+def create_order(user):
+    return Order.objects.create(
+        user=user,
+        subtotal=Decimal('0.00'),
+        total_amount=Decimal('0.00'),
+        shipping_name='Test Customer',
+        shipping_address='Baneshwor',
+        shipping_city='Kathmandu',
+        shipping_state='',
+        shipping_postal_code='',
+        shipping_phone='9800000000',
+    )
+
+
+def fill_cart(user, *lines):
+    cart, _ = Cart.objects.get_or_create(user=user)
+    for medicine, quantity in lines:
+        CartItem.objects.create(cart=cart, medicine=medicine, quantity=quantity)
+    return list(cart.items.select_related('medicine'))
+
+
+class ReserveStockTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='customer', password='pass12345')
+
+    def test_creates_order_items_and_decrements_stock(self):
+        paracetamol = create_medicine('Paracetamol', stock=10, price='50.00')
+        ibuprofen = create_medicine('Ibuprofen', stock=5, price='80.00')
+        cart_items = fill_cart(self.user, (paracetamol, 3), (ibuprofen, 2))
+
+        with transaction.atomic():
+            order = create_order(self.user)
+            # Lock, savepoint, guarded UPDATE, release, insert
+            with self.assertNumQueries(5):
+                reserve_stock(order, cart_items)
+
+        paracetamol.refresh_from_db()
+        ibuprofen.refresh_from_db()
+        self.assertEqual(paracetamol.stock_quantity, 7)
+        self.assertEqual(ibuprofen.stock_quantity, 3)
+
+        item = OrderItem.objects.get(order=order, medicine=ibuprofen)
+        self.assertEqual(item.total_price, Decimal('160.00'))
+        self.assertEqual(item.medicine_name, 'Ibuprofen')
+
+    def test_insufficient_stock_writes_nothing(self):
+        paracetamol = create_medicine('Paracetamol', stock=10)
+        ibuprofen = create_medicine('Ibuprofen', stock=1)
+        cart_items = fill_cart(self.user, (paracetamol, 3), (ibuprofen, 2))
+
+        with self.assertRaises(InsufficientStockError):
+            with transaction.atomic():
+                order = create_order(self.user)
+                reserve_stock(order, cart_items)
+
+        paracetamol.refresh_from_db()
+        self.assertEqual(paracetamol.stock_quantity, 10)
+        self.assertFalse(OrderItem.objects.exists())
+
+    def test_stock_taken_after_it_was_read_is_not_oversold(self):
+        paracetamol = create_medicine('Paracetamol', stock=10)
+        ibuprofen = create_medicine('Ibuprofen', stock=5)
+        cart_items = fill_cart(self.user, (paracetamol, 3), (ibuprofen, 2))
+        raced = []
+
+        def concurrent_checkout(execute, sql, params, many, context):
+            # Without row locks (SQLite) another checkout can take the stock
+            # between the check and the decrement
+            if not raced and sql.startswith('SAVEPOINT'):
+                raced.append(True)
+                Medicine.objects.filter(pk=ibuprofen.pk).update(stock_quantity=1)
+            return execute(sql, params, many, context)
+
+        with transaction.atomic():
+            order = create_order(self.user)
+            with self.assertRaises(InsufficientStockError) as raised:
+                with connection.execute_wrapper(concurrent_checkout):
+                    reserve_stock(order, cart_items)
+
+            # The line that still had enough stock is not taken either
+            paracetamol.refresh_from_db()
+            ibuprofen.refresh_from_db()
+            self.assertEqual((paracetamol.stock_quantity, ibuprofen.stock_quantity), (10, 1))
+
+        self.assertEqual((raised.exception.medicine_name, raised.exception.available), ('Ibuprofen', 1))
+        self.assertFalse(OrderItem.objects.exists())
+
+    def test_order_is_priced_from_the_locked_rows(self):
+        paracetamol = create_medicine('Paracetamol', stock=10, price='50.00')
+        cart_items = fill_cart(self.user, (paracetamol, 3))
+        summary = cart_items[0].cart.summary()
+        # The price changes after the cart was read but before the lock
+        Medicine.objects.filter(pk=paracetamol.pk).update(price=Decimal('60.00'))
+
+        with transaction.atomic():
+            order = create_order(self.user)
+            order.subtotal = summary['subtotal']
+            order.shipping_cost = summary['shipping_cost']
+            order.total_amount = summary['total_amount']
+            order.save()
+            price_order(order, reserve_stock(order, cart_items))
+
+        order.refresh_from_db()
+        self.assertEqual(order.subtotal, Decimal('180.00'))
+        self.assertEqual(order.shipping_cost, SHIPPING_COST)
+        self.assertEqual(order.total_amount, Decimal('180.00') + SHIPPING_COST)
+        self.assertEqual(OrderItem.objects.get(order=order).total_price, order.subtotal)
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class ConcurrentCheckoutTests(TransactionTestCase):
+    """Parallel checkouts against one SKU must never oversell"""
+
+    CHECKOUTS = 20
+    STOCK = 7
+
+    def test_parallel_checkouts_do_not_oversell(self):
+        medicine = create_medicine('Paracetamol', stock=self.STOCK)
+        buyers = []
+        for i in range(self.CHECKOUTS):
+            user = User.objects.create_user(username=f'buyer{i}', password='pass12345')
+            buyers.append((user, fill_cart(user, (medicine, 1))))
+
+        barrier = threading.Barrier(self.CHECKOUTS)
+        results = []
+        lock = threading.Lock()
+
+        def checkout(user, cart_items):
+            try:
+                barrier.wait()
+                with transaction.atomic():
+                    order = create_order(user)
+                    reserve_stock(order, cart_items)
+                outcome = 'ok'
+            except InsufficientStockError:
+                outcome = 'out_of_stock'
+            finally:
+                connection.close()
+            with lock:
+                results.append(outcome)
+
+        threads = [threading.Thread(target=checkout, args=buyer) for buyer in buyers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        medicine.refresh_from_db()
+        self.assertEqual(results.count('ok'), self.STOCK)
+        self.assertEqual(results.count('out_of_stock'), self.CHECKOUTS - self.STOCK)
+        self.assertEqual(medicine.stock_quantity, 0)
+        self.assertEqual(OrderItem.objects.filter(medicine=medicine).count(), self.STOCK)
@@ -5,14 +5,19 @@ from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
 from django.db import transaction
+from django.db.models import Count
 from django.utils import timezone
 from django.core.mail import send_mail
 from django.conf import settings
 from .models import Order, OrderItem, OrderStatusHistory, ShippingAddress
 from .forms import CheckoutForm, ShippingAddressForm
+from .inventory import price_order, reserve_stock, InsufficientStockError
 from cart.models import Cart, CartItem
+from cart.services import CartCountService
 from products.models import Medicine, Prescription
 from payments.models import Payment
+from pharmazone.exports import Column, choice_labels, export_response
+from pharmazone.pagination import CursorPaginator
 import uuid
 
 
@@ -54,7 +59,7 @@ def checkout(request):
         return redirect('doctor_appointments:admin_dashboard')
     
     cart, created = Cart.objects.get_or_create(user=request.user)
-    cart_items = cart.items.all()
+    cart_items = cart.items.select_related('medicine')
     
     if not cart_items:
         messages.warning(request, 'Your cart is empty.')
@@ -65,6 +70,9 @@ def checkout(request):
         item.medicine.requires_prescription for item in cart_items
     )
     
+    # Cart totals in a single aggregate query
+    summary = cart.summary()
+    
     # Get user's saved addresses
     saved_addresses = ShippingAddress.objects.filter(user=request.user)
     
@@ -95,17 +103,12 @@ def checkout(request):
                     if not order.shipping_postal_code:
                         order.shipping_postal_code = ''
                     
-                    # Calculate totals
+                    # Calculate totals (free shipping above Rs. 2000, no tax)
                     from decimal import Decimal
-                    subtotal = sum(item.total_price for item in cart_items)
-                    tax_amount = Decimal('0.00')  # No tax
-                    shipping_cost = Decimal('100.00') if subtotal < 2000 else Decimal('0.00')  # Free shipping above Rs. 2000
-                    total_amount = subtotal + shipping_cost
-                    
-                    order.subtotal = subtotal
-                    order.tax_amount = tax_amount
-                    order.shipping_cost = shipping_cost
-                    order.total_amount = total_amount
+                    order.subtotal = summary['subtotal']
+                    order.tax_amount = Decimal('0.00')
+                    order.shipping_cost = summary['shipping_cost']
+                    order.total_amount = summary['total_amount']
                     order.save()
                     
                     # Handle prescription upload if required
@@ -145,21 +148,10 @@ def checkout(request):
                             order.delete()
                             return redirect('orders:checkout')
                     
-                    # Create order items
-                    for cart_item in cart_items:
-                        OrderItem.objects.create(
-                            order=order,
-                            medicine=cart_item.medicine,
-                            quantity=cart_item.quantity,
-                            unit_price=cart_item.medicine.current_price,
-                            medicine_name=cart_item.medicine.name,
-                            medicine_strength=cart_item.medicine.strength,
-                            medicine_dosage_form=cart_item.medicine.dosage_form,
-                        )
-                        
-                        # Update stock
-                        cart_item.medicine.stock_quantity -= cart_item.quantity
-                        cart_item.medicine.save()
+                    # Create order items and take them out of stock, then
+                    # price the order from the locked rows
+                    order_items = reserve_stock(order, cart_items)
+                    price_order(order, order_items)
                     
                     # Create order status history
                     OrderStatusHistory.objects.create(
@@ -169,15 +161,12 @@ def checkout(request):
                     )
                     
                     # Clear cart
-                    cart.items.all().delete()
+                    CartCountService.clear(cart)
                     
-                    # Send notifications
+                    # Queue admin/customer notifications (prescription alerts
+                    # included) for the notification worker
                     from notifications.services import NotificationService
-                    NotificationService.notify_new_order(order)
-                    
-                    # Check if it's a prescription order
-                    if requires_prescription:
-                        NotificationService.notify_prescription_order(order)
+                    NotificationService.enqueue_new_order(order)
                     
                     # Handle payment based on method
                     if payment_method == 'cod':
@@ -192,28 +181,26 @@ def checkout(request):
                         messages.success(request, 'Order placed successfully!')
                         return redirect('orders:order_detail', order_id=order.id)
                     
+            except InsufficientStockError as e:
+                messages.error(request, str(e))
+                return redirect('cart:cart')
             except Exception as e:
                 messages.error(request, f'Error creating order: {str(e)}')
     else:
         form = CheckoutForm()
         address_form = ShippingAddressForm()
     
-    # Calculate totals for display
+    # Totals for display
     from decimal import Decimal
-    subtotal = sum(item.total_price for item in cart_items)
-    tax_amount = Decimal('0.00')  # No tax
-    shipping_cost = Decimal('100.00') if subtotal < 2000 else Decimal('0.00')
-    total_amount = subtotal + shipping_cost
-    
     context = {
         'cart_items': cart_items,
         'form': form,
         'saved_addresses': saved_addresses,
         'requires_prescription': requires_prescription,
-        'subtotal': subtotal,
-        'tax_amount': tax_amount,
-        'shipping_cost': shipping_cost,
-        'total_amount': total_amount,
+        'subtotal': summary['subtotal'],
+        'tax_amount': Decimal('0.00'),  # No tax
+        'shipping_cost': summary['shipping_cost'],
+        'total_amount': summary['total_amount'],
     }
     return render(request, 'orders/checkout.html', context)
 
@@ -359,6 +346,25 @@ def set_default_address(request, address_id):
     return redirect('orders:shipping_addresses')
 
 
+ORDER_EXPORT_COLUMNS = [
+    Column('Order #', 'order_number'),
+    Column('Date', 'created_at'),
+    Column('Customer', 'user__username'),
+    Column('Email', 'user__email'),
+    Column('Status', 'status', choice_labels(Order.STATUS_CHOICES)),
+    Column('Payment Status', 'payment_status', choice_labels(Order.PAYMENT_STATUS_CHOICES)),
+    Column('Payment Method', 'payment_method', choice_labels(Order.PAYMENT_METHOD_CHOICES)),
+    Column('Items', 'item_count'),
+    Column('Subtotal', 'subtotal'),
+    Column('Tax', 'tax_amount'),
+    Column('Shipping', 'shipping_cost'),
+    Column('Discount', 'discount_amount'),
+    Column('Total', 'total_amount'),
+    Column('Shipping City', 'shipping_city'),
+    Column('Delivered At', 'delivered_at'),
+]
+
+
 # Admin views for order management
 @login_required
 def admin_order_list(request):
@@ -367,13 +373,21 @@ def admin_order_list(request):
         messages.error(request, 'Access denied.')
         return redirect('products:home')
     
-    orders = Order.objects.all().order_by('-created_at')
+    orders = Order.objects.select_related('user').annotate(item_count=Count('items'))
     
     # Filter by status
     status_filter = request.GET.get('status')
     if status_filter:
         orders = orders.filter(status=status_filter)
     
+    # ?export=csv|xlsx streams every matching order instead of one page
+    response = export_response(request, orders.order_by('-created_at', '-id'), ORDER_EXPORT_COLUMNS, 'orders')
+    if response:
+        return response
+    
+    # Keyset pagination, newest first
+    orders = CursorPaginator(orders, 25, ['-created_at']).get_page(request.GET.get('cursor'))
+    
     context = {
         'orders': orders,
         'status_choices': Order.STATUS_CHOICES,
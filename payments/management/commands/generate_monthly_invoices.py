@@ -0,0 +1,207 @@
+import os
+import re
+import tempfile
+import time
+import zipfile
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, connections, transaction
+from orders.models import Order
+from payments.models import Invoice
+from payments.pdf_cache import cache_path, invoice_fingerprint, get_invoice_pdf
+
+
+PAGE_PATTERN = re.compile(rb'/Type\s*/Page(?!s)')
+
+# Invoices inserted per statement batch; small enough for SQLite's IN (...) limit
+INSERT_BATCH_SIZE = 500
+INSERT_ATTEMPTS = 5
+
+
+def init_worker():
+    """Set up Django in each worker process (needed for the spawn start method)"""
+    import django
+    django.setup()
+
+
+def render_batch(invoice_ids):
+    """
+    Worker: render a batch of invoices into the PDF cache.
+    Returns (invoice_id, path, pages) for each invoice; path is None on failure.
+    """
+    from payments.views import render_invoice_pdf
+
+    invoices = Invoice.objects.filter(id__in=invoice_ids).select_related(
+        'order__user', 'payment'
+    ).prefetch_related('order__items')
+
+    results = []
+    try:
+        for invoice in invoices:
+            path, fingerprint = get_invoice_pdf(invoice, render_invoice_pdf)
+            pages = 0
+            if path:
+                with open(path, 'rb') as pdf:
+                    pages = len(PAGE_PATTERN.findall(pdf.read()))
+            results.append((invoice.id, path, pages))
+    finally:
+        connections.close_all()
+    return results
+
+
+class Command(BaseCommand):
+    help = 'Create invoices for paid orders in bulk, render their PDFs in parallel and optionally bundle them per month'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--month',
+            help='Only orders placed in this month (YYYY-MM). Defaults to all paid orders.',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Number of rendering processes',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=25,
+            help='Invoices handed to a worker at a time',
+        )
+        parser.add_argument(
+            '--zip',
+            action='store_true',
+            help='Write one ZIP of invoice PDFs per month under MEDIA_ROOT/invoices/bundles',
+        )
+
+    def paid_orders(self, month):
+        orders = Order.objects.filter(payment_status='paid')
+        if month:
+            orders = orders.filter(created_at__year=month.year, created_at__month=month.month)
+        return orders
+
+    def unused_numbers(self, count):
+        """count invoice numbers that are neither in the database nor repeated"""
+        numbers = set()
+        while len(numbers) < count:
+            candidates = {Invoice.generate_invoice_number() for _ in range(count - len(numbers))} - numbers
+            taken = Invoice.objects.filter(invoice_number__in=candidates).values_list('invoice_number', flat=True)
+            numbers |= candidates - set(taken)
+        return list(numbers)
+
+    def create_invoices(self, order_ids):
+        """Invoice the orders in order_ids that still have none"""
+        for attempt in range(INSERT_ATTEMPTS):
+            orders = list(Order.objects.filter(id__in=order_ids, invoice__isnull=True).select_related('user'))
+            if not orders:
+                return
+            invoices = []
+            for order, number in zip(orders, self.unused_numbers(len(orders))):
+                invoice = Invoice(order=order, invoice_number=number, status='paid')
+                invoice.fill_from_order()
+                invoices.append(invoice)
+            try:
+                with transaction.atomic():
+                    Invoice.objects.bulk_create(invoices)
+                return
+            except IntegrityError:
+                # Another run invoiced one of these orders or took a number since the check; look again
+                continue
+        raise CommandError(f'Could not create invoices for orders {order_ids[0]}-{order_ids[-1]}: numbers or orders kept conflicting')
+
+    def create_missing_invoices(self, orders):
+        """Create invoices for orders that have none; safe to re-run. Returns how many were created."""
+        before = Invoice.objects.filter(order__in=orders).count()
+        order_ids = list(orders.filter(invoice__isnull=True).order_by('id').values_list('id', flat=True))
+        for i in range(0, len(order_ids), INSERT_BATCH_SIZE):
+            self.create_invoices(order_ids[i:i + INSERT_BATCH_SIZE])
+        return Invoice.objects.filter(order__in=orders).count() - before
+
+    def handle(self, *args, **options):
+        month = None
+        if options['month']:
+            try:
+                month = datetime.strptime(options['month'], '%Y-%m')
+            except ValueError:
+                raise CommandError('--month must be in YYYY-MM format')
+
+        orders = self.paid_orders(month)
+        created = self.create_missing_invoices(orders)
+        self.stdout.write(f'Created {created} invoices')
+
+        invoices = list(
+            Invoice.objects.filter(order__in=orders).select_related('order').prefetch_related('order__items')
+        )
+
+        # Resume: renders already in the cache for the current invoice data are skipped
+        pending = [
+            invoice.id for invoice in invoices
+            if not os.path.exists(cache_path(invoice.id, invoice_fingerprint(invoice)))
+        ]
+        self.stdout.write(f'{len(invoices)} invoices, {len(invoices) - len(pending)} already rendered, {len(pending)} to render')
+
+        if pending:
+            self.render(pending, max(options['workers'], 1), max(options['batch_size'], 1))
+
+        if options['zip']:
+            self.write_bundles(invoices)
+
+    def render(self, invoice_ids, workers, batch_size):
+        batches = [invoice_ids[i:i + batch_size] for i in range(0, len(invoice_ids), batch_size)]
+        done = pages = failed = 0
+        started = time.perf_counter()
+
+        # Worker processes must open their own database connections
+        connections.close_all()
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=init_worker)
+        try:
+            futures = [executor.submit(render_batch, batch) for batch in batches]
+            for future in as_completed(futures):
+                for invoice_id, path, page_count in future.result():
+                    done += 1
+                    pages += page_count
+                    if path is None:
+                        failed += 1
+                        self.stdout.write(self.style.WARNING(f'Could not render invoice #{invoice_id}'))
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f'Rendered {done}/{len(invoice_ids)} ({done * 100 // len(invoice_ids)}%) '
+                    f'- {pages / elapsed:.1f} pages/s'
+                )
+        except KeyboardInterrupt:
+            executor.shutdown(wait=False, cancel_futures=True)
+            self.stdout.write(self.style.WARNING('Interrupted; run the command again to resume'))
+            raise
+        executor.shutdown()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Rendered {done - failed} invoices ({pages} pages) in {elapsed:.1f}s '
+            f'with {workers} workers: {pages / elapsed:.1f} pages/s'
+        ))
+
+    def write_bundles(self, invoices):
+        by_month = defaultdict(list)
+        for invoice in invoices:
+            path = cache_path(invoice.id, invoice_fingerprint(invoice))
+            if os.path.exists(path):
+                by_month[invoice.order.created_at.strftime('%Y-%m')].append((invoice, path))
+
+        bundle_dir = os.path.join(settings.MEDIA_ROOT, 'invoices', 'bundles')
+        os.makedirs(bundle_dir, exist_ok=True)
+        for month, files in sorted(by_month.items()):
+            bundle_path = os.path.join(bundle_dir, f'invoices-{month}.zip')
+            fd, tmp_path = tempfile.mkstemp(dir=bundle_dir, suffix='.tmp')
+            os.close(fd)
+            # PDFs are already compressed, so store them as-is
+            with zipfile.ZipFile(tmp_path, 'w', compression=zipfile.ZIP_STORED) as bundle:
+                for invoice, path in files:
+                    bundle.write(path, arcname=f'Invoice_{invoice.invoice_number}.pdf')
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, bundle_path)
+            self.stdout.write(self.style.SUCCESS(f'Wrote {bundle_path} ({len(files)} invoices)'))
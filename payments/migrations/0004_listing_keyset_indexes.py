@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-17 00:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0005_listing_keyset_indexes'),
+        ('payments', '0003_alter_payment_gateway_name_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['created_at', 'id'], name='payments_in_created_ab4de8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['created_at', 'id'], name='payments_pa_created_af5130_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['status', 'created_at', 'id'], name='payments_pa_status_8d2518_idx'),
+        ),
+    ]
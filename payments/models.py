@@ -62,6 +62,9 @@ class Payment(models.Model):
             models.Index(fields=['order']),
             models.Index(fields=['user']),
             models.Index(fields=['status']),
+            # Keyset pagination of the admin payment list
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['status', 'created_at', 'id']),
         ]
     
     def __str__(self):
@@ -131,32 +134,43 @@ class Invoice(models.Model):
             models.Index(fields=['invoice_number']),
             models.Index(fields=['order']),
             models.Index(fields=['status']),
+            # Keyset pagination of the invoice list
+            models.Index(fields=['created_at', 'id']),
         ]
     
     def __str__(self):
         return f"Invoice {self.invoice_number}"
     
+    @staticmethod
+    def generate_invoice_number():
+        """Invoice number in the INV-YYYY-MM-XXXXXX format"""
+        from django.utils import timezone
+        import uuid
+        now = timezone.now()
+        return f"INV-{now.year}-{now.month:02d}-{str(uuid.uuid4())[:6].upper()}"
+    
+    def fill_from_order(self):
+        """Copy customer details and amounts from the order (and its user)"""
+        self.customer_name = self.order.shipping_name
+        self.customer_email = self.order.user.email
+        self.customer_phone = self.order.shipping_phone
+        self.customer_address = f"{self.order.shipping_address}, {self.order.shipping_city}, {self.order.shipping_country}"
+        
+        # Copy amounts from order
+        self.subtotal = self.order.subtotal
+        self.tax_amount = self.order.tax_amount
+        self.discount_amount = self.order.discount_amount
+        self.shipping_amount = self.order.shipping_cost
+        self.total_amount = self.order.total_amount
+    
     def save(self, *args, **kwargs):
         if not self.invoice_number:
-            from django.utils import timezone
-            now = timezone.now()
             # Generate invoice number: INV-YYYY-MM-XXXXXX
-            import uuid
-            self.invoice_number = f"INV-{now.year}-{now.month:02d}-{str(uuid.uuid4())[:6].upper()}"
+            self.invoice_number = self.generate_invoice_number()
         
         # Copy customer details from order if not set
         if self.order and not self.customer_name:
-            self.customer_name = self.order.shipping_name
-            self.customer_email = self.order.user.email
-            self.customer_phone = self.order.shipping_phone
-            self.customer_address = f"{self.order.shipping_address}, {self.order.shipping_city}, {self.order.shipping_country}"
-            
-            # Copy amounts from order
-            self.subtotal = self.order.subtotal
-            self.tax_amount = self.order.tax_amount
-            self.discount_amount = self.order.discount_amount
-            self.shipping_amount = self.order.shipping_cost
-            self.total_amount = self.order.total_amount
+            self.fill_from_order()
         
         super().save(*args, **kwargs)
 
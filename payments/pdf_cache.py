@@ -0,0 +1,118 @@
+"""
+On-disk cache of rendered invoice PDFs.
+
+A rendered PDF is stored under MEDIA_ROOT/invoices/cache as
+<invoice id>-<fingerprint>.pdf, where the fingerprint hashes every invoice
+field plus the order and order item fields the PDF shows. Editing the
+invoice, its order or its items therefore changes the file name and the
+stale render is never served; the signal handlers only delete old files.
+The fingerprint doubles as the ETag, so browsers holding an older PDF get
+the new one instead of a 304.
+"""
+import glob
+import hashlib
+import os
+import tempfile
+
+from django.conf import settings
+from django.http import FileResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+
+
+CACHE_DIR = os.path.join('invoices', 'cache')
+
+# Bump when the PDF layout changes so existing renders are regenerated
+RENDER_VERSION = 1
+
+
+def cache_dir():
+    return os.path.join(settings.MEDIA_ROOT, CACHE_DIR)
+
+
+def invoice_fingerprint(invoice):
+    """
+    Content hash of everything that ends up in the invoice PDF. Reads the
+    order's items through order.items.all(), so prefetch order__items when
+    fingerprinting many invoices.
+    """
+    order = invoice.order
+    parts = [str(RENDER_VERSION)]
+    parts += [field.value_to_string(invoice) for field in invoice._meta.concrete_fields]
+    parts += [order.order_number, order.payment_method, order.updated_at.isoformat()]
+    for item in sorted(order.items.all(), key=lambda item: item.id):
+        parts += [
+            str(item.id), item.medicine_name, item.medicine_strength, item.medicine_dosage_form,
+            str(item.quantity), str(item.unit_price), str(item.total_price),
+        ]
+    return hashlib.sha256('\x1f'.join(parts).encode('utf-8')).hexdigest()[:32]
+
+
+def cache_path(invoice_id, fingerprint):
+    return os.path.join(cache_dir(), f'{invoice_id}-{fingerprint}.pdf')
+
+
+def invalidate(invoice_id, keep=None):
+    """Delete cached renders of an invoice, except the file named keep"""
+    for path in glob.glob(os.path.join(cache_dir(), f'{invoice_id}-*.pdf')):
+        if path != keep:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def store(invoice, fingerprint, pdf_content):
+    """Write a render atomically and drop older renders of the same invoice"""
+    path = cache_path(invoice.id, fingerprint)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            tmp.write(pdf_content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    invalidate(invoice.id, keep=path)
+    return path
+
+
+def get_invoice_pdf(invoice, render):
+    """
+    Path and fingerprint of the cached PDF for invoice, calling render(invoice)
+    to build it on a miss. Returns (None, fingerprint) if rendering fails.
+    """
+    fingerprint = invoice_fingerprint(invoice)
+    path = cache_path(invoice.id, fingerprint)
+    if os.path.exists(path):
+        return path, fingerprint
+
+    pdf_content = render(invoice)
+    if not pdf_content:
+        return None, fingerprint
+    return store(invoice, fingerprint, pdf_content), fingerprint
+
+
+def serve_invoice_pdf(request, invoice, render, as_attachment):
+    """
+    Stream the cached invoice PDF, answering If-None-Match with 304.
+    Returns None if the PDF could not be generated.
+    """
+    fingerprint = invoice_fingerprint(invoice)
+    etag = f'"{fingerprint}"'
+
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        path, fingerprint = get_invoice_pdf(invoice, render)
+        if path is None:
+            return None
+        response = FileResponse(
+            open(path, 'rb'),
+            content_type='application/pdf',
+            as_attachment=as_attachment,
+            filename=f'Invoice_{invoice.invoice_number}.pdf',
+        )
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -0,0 +1,37 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from orders.models import Order, OrderItem
+from pharmazone import counters
+from .models import CouponUsage, Invoice
+from .pdf_cache import invalidate
+
+
+def invalidate_order_invoice(order_id):
+    """Drop cached PDFs of the order's invoice once the change commits"""
+    def clear():
+        for invoice_id in Invoice.objects.filter(order_id=order_id).values_list('id', flat=True):
+            invalidate(invoice_id)
+    transaction.on_commit(clear)
+
+
+@receiver(post_delete, sender=Invoice)
+def invoice_deleted(sender, instance, **kwargs):
+    invoice_id = instance.id
+    transaction.on_commit(lambda: invalidate(invoice_id))
+
+
+@receiver(post_save, sender=Order)
+def order_saved(sender, instance, created, **kwargs):
+    if not created:
+        invalidate_order_invoice(instance.id)
+
+
+@receiver(post_save, sender=OrderItem)
+@receiver(post_delete, sender=OrderItem)
+def order_item_changed(sender, instance, **kwargs):
+    invalidate_order_invoice(instance.order_id)
+
+
+counters.register(CouponUsage, 'coupon', used_count=counters.CountOf())
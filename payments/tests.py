@@ -1,3 +1,131 @@
-from django.test import TestCase
+import shutil
+import sys
+import tempfile
+from decimal import Decimal
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from accounts.models import User
+from orders.models import Order, OrderItem
+from orders.tests import create_medicine
+from pharmazone import lazy_imports
+from pharmazone.lazy_imports import is_installed
+from pharmazone.startup import STARTUP_BUDGET_SECONDS, measure_startup
+from .management.commands.generate_monthly_invoices import Command as GenerateMonthlyInvoices
+from .models import Invoice
+from .pdf_cache import invoice_fingerprint, serve_invoice_pdf
+from .views import generate_invoice_pdf
+
+
+class StartupBudgetTests(SimpleTestCase):
+
+    def test_worker_startup_skips_heavy_imports_and_meets_budget(self):
+        profile = measure_startup()
+
+        self.assertEqual(profile['deferred_loaded'], [])
+        self.assertLess(profile['total_seconds'], STARTUP_BUDGET_SECONDS)
+
+
+@skipUnless(is_installed('reportlab'), 'ReportLab is not installed')
+class LazyInvoicePdfTests(TestCase):
+
+    def test_reportlab_is_loaded_on_first_render(self):
+        user = User.objects.create_user(username='customer', password='pass12345', email='c@example.com')
+        order = Order.objects.create(
+            user=user,
+            subtotal=Decimal('100.00'),
+            total_amount=Decimal('200.00'),
+            shipping_name='Test Customer',
+            shipping_address='Baneshwor',
+            shipping_city='Kathmandu',
+            shipping_phone='9800000000',
+        )
+        invoice = Invoice.objects.create(order=order)
+
+        # Start from a process state where nothing has imported ReportLab yet;
+        # patch.dict puts the modules back afterwards
+        with mock.patch.dict(sys.modules), mock.patch.dict(lazy_imports._modules):
+            for name in [name for name in sys.modules if name.split('.')[0] == 'reportlab']:
+                del sys.modules[name]
+            lazy_imports._modules.pop('reportlab', None)
+            self.assertNotIn('reportlab', sys.modules)
+
+            self.assertTrue(generate_invoice_pdf(invoice).startswith(b'%PDF'))
+
+            self.assertIn('reportlab', sys.modules)
+
+
+def create_paid_order(user):
+    return Order.objects.create(
+        user=user,
+        subtotal=Decimal('100.00'),
+        total_amount=Decimal('200.00'),
+        payment_status='paid',
+        shipping_name='Test Customer',
+        shipping_address='Baneshwor',
+        shipping_city='Kathmandu',
+        shipping_phone='9800000000',
+    )
+
+
+class CreateMissingInvoicesTests(TestCase):
+
+    def test_numbers_already_in_use_are_replaced_not_dropped(self):
+        user = User.objects.create_user(username='customer', password='pass12345', email='c@example.com')
+        invoiced = create_paid_order(user)
+        Invoice.objects.create(order=invoiced, invoice_number='INV-2026-01-AAAAAA')
+        for i in range(3):
+            create_paid_order(user)
+
+        # The first number drawn collides with the existing invoice
+        numbers = iter(['INV-2026-01-AAAAAA', 'INV-2026-01-BBBBBB', 'INV-2026-01-CCCCCC', 'INV-2026-01-DDDDDD', 'INV-2026-01-EEEEEE'])
+        with mock.patch.object(Invoice, 'generate_invoice_number', side_effect=lambda: next(numbers)):
+            created = GenerateMonthlyInvoices().create_missing_invoices(Order.objects.filter(payment_status='paid'))
+
+        self.assertEqual(created, 3)
+        self.assertEqual(Invoice.objects.count(), 4)
+        self.assertEqual(Invoice.objects.filter(invoice_number='INV-2026-01-AAAAAA').count(), 1)
+
+        # Re-running creates nothing
+        self.assertEqual(GenerateMonthlyInvoices().create_missing_invoices(Order.objects.filter(payment_status='paid')), 0)
+
+
+class InvoicePdfCacheTests(TestCase):
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        user = User.objects.create_user(username='customer', password='pass12345', email='c@example.com')
+        self.invoice = Invoice.objects.create(order=create_paid_order(user))
+        self.item = OrderItem.objects.create(
+            order=self.invoice.order, medicine=create_medicine(), quantity=2, unit_price=Decimal('50.00')
+        )
+
+    def serve(self, etag=None):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        request = RequestFactory().get('/invoice.pdf', **headers)
+        invoice = Invoice.objects.select_related('order').get(pk=self.invoice.pk)
+        return serve_invoice_pdf(request, invoice, lambda invoice: b'%PDF-1.4 test', as_attachment=False)
+
+    def test_item_changes_change_the_etag(self):
+        etag = self.serve()['ETag']
+        self.assertEqual(self.serve(etag).status_code, 304)
+
+        # An update() changes neither the invoice nor the order row
+        OrderItem.objects.filter(pk=self.item.pk).update(quantity=3, total_price=Decimal('150.00'))
+
+        response = self.serve(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_fingerprint_uses_prefetched_items(self):
+        invoice = Invoice.objects.select_related('order').prefetch_related('order__items').get(pk=self.invoice.pk)
+
+        with self.assertNumQueries(0):
+            fingerprint = invoice_fingerprint(invoice)
+        self.assertEqual(fingerprint, invoice_fingerprint(Invoice.objects.get(pk=self.invoice.pk)))
@@ -9,13 +9,16 @@ from django.utils import timezone
 from django.template.loader import render_to_string
 from .models import Payment, Refund, Coupon, CouponUsage, Invoice
 from .forms import CouponForm
+from .pdf_cache import serve_invoice_pdf
 from orders.models import Order
 import json
 import uuid
 import hmac
 import hashlib
 import base64
-import requests
+from pharmazone.exports import Column, choice_labels, export_response
+from pharmazone.lazy_imports import optional_module
+from pharmazone.pagination import CursorPaginator
 
 
 def is_secure_admin(user):
@@ -25,21 +28,12 @@ def is_secure_admin(user):
             user.username == 'admin')
 
 
-# PDF generation imports
-try:
-    from reportlab.lib.pagesizes import letter, A4
-    from reportlab.lib import colors
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib.units import inch
-    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
-    from reportlab.pdfgen import canvas
-    from reportlab.lib.enums import TA_CENTER, TA_RIGHT, TA_LEFT
-    PDF_AVAILABLE = True
-except ImportError:
-    PDF_AVAILABLE = False
+# PDF engines are imported on first use through optional_module(), not here:
+# every worker imports this module when the URLconf loads, but only the
+# invoice endpoints need them.
 
 # WeasyPrint as alternative (disabled for now due to macOS issues)
-WEASYPRINT_AVAILABLE = False
+WEASYPRINT_ENABLED = False
 
 
 def generate_esewa_signature(key, message):
@@ -76,9 +70,16 @@ def create_invoice_for_order(order):
 
 def generate_invoice_pdf(invoice):
     """Generate compact, single-page PDF invoice using ReportLab"""
-    if not PDF_AVAILABLE:
+    if optional_module('reportlab') is None:
         return None
     
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib import colors
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+    from reportlab.lib.enums import TA_CENTER
+    
     from io import BytesIO
     buffer = BytesIO()
     
@@ -399,7 +400,8 @@ def generate_invoice_pdf(invoice):
 
 def generate_invoice_html_pdf(invoice):
     """Generate PDF invoice using WeasyPrint (HTML to PDF)"""
-    if not WEASYPRINT_AVAILABLE:
+    weasyprint = optional_module('weasyprint') if WEASYPRINT_ENABLED else None
+    if weasyprint is None:
         return None
     
     try:
@@ -414,6 +416,11 @@ def generate_invoice_html_pdf(invoice):
         return None
 
 
+def render_invoice_pdf(invoice):
+    """Render invoice PDF bytes, trying ReportLab first, then WeasyPrint"""
+    return generate_invoice_pdf(invoice) or generate_invoice_html_pdf(invoice)
+
+
 @login_required
 def process_payment(request, order_id):
     """Process payment for an order"""
@@ -908,6 +915,48 @@ def refund_request(request, order_id):
     return render(request, 'payments/refund_request.html', context)
 
 
+PAYMENT_EXPORT_COLUMNS = [
+    Column('Payment ID', 'payment_id'),
+    Column('Date', 'created_at'),
+    Column('Order #', 'order__order_number'),
+    Column('Customer', 'user__username'),
+    Column('Amount', 'amount'),
+    Column('Currency', 'currency'),
+    Column('Method', 'payment_method', choice_labels(Payment.PAYMENT_METHOD_CHOICES)),
+    Column('Gateway', 'gateway_name'),
+    Column('Transaction ID', 'gateway_transaction_id'),
+    Column('Status', 'status', choice_labels(Payment.STATUS_CHOICES)),
+]
+
+REFUND_EXPORT_COLUMNS = [
+    Column('Refund ID', 'refund_id'),
+    Column('Requested', 'created_at'),
+    Column('Payment ID', 'payment__payment_id'),
+    Column('Order #', 'payment__order__order_number'),
+    Column('Customer', 'payment__user__username'),
+    Column('Amount', 'amount'),
+    Column('Reason', 'reason'),
+    Column('Status', 'status', choice_labels(Refund.STATUS_CHOICES)),
+    Column('Completed', 'completed_at'),
+    Column('Processed By', 'processed_by__username'),
+]
+
+INVOICE_EXPORT_COLUMNS = [
+    Column('Invoice #', 'invoice_number'),
+    Column('Issued', 'issue_date'),
+    Column('Order #', 'order__order_number'),
+    Column('Customer', 'customer_name'),
+    Column('Email', 'customer_email'),
+    Column('Status', 'status', choice_labels(Invoice.STATUS_CHOICES)),
+    Column('Subtotal', 'subtotal'),
+    Column('Tax', 'tax_amount'),
+    Column('Discount', 'discount_amount'),
+    Column('Shipping', 'shipping_amount'),
+    Column('Total', 'total_amount'),
+    Column('Due', 'due_date'),
+]
+
+
 # Admin views for payment management
 @login_required
 def admin_payment_list(request):
@@ -916,13 +965,21 @@ def admin_payment_list(request):
         messages.error(request, 'Access denied.')
         return redirect('products:home')
     
-    payments = Payment.objects.all().order_by('-created_at')
+    payments = Payment.objects.select_related('order', 'user')
     
     # Filter by status
     status_filter = request.GET.get('status')
     if status_filter:
         payments = payments.filter(status=status_filter)
     
+    # ?export=csv|xlsx streams every matching payment instead of one page
+    response = export_response(request, payments.order_by('-created_at', '-id'), PAYMENT_EXPORT_COLUMNS, 'payments')
+    if response:
+        return response
+    
+    # Keyset pagination, newest first
+    payments = CursorPaginator(payments, 25, ['-created_at']).get_page(request.GET.get('cursor'))
+    
     context = {
         'payments': payments,
         'status_choices': Payment.STATUS_CHOICES,
@@ -945,6 +1002,10 @@ def admin_refund_list(request):
     if status_filter:
         refunds = refunds.filter(status=status_filter)
     
+    response = export_response(request, refunds, REFUND_EXPORT_COLUMNS, 'refunds')
+    if response:
+        return response
+    
     context = {
         'refunds': refunds,
         'status_choices': Refund.STATUS_CHOICES,
@@ -1029,52 +1090,40 @@ def invoice_detail(request, invoice_id):
 @login_required
 def download_invoice_pdf(request, invoice_id):
     """Download invoice as PDF"""
-    invoice = get_object_or_404(Invoice, id=invoice_id)
+    invoice = get_object_or_404(Invoice.objects.select_related('order__user'), id=invoice_id)
     
     # Check permissions
     if not (request.user == invoice.order.user or request.user.is_staff):
         messages.error(request, 'Access denied.')
         return redirect('products:home')
     
-    # Try ReportLab first, then WeasyPrint
-    pdf_content = generate_invoice_pdf(invoice)
-    if not pdf_content:
-        pdf_content = generate_invoice_html_pdf(invoice)
+    # Serve the cached render, generating it on first request
+    response = serve_invoice_pdf(request, invoice, render_invoice_pdf, as_attachment=True)
     
-    if not pdf_content:
+    if response is None:
         messages.error(request, 'Unable to generate PDF. Please contact support.')
         return redirect('payments:invoice_detail', invoice_id=invoice.id)
     
-    # Create HTTP response with PDF
-    response = HttpResponse(pdf_content, content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="Invoice_{invoice.invoice_number}.pdf"'
-    
     return response
 
 
 @login_required
 def view_invoice_pdf(request, invoice_id):
     """View invoice PDF in browser"""
-    invoice = get_object_or_404(Invoice, id=invoice_id)
+    invoice = get_object_or_404(Invoice.objects.select_related('order__user'), id=invoice_id)
     
     # Check permissions
     if not (request.user == invoice.order.user or request.user.is_staff):
         messages.error(request, 'Access denied.')
         return redirect('products:home')
     
-    # Try ReportLab first, then WeasyPrint
-    pdf_content = generate_invoice_pdf(invoice)
-    if not pdf_content:
-        pdf_content = generate_invoice_html_pdf(invoice)
+    # Serve the cached render, generating it on first request
+    response = serve_invoice_pdf(request, invoice, render_invoice_pdf, as_attachment=False)
     
-    if not pdf_content:
+    if response is None:
         messages.error(request, 'Unable to generate PDF. Please contact support.')
         return redirect('payments:invoice_detail', invoice_id=invoice.id)
     
-    # Create HTTP response with PDF for viewing
-    response = HttpResponse(pdf_content, content_type='application/pdf')
-    response['Content-Disposition'] = f'inline; filename="Invoice_{invoice.invoice_number}.pdf"'
-    
     return response
 
 
@@ -1082,9 +1131,17 @@ def view_invoice_pdf(request, invoice_id):
 def invoice_list(request):
     """List user's invoices"""
     if is_secure_admin(request.user):
-        invoices = Invoice.objects.all().order_by('-created_at')
+        invoices = Invoice.objects.all()
     else:
-        invoices = Invoice.objects.filter(order__user=request.user).order_by('-created_at')
+        invoices = Invoice.objects.filter(order__user=request.user)
+    
+    response = export_response(request, invoices.order_by('-created_at', '-id'), INVOICE_EXPORT_COLUMNS, 'invoices')
+    if response:
+        return response
+    
+    # Keyset pagination, newest first
+    paginator = CursorPaginator(invoices.select_related('order'), 20, ['-created_at'], count='approximate')
+    invoices = paginator.get_page(request.GET.get('cursor'))
     
     context = {
         'invoices': invoices,
@@ -4,4 +4,8 @@ from django.apps import AppConfig
 class PharmacistChatConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'pharmacist_chat'
-    verbose_name = 'Ask a Pharmacist'
\ No newline at end of file
+    verbose_name = 'Ask a Pharmacist'
+
+    def ready(self):
+        # Registers the auto-reply outbox job and the new-message signal
+        from . import replies, signals  # noqa: F401
@@ -0,0 +1,834 @@
+"""
+Intent matching for the pharmacist auto-responder.
+
+Replies are declared as a table of intents, each with the keywords that
+trigger it. The first intent in table order with a keyword anywhere in the
+message wins, and refinements choose a more specific reply within it (e.g.
+a dosage question that names paracetamol).
+
+All keywords are compiled once, at import, into a single trie-shaped regex
+that is tried at every position of the message, so one pass finds every
+keyword occurrence instead of one substring scan per keyword. At each
+position the regex takes the longest keyword, and every shorter keyword
+matching there is a prefix of it, so the prefix closure computed at build
+time gives exactly the intents the old chain of any() checks would see.
+"""
+import re
+
+
+class Refinement:
+    """A more specific reply inside an intent"""
+
+    def __init__(self, keywords, reply):
+        self.keywords = keywords
+        self.reply = reply
+
+
+class Intent:
+    """A reply and the keywords that trigger it"""
+
+    def __init__(self, name, keywords, reply, refinements=()):
+        self.name = name
+        self.keywords = keywords
+        self.reply = reply
+        self.refinements = list(refinements)
+
+
+def _trie_pattern(words):
+    """Regex source matching the longest of words at a position"""
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        pattern = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f'(?:{pattern})?' if '' in node else pattern
+
+    return build(trie)
+
+
+class IntentMatcher:
+    """Finds which intents and refinements a text triggers in one regex pass"""
+
+    def __init__(self, intents):
+        self.intents = intents
+        groups = {}
+        for intent in intents:
+            groups[id(intent)] = intent.keywords
+            for refinement in intent.refinements:
+                groups[id(refinement)] = refinement.keywords
+
+        # keyword -> ids of every group with that keyword or a prefix of it
+        owners = {}
+        for group_id, keywords in groups.items():
+            for keyword in keywords:
+                owners.setdefault(keyword.lower(), set()).add(group_id)
+        self.hits_for = {
+            keyword: frozenset().union(*(ids for other, ids in owners.items() if keyword.startswith(other)))
+            for keyword in owners
+        }
+        self.pattern = re.compile('(?=(' + _trie_pattern(owners) + '))')
+
+    def hits(self, text):
+        """Ids of the keyword groups that occur in text"""
+        found = set()
+        for match in self.pattern.finditer(text.lower()):
+            found |= self.hits_for[match.group(1)]
+        return found
+
+    def match(self, text):
+        """The reply for text, or None if no intent matches"""
+        found = self.hits(text)
+        for intent in self.intents:
+            if id(intent) not in found:
+                continue
+            for refinement in intent.refinements:
+                if id(refinement) in found:
+                    return refinement.reply
+            return intent.reply
+        return None
+
+
+# Replies to chat messages
+
+GREETING_REPLY = "Hello! I'm your friendly pharmacist. I'm here to help you with any questions about medicines or health. What can I help you with today?"
+
+THANKS_REPLY = "You're very welcome! I'm happy to help. Feel free to ask me anything else about medicines or your health anytime."
+
+FEVER_MEDICINE_REPLY = """For fever, you can take:
+
+• **Paracetamol** - 1 tablet (500mg) every 6 hours
+• **Maximum 4 tablets per day**
+• Take with water after eating food
+
+**Other things to do:**
+• Drink lots of water
+• Rest and sleep
+• Use wet cloth on forehead
+• Wear light clothes
+
+**See a doctor if:**
+• Fever is very high (above 103°F)
+• Fever for more than 3 days
+• Severe headache or body pain
+
+What's your age? This helps me give better advice."""
+
+FEVER_SYMPTOMS_REPLY = """Fever symptoms include:
+• Body feels hot
+• Shivering and chills
+• Headache
+• Body pain and weakness
+• Not feeling hungry
+• Feeling tired
+
+**Normal body temperature:** 98.6°F (37°C)
+**Fever:** Above 100.4°F (38°C)
+
+Do you want to know what medicine to take for fever?"""
+
+HEADACHE_REPLY = """For headache relief:
+
+**Medicines you can take:**
+• **Paracetamol** - 1 tablet (500mg) every 6 hours
+• **Ibuprofen** - 1 tablet (400mg) every 8 hours
+• Take with food and water
+
+**Simple home remedies:**
+• Rest in a quiet, dark room
+• Put cold cloth on forehead
+• Drink plenty of water
+• Gentle head massage
+• Get enough sleep
+
+**See a doctor if:**
+• Very severe sudden headache
+• Headache with fever and neck stiffness
+• Headaches happening often
+
+How severe is your headache - mild, moderate, or severe?"""
+
+COUGH_REPLY = """For cough treatment:
+
+**Dry cough (no phlegm):**
+• Cough syrup with Dextromethorphan
+• Honey with warm water
+• Steam inhalation (hot water vapor)
+
+**Wet cough (with phlegm):**
+• Cough syrup with Bromhexine
+• Drink warm water frequently
+• Don't take dry cough medicine
+
+**Home remedies:**
+• Warm salt water gargling
+• Ginger tea with honey
+• Stay hydrated
+
+**See a doctor if:**
+• Cough with blood
+• High fever with cough
+• Cough for more than 2 weeks
+
+Is your cough dry or do you cough up phlegm?"""
+
+STOMACH_REPLY = """For stomach problems:
+
+**Acidity/Heartburn:**
+• **ENO** or **Gelusil** - 1 packet in water
+• **Omeprazole** - 1 tablet before breakfast (for frequent acidity)
+• Avoid spicy and oily food
+
+**Gas/Bloating:**
+• **Simethicone** tablets
+• Drink warm water
+• Light walking after meals
+
+**General stomach upset:**
+• **ORS** - 1 packet in 1 liter water
+• Eat simple food (rice, banana, toast)
+• Avoid milk and spicy food
+
+**See a doctor if:**
+• Severe stomach pain
+• Blood in vomit
+• Pain for more than 2 days
+
+What type of stomach problem do you have - acidity, gas, or pain?"""
+
+COLD_FLU_REPLY = """For cold and flu:
+
+**Medicines:**
+• **Paracetamol** - for fever and body pain
+• **Cetirizine** - for runny nose and sneezing
+• **Nasal drops** - for blocked nose
+
+**Home remedies:**
+• Steam inhalation 2-3 times daily
+• Warm salt water gargling
+• Drink warm liquids (tea, soup)
+• Get plenty of rest
+• Eat nutritious food
+
+**Prevention:**
+• Wash hands frequently
+• Avoid crowded places
+• Wear mask if needed
+
+**See a doctor if:**
+• High fever for more than 3 days
+• Difficulty breathing
+• Severe throat pain
+
+How many days have you had these symptoms?"""
+
+PAIN_REPLY = """For pain relief:
+
+**General pain medicine:**
+• **Paracetamol** - 1 tablet (500mg) every 6 hours
+• **Ibuprofen** - 1 tablet (400mg) every 8 hours
+• Always take with food
+
+**For different types of pain:**
+• **Muscle pain** - Apply pain relief gel + take tablet
+• **Joint pain** - Ibuprofen works better
+• **Tooth pain** - See dentist + take paracetamol
+• **Back pain** - Rest + pain medicine + hot compress
+
+**Important:**
+• Don't take more than recommended dose
+• Don't take on empty stomach
+• Stop if you get stomach upset
+
+**See a doctor if:**
+• Very severe pain
+• Pain not getting better in 3 days
+• Pain with fever
+
+Where exactly is your pain and how severe is it?"""
+
+PARACETAMOL_DOSAGE_REPLY = """Paracetamol dosage:
+
+**Adults (18+ years):**
+• 1-2 tablets (500mg each) every 6 hours
+• Maximum 8 tablets per day
+• Take with water after food
+
+**Children:**
+• 6-12 years: Half tablet every 6 hours
+• 2-6 years: Quarter tablet every 6 hours
+• Under 2 years: Ask doctor first
+
+**Important:**
+• Don't exceed maximum dose
+• Take with food to avoid stomach upset
+• Space doses at least 4 hours apart
+
+How old are you? This helps me give exact dosage."""
+
+IBUPROFEN_DOSAGE_REPLY = """Ibuprofen dosage:
+
+**Adults:**
+• 1 tablet (400mg) every 8 hours
+• Maximum 3 tablets per day
+• Always take with food
+
+**Children over 6 months:**
+• Ask doctor for exact dose based on weight
+
+**Don't take if you have:**
+• Stomach ulcers
+• Heart problems
+• Kidney problems
+• Asthma (some people)
+
+**Important:**
+• Always take with food
+• Don't take on empty stomach
+• Stop if stomach upset occurs
+
+Do you have any of these health conditions?"""
+
+DOSAGE_REPLY = """I can help you with dosage information!
+
+**Please tell me:**
+• Which medicine are you asking about?
+• Your age (helps determine correct dose)
+• Any health conditions you have
+
+**Common medicines I can help with:**
+• Paracetamol (fever, pain)
+• Ibuprofen (pain, inflammation)
+• Cetirizine (allergy, cold)
+• Omeprazole (acidity)
+• Cough syrups
+
+What specific medicine do you need dosage information for?"""
+
+SIDE_EFFECTS_REPLY = """About medicine side effects:
+
+**Common mild side effects:**
+• Stomach upset or nausea
+• Drowsiness or dizziness
+• Mild skin rash
+• Headache
+
+**What to do for mild side effects:**
+• Take medicine with food
+• Drink plenty of water
+• Rest if feeling dizzy
+
+**Stop medicine immediately if:**
+• Severe skin rash or itching
+• Difficulty breathing
+• Severe stomach pain
+• Vomiting repeatedly
+• Swelling of face or throat
+
+**Get emergency help for:**
+• Can't breathe properly
+• Severe allergic reaction
+• Loss of consciousness
+
+**Which medicine are you taking and what symptoms are you having?**
+
+This helps me give you better advice about what to do."""
+
+PREGNANCY_REPLY = """Medicine during pregnancy:
+
+**Generally SAFE:**
+• Paracetamol (normal dose)
+• Some antibiotics (as prescribed by doctor)
+• Iron and folic acid tablets
+• Calcium supplements
+
+**Generally AVOID:**
+• Ibuprofen (especially last 3 months)
+• Aspirin
+• Most herbal medicines
+• Medicines not prescribed by doctor
+
+**Important:**
+• Always tell your doctor you're pregnant
+• Don't take any medicine without asking doctor first
+• Even safe medicines should be taken in correct dose
+
+**Which medicine are you asking about?**
+
+I can tell you if it's generally safe, but always confirm with your doctor."""
+
+CHILDREN_REPLY = """Medicine for children:
+
+**Important points:**
+• Children need different doses than adults
+• Many adult medicines are not safe for children
+• Always use children's formulations when available
+
+**Safe medicines for children:**
+• Paracetamol syrup/drops (any age)
+• Ibuprofen syrup (over 6 months)
+• ORS for loose motions
+• Saline drops for nose
+
+**Never give children:**
+• Adult tablets (unless doctor says)
+• Aspirin (under 16 years)
+• Cough medicines (under 2 years)
+
+**For dosage:**
+• Tell me child's age and weight
+• I'll give exact amount to give
+
+**How old is the child and what problem are they having?**"""
+
+DIABETES_REPLY = """About diabetes and medicines:
+
+**If you have diabetes:**
+• Some medicines can affect blood sugar
+• Always tell pharmacist/doctor you have diabetes
+• Check blood sugar regularly
+• Take diabetes medicine on time
+
+**Medicines generally safe:**
+• Paracetamol (normal dose)
+• Most antibiotics
+• Blood pressure medicines
+
+**Be careful with:**
+• Cough syrups (may contain sugar)
+• Steroids (can increase sugar)
+• Some pain medicines
+
+**Important:**
+• Don't skip diabetes medicines
+• Eat regular meals
+• Monitor blood sugar when sick
+
+**What medicine are you asking about?**
+I can tell you if it's safe with diabetes."""
+
+BLOOD_PRESSURE_REPLY = """About blood pressure and medicines:
+
+**If you have high BP:**
+• Take BP medicine regularly
+• Don't stop suddenly
+• Check BP regularly
+• Limit salt in food
+
+**Medicines to be careful with:**
+• Some pain medicines (like ibuprofen)
+• Cold medicines with decongestants
+• Some herbal medicines
+
+**Generally safe:**
+• Paracetamol
+• Most antibiotics
+• Prescribed medicines
+
+**Important:**
+• Tell every doctor about your BP medicines
+• Don't take new medicines without asking
+• Monitor BP when taking new medicines
+
+**What medicine are you asking about?**
+I can tell you if it's safe with high blood pressure."""
+
+INTERACTIONS_REPLY = """About taking medicines together:
+
+**Some medicines don't mix well:**
+• Can make each other stronger or weaker
+• Can cause side effects
+• Can be dangerous sometimes
+
+**Common interactions:**
+• Blood thinners + Aspirin = bleeding risk
+• Some antibiotics + Antacids = less effective
+• Heart medicines + Some pain medicines = problems
+
+**To be safe:**
+• Tell me all medicines you're taking
+• Include vitamins and herbal products
+• Mention any health conditions
+
+**What medicines do you want to take together?**
+
+List all of them and I'll tell you if it's safe or if you need to space them out."""
+
+GENERAL_HEALTH_REPLY = """To stay healthy:
+
+**Good habits:**
+• Eat nutritious food (fruits, vegetables)
+• Drink 8-10 glasses of water daily
+• Exercise regularly (even walking is good)
+• Get 7-8 hours sleep
+• Wash hands frequently
+
+**Boost immunity:**
+• Vitamin C (citrus fruits, amla)
+• Vitamin D (sunlight, supplements)
+• Zinc supplements
+• Balanced diet
+
+**Avoid:**
+• Smoking and tobacco
+• Too much alcohol
+• Junk food regularly
+• Stress (try meditation)
+
+**Regular check-ups:**
+• Blood pressure
+• Blood sugar
+• Cholesterol
+• Weight monitoring
+
+**Any specific health concern you want to prevent or improve?**"""
+
+EMERGENCY_REPLY = """🚨 **This sounds serious!**
+
+**Go to hospital immediately if:**
+• Can't breathe properly
+• Severe chest pain
+• Unconscious or very confused
+• Severe bleeding
+• Very high fever with neck stiffness
+• Severe allergic reaction (swelling, rash)
+
+**Call ambulance or go to nearest hospital NOW**
+
+**For less urgent problems:**
+• Visit nearest clinic
+• Call your family doctor
+• Go to pharmacy for advice
+
+**Is this an emergency right now?**
+If yes, please get medical help immediately and don't wait for my response."""
+
+MEDICINE_REPLY = """I can help you with any medicine questions!
+
+**Common things I help with:**
+• What medicine to take for symptoms
+• How much to take (dosage)
+• When to take (timing)
+• Side effects to watch for
+• Can you take medicines together
+• Safe for pregnancy/children
+
+**Popular medicines I know about:**
+• Paracetamol (fever, pain)
+• Ibuprofen (pain, swelling)
+• Cetirizine (allergy, cold)
+• Omeprazole (acidity)
+• Antibiotics (infections)
+• Cough syrups
+• Vitamins
+
+**What specific medicine question do you have?**
+Tell me the medicine name or your symptoms."""
+
+AGE_REPLY = """Age is important for medicine dosage!
+
+**Different ages need different doses:**
+• **Babies (0-2 years):** Special baby medicines only
+• **Children (2-12 years):** Child doses, usually syrups
+• **Teenagers (12-18 years):** Usually adult dose but check
+• **Adults (18-65 years):** Standard adult doses
+• **Elderly (65+ years):** Sometimes need lower doses
+
+**Tell me:**
+• How old are you (or the person taking medicine)?
+• What medicine or symptom?
+
+**This helps me give you the exact right amount to take safely.**
+
+Age-appropriate dosing is very important for safety and effectiveness."""
+
+TIMING_REPLY = """Medicine timing is important:
+
+**Before food (empty stomach):**
+• Some antibiotics
+• Omeprazole (acidity medicine)
+• Iron tablets
+
+**After food:**
+• Paracetamol
+• Ibuprofen
+• Most pain medicines
+• Vitamins
+
+**Anytime:**
+• Cetirizine (allergy)
+• Most cough syrups
+
+**Morning:**
+• Blood pressure medicines
+• Diabetes medicines
+• Vitamins
+
+**Night:**
+• Some allergy medicines (make sleepy)
+• Some antibiotics
+
+**Which medicine are you asking about?**
+I'll tell you the best time to take it for maximum benefit."""
+
+PRICE_REPLY = """About medicine prices:
+
+**Generic vs Brand:**
+• Generic medicines have same active ingredient
+• Much cheaper than branded medicines
+• Work exactly the same way
+• Government approved and safe
+
+**To save money:**
+• Ask for generic versions
+• Buy larger quantities (if you use regularly)
+• Compare prices at different pharmacies
+• Look for pharmacy discount schemes
+
+**We offer:**
+• Both generic and branded medicines
+• Competitive prices
+• Free delivery over Rs. 2000
+• Genuine medicines only
+
+**Which medicine are you looking for?**
+I can suggest good generic alternatives to save money."""
+
+STORAGE_REPLY = """How to store medicines properly:
+
+**General storage:**
+• Cool, dry place
+• Away from direct sunlight
+• Keep in original packaging
+• Away from children's reach
+
+**Refrigerator medicines:**
+• Some syrups and injections
+• Check label for "store in refrigerator"
+• Don't freeze
+
+**Don't store in:**
+• Bathroom (too humid)
+• Car (too hot)
+• Kitchen (heat and moisture)
+
+**Expiry dates:**
+• Never use expired medicines
+• Check date before taking
+• Dispose safely after expiry
+
+**Which medicine are you asking about storage for?**
+Some have special storage requirements."""
+
+DEFAULT_REPLY = """I'm here to help with your question: "{message}"
+
+**I can help you with:**
+• Medicine information and dosages
+• Treatment for common symptoms (fever, headache, cough, stomach problems)
+• Side effects and safety
+• Medicine interactions
+• Pregnancy and children's medicines
+• When to see a doctor
+
+**To give you the best answer, please tell me:**
+• Your age (helps with dosage)
+• Any health conditions you have
+• Other medicines you're taking
+• How severe is your problem
+
+**Feel free to ask me anything about:**
+• What medicine to take
+• How much to take
+• When to take it
+• Any concerns about medicines
+
+What specific information do you need?"""
+
+
+# Sent when building a reply fails
+FALLBACK_REPLY = """Thank you for your question: "{message}"
+
+I'm here to help! Could you please provide a bit more detail about:
+• What specific symptoms you're experiencing
+• Any medicines you're asking about
+• Your age (helps with dosage recommendations)
+
+I can help with:
+• Medicine dosages and usage
+• Treatment for common symptoms
+• Side effects and safety
+• When to see a doctor
+
+What specific information do you need?"""
+
+
+# Keyword table, in priority order
+INTENTS = [
+    Intent('greeting', ['hello', 'hi', 'hey', 'good morning', 'good evening', 'namaste'], GREETING_REPLY),
+    Intent('thanks', ['thank you', 'thanks', 'dhanyabad', 'appreciate'], THANKS_REPLY),
+    Intent('fever', ['fever', 'jworo', 'temperature', 'hot body'], FEVER_SYMPTOMS_REPLY, refinements=[
+        Refinement(['medicine', 'tablet', 'what to take'], FEVER_MEDICINE_REPLY),
+    ]),
+    Intent('headache', ['headache', 'head pain', 'migraine', 'tauko dukhyo'], HEADACHE_REPLY),
+    Intent('cough', ['cough', 'khoki', 'throat', 'sore throat'], COUGH_REPLY),
+    Intent('stomach', ['stomach', 'acidity', 'gas', 'indigestion', 'pet dukhyo', 'heartburn'], STOMACH_REPLY),
+    Intent('cold_flu', ['cold', 'flu', 'runny nose', 'blocked nose', 'sneezing'], COLD_FLU_REPLY),
+    Intent('pain', ['pain', 'ache', 'hurt', 'dukhyo', 'body pain'], PAIN_REPLY),
+    Intent('dosage', ['dosage', 'dose', 'how much', 'how many', 'kati ota'], DOSAGE_REPLY, refinements=[
+        Refinement(['paracetamol'], PARACETAMOL_DOSAGE_REPLY),
+        Refinement(['ibuprofen'], IBUPROFEN_DOSAGE_REPLY),
+    ]),
+    Intent('side_effects', ['side effect', 'reaction', 'allergy', 'problem after taking'], SIDE_EFFECTS_REPLY),
+    Intent('pregnancy', ['pregnant', 'pregnancy', 'garbhavati', 'expecting'], PREGNANCY_REPLY),
+    Intent('children', ['child', 'baby', 'kid', 'bachcha', 'years old'], CHILDREN_REPLY),
+    Intent('diabetes', ['diabetes', 'sugar', 'blood sugar', 'chini rog'], DIABETES_REPLY),
+    Intent('blood_pressure', ['blood pressure', 'bp', 'hypertension', 'high bp'], BLOOD_PRESSURE_REPLY),
+    Intent('interactions', ['together', 'with', 'same time', 'interaction', 'combine'], INTERACTIONS_REPLY),
+    Intent('general_health', ['healthy', 'prevention', 'avoid getting sick', 'immunity'], GENERAL_HEALTH_REPLY),
+    Intent('emergency', ['emergency', 'urgent', 'severe', "can't breathe", 'chest pain', 'unconscious'], EMERGENCY_REPLY),
+    Intent('medicine', ['medicine', 'tablet', 'syrup', 'capsule', 'ausadhi'], MEDICINE_REPLY),
+    Intent('age', ['age', 'years old', 'months old', 'elderly', 'old person'], AGE_REPLY),
+    Intent('timing', ['when to take', 'timing', 'before food', 'after food', 'morning', 'night'], TIMING_REPLY),
+    Intent('price', ['price', 'cost', 'expensive', 'cheap', 'generic'], PRICE_REPLY),
+    Intent('storage', ['store', 'storage', 'keep', 'expire', 'expiry'], STORAGE_REPLY),
+]
+
+
+# Replies to the subject of a new chat
+
+FEVER_SUBJECT_REPLY = """Hello! I'm here to help you with fever symptoms.
+
+**Common fever symptoms include:**
+• Body temperature above 100.4°F (38°C)
+• Chills and shivering
+• Headache
+• Muscle aches and weakness
+• Loss of appetite
+• Dehydration
+• General discomfort
+
+**For fever management:**
+• Take Paracetamol 500-1000mg every 4-6 hours (max 4000mg/day)
+• Drink plenty of fluids
+• Rest and avoid strenuous activities
+• Use cool compresses on forehead
+
+**When to see a doctor:**
+• Fever above 103°F (39.4°C)
+• Fever lasting more than 3 days
+• Severe headache or neck stiffness
+• Difficulty breathing
+• Persistent vomiting
+
+Do you have any specific questions about your fever or need medicine recommendations?"""
+
+HEADACHE_SUBJECT_REPLY = """I can help you with headache relief.
+
+**For headache treatment:**
+• Paracetamol 500-1000mg every 4-6 hours
+• Ibuprofen 400mg every 6-8 hours
+• Rest in a quiet, dark room
+• Apply cold or warm compress
+• Stay hydrated
+
+**When to consult a doctor:**
+• Sudden severe headache
+• Headache with fever and neck stiffness
+• Frequent headaches
+• Headache after head injury
+
+What type of headache are you experiencing? Is it mild, moderate, or severe?"""
+
+COUGH_SUBJECT_REPLY = """I can help you with cough treatment.
+
+**For dry cough:**
+• Dextromethorphan-based cough syrups
+• Honey and warm water
+• Steam inhalation
+
+**For productive cough:**
+• Bromhexine or Ambroxol syrups
+• Plenty of warm fluids
+• Avoid cough suppressants
+
+**General advice:**
+• Stay hydrated
+• Use a humidifier
+• Avoid irritants like smoke
+
+How long have you had this cough? Is it dry or producing phlegm?"""
+
+SUBJECT_INTENTS = [
+    Intent('fever', ['fever'], FEVER_SUBJECT_REPLY),
+    Intent('headache', ['headache'], HEADACHE_SUBJECT_REPLY),
+    Intent('cough', ['cough'], COUGH_SUBJECT_REPLY),
+]
+
+# Chat category -> reply when the subject matches no intent
+CATEGORY_REPLIES = {
+    'dosage': """Hello! I'm here to help with dosage information.
+
+Please provide me with:
+• The name of the medicine
+• Your age and weight (if comfortable sharing)
+• Any other medications you're taking
+• The condition you're treating
+
+This will help me give you accurate dosage guidance. What specific medicine do you need help with?""",
+
+    'side_effects': """I can help you understand side effects.
+
+Please tell me:
+• Which medicine are you concerned about?
+• What symptoms are you experiencing?
+• How long have you been taking the medicine?
+• Any other medications you're on?
+
+This information will help me assess if what you're experiencing is related to the medication.""",
+
+    'interactions': """I can help check for drug interactions.
+
+Please provide:
+• List of all medicines you're currently taking
+• Any new medicine you want to add
+• Any supplements or herbal products
+• Your medical conditions
+
+Drug interactions can be serious, so it's important to check before combining medications.""",
+}
+
+WELCOME_REPLY = """Hello! Thank you for contacting our pharmacy.
+
+I'm here to help with any questions about:
+• Medicine dosages and usage
+• Side effects and interactions
+• Symptom-based recommendations
+• General health advice
+
+Please provide more details about your question, and I'll be happy to assist you. What specific help do you need today?"""
+
+
+chat_matcher = IntentMatcher(INTENTS)
+subject_matcher = IntentMatcher(SUBJECT_INTENTS)
+
+
+def reply_to(message):
+    """Pharmacist reply to a chat message"""
+    reply = chat_matcher.match(message)
+    if reply is None:
+        return DEFAULT_REPLY.format(message=message)
+    return reply
+
+
+def auto_response(category, subject):
+    """First pharmacist reply to a new chat, from its subject and category"""
+    reply = subject_matcher.match(subject)
+    if reply is None:
+        reply = CATEGORY_REPLIES.get(category, WELCOME_REPLY)
+    return reply
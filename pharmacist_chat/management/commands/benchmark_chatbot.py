@@ -0,0 +1,99 @@
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from pharmacist_chat import intents
+from pharmacist_chat.models import ChatMessage, PharmacistChat
+
+
+FILLER = ['i', 'have', 'a', 'my', 'since', 'yesterday', 'what', 'should', 'do', 'please', 'help']
+
+
+class Command(BaseCommand):
+    help = 'Compare auto-responder throughput: chained substring checks vs the compiled intent matcher'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=20000,
+            help='Number of messages to answer with each implementation',
+        )
+        parser.add_argument(
+            '--history',
+            type=int,
+            default=200,
+            help='User messages in the benchmark chat, which the original strategy loads on every reply (0 to time matching only)',
+        )
+
+    def legacy_reply(self, message, chat):
+        """The original strategy: load and join the whole history, then one any() scan per intent"""
+        if chat is not None:
+            ' '.join(chat.messages.filter(is_from_pharmacist=False).values_list('message', flat=True)).lower()
+        message_lower = message.lower()
+        for intent in intents.INTENTS:
+            if any(word in message_lower for word in intent.keywords):
+                for refinement in intent.refinements:
+                    if any(word in message_lower for word in refinement.keywords):
+                        return refinement.reply
+                return intent.reply
+        return intents.DEFAULT_REPLY.format(message=message)
+
+    def compiled_reply(self, message, chat):
+        """Replies depend on the message alone, so the history is never read"""
+        return intents.reply_to(message)
+
+    def sample_messages(self, count=500):
+        keywords = [keyword for intent in intents.INTENTS for keyword in intent.keywords]
+        rng = random.Random(42)
+        messages = []
+        for i in range(count):
+            words = rng.choices(FILLER, k=rng.randint(4, 12))
+            if rng.random() < 0.8:
+                words.insert(rng.randrange(len(words) + 1), rng.choice(keywords))
+            messages.append(' '.join(words).capitalize())
+        return messages
+
+    def time_replies(self, func, messages, iterations, chat):
+        started = time.perf_counter()
+        for i in range(iterations):
+            func(messages[i % len(messages)], chat)
+        return time.perf_counter() - started
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        messages = self.sample_messages()
+        self.stdout.write(
+            f'{len(intents.INTENTS)} intents, '
+            f'{sum(len(i.keywords) for i in intents.INTENTS)} keywords, {iterations} messages'
+        )
+
+        self.report('Matching only', messages, iterations, None)
+
+        user = get_user_model().objects.first()
+        if options['history'] and user is None:
+            self.stdout.write(self.style.WARNING('No users found; skipping the chat history benchmark.'))
+        elif options['history']:
+            # Build a throwaway chat and roll it back afterwards
+            with transaction.atomic():
+                chat = PharmacistChat.objects.create(user=user, subject='Benchmark', category='general')
+                ChatMessage.objects.bulk_create([
+                    ChatMessage(chat=chat, sender=user, message=message, is_from_pharmacist=False)
+                    for message in (messages * (options['history'] // len(messages) + 1))[:options['history']]
+                ])
+                self.report(
+                    f'With {options["history"]} messages of history',
+                    messages, max(iterations // 20, 1), chat,
+                )
+                transaction.set_rollback(True)
+
+    def report(self, title, messages, iterations, chat):
+        legacy_time = self.time_replies(self.legacy_reply, messages, iterations, chat)
+        compiled_time = self.time_replies(self.compiled_reply, messages, iterations, chat)
+        self.stdout.write('')
+        self.stdout.write(f'{title} ({iterations} messages):')
+        self.stdout.write(f'  Chained any():    {iterations / legacy_time:,.0f} messages/s')
+        self.stdout.write(f'  Compiled matcher: {iterations / compiled_time:,.0f} messages/s')
+        self.stdout.write(self.style.SUCCESS(f'  Speedup: {legacy_time / compiled_time:.1f}x'))
@@ -61,6 +61,10 @@ class ChatMessage(models.Model):
     message = models.TextField()
     is_from_pharmacist = models.BooleanField(default=False)
     is_read = models.BooleanField(default=False)
+    # The user message an auto-reply answers; one reply per message
+    reply_to = models.ForeignKey(
+        'self', on_delete=models.CASCADE, null=True, blank=True, related_name='replies'
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
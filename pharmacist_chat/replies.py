@@ -0,0 +1,90 @@
+"""
+Auto-replies from the demo pharmacist, produced off the request path.
+
+start_chat and chat_detail only queue a 'pharmacist_reply' job on the
+notifications outbox; run_notification_worker builds the reply and posts it
+to the chat, and the chat page picks it up when it lands.
+"""
+import logging
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils import timezone
+
+from notifications.queue import enqueue, register_job
+from . import intents
+from .models import ChatMessage, PharmacistChat
+
+logger = logging.getLogger(__name__)
+
+DEMO_PHARMACIST_USERNAME = 'pharmacist_demo'
+DEMO_PHARMACIST_CACHE_KEY = 'pharmacist_chat:demo_pharmacist_id'
+DEMO_PHARMACIST_CACHE_TIMEOUT = 24 * 60 * 60
+
+
+def demo_pharmacist_id():
+    """Primary key of the demo pharmacist account, created on first use and cached"""
+    user_id = cache.get(DEMO_PHARMACIST_CACHE_KEY)
+    if user_id is None:
+        pharmacist_user, created = get_user_model().objects.get_or_create(
+            username=DEMO_PHARMACIST_USERNAME,
+            defaults={
+                'first_name': 'Demo',
+                'last_name': 'Pharmacist',
+                'email': 'pharmacist@pharmazone.com',
+                'is_staff': True
+            }
+        )
+        user_id = pharmacist_user.pk
+        cache.set(DEMO_PHARMACIST_CACHE_KEY, user_id, DEMO_PHARMACIST_CACHE_TIMEOUT)
+    return user_id
+
+
+def enqueue_reply(chat, message, welcome=False):
+    """Queue the auto-reply to a user message; welcome=True for the first message of a new chat"""
+    return enqueue('pharmacist_reply', chat_id=chat.id, message_id=message.id, welcome=welcome)
+
+
+@register_job('pharmacist_reply')
+def deliver_reply(chat_id, message_id=None, welcome=False):
+    """Worker handler for replies queued by enqueue_reply"""
+    chat = PharmacistChat.objects.get(pk=chat_id)
+    if message_id is None:
+        # Welcome jobs queued before replies were tied to a message
+        message = chat.messages.filter(is_from_pharmacist=False).order_by('id').first()
+        welcome = True
+    else:
+        message = ChatMessage.objects.filter(pk=message_id).first()
+    if message is None:
+        return
+    text = chat.subject if welcome else message.message
+
+    # A retried job, or a pharmacist who answered by hand after this message
+    answered = message.replies.exists() or chat.messages.filter(
+        is_from_pharmacist=True, reply_to__isnull=True, id__gt=message.id
+    ).exists()
+    if answered:
+        return
+
+    try:
+        if welcome:
+            reply = intents.auto_response(chat.category, chat.subject)
+        else:
+            reply = intents.reply_to(text)
+    except Exception as e:
+        logger.error(f"Auto-response error for chat #{chat_id}: {e}")
+        reply = intents.FALLBACK_REPLY.format(message=text)
+
+    pharmacist_id = demo_pharmacist_id()
+    PharmacistChat.objects.filter(pk=chat_id, pharmacist__isnull=True).update(
+        pharmacist_id=pharmacist_id,
+        status='in_progress',
+        updated_at=timezone.now(),
+    )
+    ChatMessage.objects.create(
+        chat=chat,
+        sender_id=pharmacist_id,
+        message=reply,
+        is_from_pharmacist=True,
+        reply_to=message,
+    )
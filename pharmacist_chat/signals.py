@@ -0,0 +1,12 @@
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from .models import ChatMessage
+from .stream import note_message
+
+
+@receiver(post_save, sender=ChatMessage)
+def announce_message(sender, instance, created, **kwargs):
+    """Let open message streams know the chat has something new"""
+    if created:
+        transaction.on_commit(lambda: note_message(instance))
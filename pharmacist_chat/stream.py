@@ -0,0 +1,136 @@
+"""
+Incremental message delivery for chat pages.
+
+Clients keep the id of the last message they have and ask only for what
+came after it, either once (messages_after) or through a server-sent events
+stream (event_stream) that stays open and pushes each new message as it is
+posted.
+
+Every saved message records its id under a per-chat key in the shared
+cache (pharmazone.shared_cache), so an open stream notices messages posted
+by any process, including the notification worker's auto-replies, and only
+queries ChatMessage when that id moves past what it has already sent. The
+database is still checked every DB_RECHECK_SECONDS in case the key was
+evicted.
+
+Under ASGI the stream stays open for STREAM_SECONDS. Under WSGI every open
+stream would hold a sync worker, so there waiting_events sends whatever is
+already waiting and ends at once; EventSource then reconnects after
+RECONNECT_MILLISECONDS, so it behaves like a short poll. Either way the
+client resumes from the Last-Event-ID it was given.
+"""
+import asyncio
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.template.loader import render_to_string
+
+from pharmazone.shared_cache import shared_cache
+
+from .models import ChatMessage
+
+
+BATCH_SIZE = 50
+POLL_SECONDS = 1
+DB_RECHECK_SECONDS = 15
+HEARTBEAT_SECONDS = 15
+STREAM_SECONDS = 25
+RECONNECT_MILLISECONDS = 3000
+LATEST_CACHE_TIMEOUT = 24 * 60 * 60
+
+
+def latest_key(chat_id):
+    return f'pharmacist_chat:latest:{chat_id}'
+
+
+def note_message(message):
+    """Record message as the newest in its chat, for open streams to notice"""
+    shared_cache().set(latest_key(message.chat_id), message.id, LATEST_CACHE_TIMEOUT)
+
+
+def parse_after(value):
+    """Message id from an ?after= value or Last-Event-ID header; 0 if missing or invalid"""
+    try:
+        return max(int(value), 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def serialize_message(message, for_pharmacist=False):
+    return {
+        'id': message.id,
+        'is_from_pharmacist': message.is_from_pharmacist,
+        'created_at': message.created_at.isoformat(),
+        'html': render_to_string('pharmacist_chat/_message.html', {
+            'message': message,
+            'for_pharmacist': for_pharmacist,
+        }),
+    }
+
+
+def messages_after(chat, after, for_pharmacist=False):
+    """
+    Up to BATCH_SIZE messages of chat with id > after, serialized, oldest
+    first. Messages from the other side are marked read as they are handed
+    over.
+    """
+    batch = list(chat.messages.filter(id__gt=after).order_by('id')[:BATCH_SIZE])
+    if batch:
+        chat.messages.filter(
+            id__gt=after, id__lte=batch[-1].id,
+            is_from_pharmacist=not for_pharmacist, is_read=False,
+        ).update(is_read=True)
+    return [serialize_message(message, for_pharmacist) for message in batch]
+
+
+def latest_message_id(chat_id):
+    return ChatMessage.objects.filter(chat_id=chat_id).order_by('-id').values_list('id', flat=True).first() or 0
+
+
+def format_event(data, event_id=None):
+    lines = [] if event_id is None else [f'id: {event_id}']
+    lines.append(f'data: {json.dumps(data)}')
+    return '\n'.join(lines) + '\n\n'
+
+
+def waiting_events(chat, after, for_pharmacist=False):
+    """Server-sent events for the messages of chat already waiting after the given id"""
+    yield f'retry: {RECONNECT_MILLISECONDS}\n\n'
+    for data in messages_after(chat, after, for_pharmacist):
+        yield format_event(data, data['id'])
+
+
+async def event_stream(chat, after, for_pharmacist=False):
+    """Server-sent events for messages of chat after the given id, for STREAM_SECONDS"""
+    yield f'retry: {RECONNECT_MILLISECONDS}\n\n'
+
+    started = last_db_check = last_write = time.monotonic()
+    # Catch up on anything already posted, regardless of the cache
+    latest = await sync_to_async(latest_message_id)(chat.id)
+    while True:
+        if latest > after:
+            batch = await sync_to_async(messages_after)(chat, after, for_pharmacist)
+            for data in batch:
+                yield format_event(data, data['id'])
+                after = data['id']
+            if not batch:
+                # The newer messages are gone (deleted chat history)
+                after = latest
+            else:
+                last_write = time.monotonic()
+            if len(batch) == BATCH_SIZE:
+                continue
+
+        now = time.monotonic()
+        if now - started >= STREAM_SECONDS:
+            return
+        if now - last_write >= HEARTBEAT_SECONDS:
+            yield ': keep-alive\n\n'
+            last_write = now
+
+        await asyncio.sleep(POLL_SECONDS)
+        latest = await shared_cache().aget(latest_key(chat.id), 0)
+        if latest <= after and time.monotonic() - last_db_check >= DB_RECHECK_SECONDS:
+            latest = await sync_to_async(latest_message_id)(chat.id)
+            last_db_check = time.monotonic()
@@ -0,0 +1,159 @@
+import json
+import warnings
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from accounts.models import User
+from pharmazone.shared_cache import shared_cache
+from . import intents, stream
+from .models import ChatMessage, PharmacistChat
+from .replies import deliver_reply
+
+
+class DeliverReplyTests(TestCase):
+
+    def setUp(self):
+        # The demo pharmacist id is cached across tests
+        cache.clear()
+        self.user = User.objects.create_user(username='customer', password='pass12345')
+        self.chat = PharmacistChat.objects.create(user=self.user, category='dosage', subject='Paracetamol dose')
+
+    def post(self, text):
+        return ChatMessage.objects.create(chat=self.chat, sender=self.user, message=text)
+
+    def test_each_message_gets_its_own_reply_when_jobs_run_late(self):
+        first = self.post('Hi! I need help with: Paracetamol dose')
+        second = self.post('How often can I take it?')
+        third = self.post('Is it safe with ibuprofen?')
+
+        # The welcome reply lands after the follow-ups were already posted
+        deliver_reply(self.chat.id, first.id, welcome=True)
+        deliver_reply(self.chat.id, second.id)
+        deliver_reply(self.chat.id, third.id)
+
+        replies = self.chat.messages.filter(is_from_pharmacist=True)
+        self.assertEqual(sorted(replies.values_list('reply_to', flat=True)), [first.id, second.id, third.id])
+
+    def test_retried_job_does_not_reply_twice(self):
+        message = self.post('How often can I take it?')
+
+        deliver_reply(self.chat.id, message.id)
+        deliver_reply(self.chat.id, message.id)
+
+        self.assertEqual(message.replies.count(), 1)
+
+    def test_skips_messages_a_pharmacist_already_answered(self):
+        message = self.post('How often can I take it?')
+        pharmacist = User.objects.create_user(username='pharmacist', password='pass12345', is_staff=True)
+        ChatMessage.objects.create(chat=self.chat, sender=pharmacist, message='Every 6 hours.', is_from_pharmacist=True)
+
+        deliver_reply(self.chat.id, message.id)
+
+        self.assertFalse(message.replies.exists())
+
+    def test_reply_depends_on_the_message_not_the_chat_history(self):
+        self.post('I take paracetamol for my back')
+        message = self.post('What is the right dose?')
+
+        deliver_reply(self.chat.id, message.id)
+
+        self.assertEqual(message.replies.get().message, intents.DOSAGE_REPLY)
+
+
+class ReplyToTests(SimpleTestCase):
+
+    def test_refinements_come_from_the_message_alone(self):
+        self.assertEqual(intents.reply_to('What dose of paracetamol?'), intents.PARACETAMOL_DOSAGE_REPLY)
+        self.assertEqual(intents.reply_to('What is the right dose?'), intents.DOSAGE_REPLY)
+        self.assertEqual(intents.reply_to('Namaste'), intents.GREETING_REPLY)
+        self.assertEqual(intents.reply_to('xyz'), intents.DEFAULT_REPLY.format(message='xyz'))
+
+
+class MessageStreamTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='customer', password='pass12345')
+        self.pharmacist = User.objects.create_user(username='pharmacist', password='pass12345', is_staff=True)
+        self.chat = PharmacistChat.objects.create(user=self.user, category='dosage', subject='Paracetamol dose')
+        self.first = self.post(self.user, 'How often can I take it?')
+        self.second = self.post(self.pharmacist, 'Every 6 hours.')
+
+    def post(self, sender, text):
+        with self.captureOnCommitCallbacks(execute=True):
+            return ChatMessage.objects.create(
+                chat=self.chat, sender=sender, message=text, is_from_pharmacist=sender.is_staff,
+            )
+
+    def events(self, body):
+        return [json.loads(line[len('data: '):]) for line in body.splitlines() if line.startswith('data: ')]
+
+    def test_messages_after_marks_the_other_side_read(self):
+        messages = stream.messages_after(self.chat, self.first.id)
+
+        self.assertEqual([data['id'] for data in messages], [self.second.id])
+        self.assertIn('Every 6 hours.', messages[0]['html'])
+        self.second.refresh_from_db()
+        self.first.refresh_from_db()
+        self.assertTrue(self.second.is_read)
+        self.assertFalse(self.first.is_read)
+
+        stream.messages_after(self.chat, 0, for_pharmacist=True)
+        self.first.refresh_from_db()
+        self.assertTrue(self.first.is_read)
+
+    def test_new_messages_are_announced_in_the_shared_cache(self):
+        self.assertEqual(shared_cache().get(stream.latest_key(self.chat.id)), self.second.id)
+
+    @mock.patch.object(stream, 'POLL_SECONDS', 0)
+    @mock.patch.object(stream, 'DB_RECHECK_SECONDS', 60)
+    async def test_stream_catches_up_then_pushes_announced_messages(self):
+        events = stream.event_stream(self.chat, self.first.id)
+
+        self.assertEqual(await anext(events), f'retry: {stream.RECONNECT_MILLISECONDS}\n\n')
+        self.assertTrue((await anext(events)).startswith(f'id: {self.second.id}\n'))
+
+        # Posted elsewhere; only the shared cache tells this stream about it
+        third = await ChatMessage.objects.acreate(chat=self.chat, sender=self.user, message='Thanks!')
+        await sync_to_async(stream.note_message)(third)
+
+        self.assertEqual(self.events(await anext(events))[0]['id'], third.id)
+        await events.aclose()
+
+    def test_chat_messages_is_only_for_the_chat_owner(self):
+        self.client.login(username='customer', password='pass12345')
+        url = reverse('pharmacist_chat:chat_messages', args=[self.chat.id])
+
+        response = self.client.get(url, {'after': self.first.id})
+        self.assertEqual([data['id'] for data in response.json()['messages']], [self.second.id])
+
+        User.objects.create_user(username='other', password='pass12345')
+        self.client.login(username='other', password='pass12345')
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.client.get(reverse('pharmacist_chat:chat_stream', args=[self.chat.id])).status_code, 404)
+
+    def test_pharmacist_endpoints_are_staff_only(self):
+        self.client.login(username='customer', password='pass12345')
+        self.assertEqual(self.client.get(reverse('pharmacist_chat:pharmacist_chat_messages', args=[self.chat.id])).status_code, 403)
+        self.assertEqual(self.client.get(reverse('pharmacist_chat:pharmacist_chat_stream', args=[self.chat.id])).status_code, 403)
+
+        self.client.login(username='pharmacist', password='pass12345')
+        response = self.client.get(reverse('pharmacist_chat:pharmacist_chat_messages', args=[self.chat.id]))
+        self.assertEqual([data['id'] for data in response.json()['messages']], [self.first.id, self.second.id])
+
+    def test_wsgi_stream_sends_what_is_waiting_and_ends(self):
+        self.client.login(username='customer', password='pass12345')
+
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            response = self.client.get(
+                reverse('pharmacist_chat:chat_stream', args=[self.chat.id]), headers={'last-event-id': str(self.first.id)},
+            )
+            body = b''.join(response.streaming_content).decode()
+
+        self.assertFalse(response.is_async)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual([data['id'] for data in self.events(body)], [self.second.id])
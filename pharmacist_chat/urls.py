@@ -8,6 +8,8 @@ urlpatterns = [
     path('', views.ask_pharmacist_home, name='home'),
     path('start/', views.start_chat, name='start_chat'),
     path('chat/<int:chat_id>/', views.chat_detail, name='chat_detail'),
+    path('chat/<int:chat_id>/messages/', views.chat_messages, name='chat_messages'),
+    path('chat/<int:chat_id>/stream/', views.chat_stream, name='chat_stream'),
     path('my-chats/', views.my_chats, name='my_chats'),
     path('close/<int:chat_id>/', views.close_chat, name='close_chat'),
     path('quick-response/<int:response_id>/', views.quick_response_detail, name='quick_response'),
@@ -15,4 +17,6 @@ urlpatterns = [
     # Pharmacist URLs
     path('pharmacist/', views.pharmacist_dashboard, name='pharmacist_dashboard'),
     path('pharmacist/chat/<int:chat_id>/', views.pharmacist_chat_detail, name='pharmacist_chat_detail'),
+    path('pharmacist/chat/<int:chat_id>/messages/', views.pharmacist_chat_messages, name='pharmacist_chat_messages'),
+    path('pharmacist/chat/<int:chat_id>/stream/', views.pharmacist_chat_stream, name='pharmacist_chat_stream'),
 ]
\ No newline at end of file
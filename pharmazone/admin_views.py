@@ -1,9 +1,13 @@
-from django.shortcuts import redirect
+from django.shortcuts import redirect, render
+from django.conf import settings
+from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.admin.views.decorators import staff_member_required
 from django.http import HttpResponseRedirect
 from django.urls import reverse
 
+from . import profiling
+
 @staff_member_required
 def admin_redirect(request):
     """
@@ -14,4 +18,20 @@ def admin_redirect(request):
         return redirect('doctor_appointments:admin_dashboard')
     else:
         # If not admin, redirect to home
-        return redirect('products:home')
\ No newline at end of file
+        return redirect('products:home')
+
+
+@staff_member_required
+def query_profile(request):
+    """Per-view query counts, DB time and repeated queries seen by QueryProfilerMiddleware"""
+    if request.method == 'POST':
+        profiling.reset()
+        messages.success(request, 'Query profile cleared.')
+        return redirect('query_profile')
+
+    context = {
+        'summaries': profiling.summaries(),
+        'enabled': settings.QUERY_PROFILER,
+        'repeat_threshold': profiling.REPEAT_THRESHOLD,
+    }
+    return render(request, 'base/query_profile.html', context)
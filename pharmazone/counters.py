@@ -0,0 +1,219 @@
+"""
+Denormalized aggregate counters.
+
+A counter is a field on a parent model that summarises the rows pointing at
+it, e.g. Medicine.review_count over MedicineReview. They are declared once:
+
+    counters.register(
+        MedicineReview, 'medicine',
+        review_count=CountOf(),
+        rating_sum=SumOf('rating'),
+    )
+
+and kept in step by signal handlers that turn every insert, edit and delete
+of a child row into a single UPDATE ... SET field = field + delta on the
+parent, so concurrent writers never overwrite each other. MeanOf fields are
+derived from a sum and a count in the same UPDATE.
+
+Queryset update()/delete() and raw SQL bypass the signals; recompute()
+(and the recompute_counters command) rebuilds every counter from scratch.
+"""
+from django.db.models import (
+    Case, Count, DecimalField, F, FloatField, IntegerField, OuterRef, Subquery, Sum, Value, When,
+)
+from django.db.models.functions import Cast, Coalesce, Round
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+
+
+class CountOf:
+    """Number of child rows, optionally only those matching field=value conditions"""
+
+    def __init__(self, **conditions):
+        self.conditions = conditions
+
+    def matches(self, instance):
+        return all(getattr(instance, name) == value for name, value in self.conditions.items())
+
+    def fields(self):
+        return set(self.conditions)
+
+    def value(self, instance):
+        return 1 if self.matches(instance) else 0
+
+    def aggregate(self):
+        return Count('pk')
+
+
+class SumOf(CountOf):
+    """Sum of a child field, optionally only over rows matching the conditions"""
+
+    def __init__(self, field, **conditions):
+        super().__init__(**conditions)
+        self.field = field
+
+    def fields(self):
+        return super().fields() | {self.field}
+
+    def value(self, instance):
+        return (getattr(instance, self.field) or 0) if self.matches(instance) else 0
+
+    def aggregate(self):
+        return Sum(self.field)
+
+
+class MeanOf:
+    """total / count of two counters in the same registration, default when count is 0"""
+
+    def __init__(self, total, count, default, decimal_places=2):
+        self.total = total
+        self.count = count
+        self.default = default
+        self.decimal_places = decimal_places
+
+
+class Registration:
+    """Counters on one parent, fed by one child model through one foreign key"""
+
+    def __init__(self, model, parent, counters):
+        self.model = model
+        self.parent = parent
+        self.parent_model = model._meta.get_field(parent).related_model
+        self.attname = model._meta.get_field(parent).attname
+        self.counters = {name: c for name, c in counters.items() if not isinstance(c, MeanOf)}
+        self.means = {name: c for name, c in counters.items() if isinstance(c, MeanOf)}
+        self.fields = {self.attname}.union(*(c.fields() for c in self.counters.values()))
+
+    def contribution(self, instance):
+        """(parent id, {counter: value}) for one child row"""
+        return getattr(instance, self.attname), {
+            name: counter.value(instance) for name, counter in self.counters.items()
+        }
+
+    def apply(self, contribution, sign=1):
+        parent_id, values = contribution
+        if parent_id is None:
+            return
+        deltas = {name: sign * value for name, value in values.items()}
+        changes = {name: F(name) + delta for name, delta in deltas.items() if delta}
+        if not changes:
+            return
+        for name, mean in self.means.items():
+            total = F(mean.total) + deltas.get(mean.total, 0)
+            count_delta = deltas.get(mean.count, 0)
+            changes[name] = Case(
+                When(**{f'{mean.count}__gt': -count_delta},
+                     then=Round(_divide(total, F(mean.count) + count_delta), mean.decimal_places)),
+                default=Value(mean.default),
+            )
+        self.parent_model._default_manager.filter(pk=parent_id).update(**changes)
+
+    def recompute(self, parents=None):
+        """Rebuild the counters of every parent (or of the given parent ids) from the child table"""
+        queryset = self.parent_model._default_manager.all()
+        if parents is not None:
+            queryset = queryset.filter(pk__in=parents)
+
+        changes = {}
+        for name, counter in self.counters.items():
+            rows = self.model._default_manager.filter(
+                **{self.parent: OuterRef('pk')}, **counter.conditions
+            ).order_by().values(self.parent).annotate(value=counter.aggregate()).values('value')
+            changes[name] = Coalesce(Subquery(rows), 0)
+        queryset.update(**changes)
+
+        for name, mean in self.means.items():
+            queryset.update(**{name: Case(
+                When(**{f'{mean.count}__gt': 0},
+                     then=Round(_divide(F(mean.total), F(mean.count)), mean.decimal_places)),
+                default=Value(mean.default),
+            )})
+        return queryset.count()
+
+
+def _divide(total, count):
+    """Non-integer division that works the same on SQLite and PostgreSQL"""
+    return Cast(
+        Cast(total, FloatField()) / Cast(count, IntegerField()),
+        DecimalField(max_digits=12, decimal_places=4),
+    )
+
+
+# Child model -> its registrations
+REGISTRY = {}
+
+
+def register(model, parent, **counters):
+    """Maintain counters on model.<parent> from inserts, edits and deletes of model"""
+    registration = Registration(model, parent, counters)
+    if model not in REGISTRY:
+        REGISTRY[model] = []
+        uid = f'{model._meta.label_lower}'
+        post_init.connect(_remember, sender=model, dispatch_uid=f'counters_init_{uid}')
+        pre_save.connect(_saving, sender=model, dispatch_uid=f'counters_pre_save_{uid}')
+        post_save.connect(_saved, sender=model, dispatch_uid=f'counters_save_{uid}')
+        post_delete.connect(_deleted, sender=model, dispatch_uid=f'counters_delete_{uid}')
+    REGISTRY[model].append(registration)
+    return registration
+
+
+def registrations():
+    return [registration for group in REGISTRY.values() for registration in group]
+
+
+def _snapshot(registration, instance):
+    """The row's current contribution, or None if it is unsaved or only partly loaded"""
+    if instance.pk is None or registration.fields & instance.get_deferred_fields():
+        return None
+    return registration.contribution(instance)
+
+
+def _remember(sender, instance, **kwargs):
+    instance._counter_state = [_snapshot(r, instance) for r in REGISTRY[sender]]
+
+
+def _saving(sender, instance, raw=False, **kwargs):
+    """Read the stored parent ids of a partly loaded row before the save overwrites them"""
+    old_states = getattr(instance, '_counter_state', None) or [None] * len(REGISTRY[sender])
+    if raw or instance._state.adding or None not in old_states:
+        return
+    attnames = {registration.attname for registration in REGISTRY[sender]}
+    instance._counter_stored_parents = (
+        sender._default_manager.filter(pk=instance.pk).values(*attnames).first() or {}
+    )
+
+
+def _saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old_states = getattr(instance, '_counter_state', None) or [None] * len(REGISTRY[sender])
+    stored_parents = getattr(instance, '_counter_stored_parents', {})
+    instance._counter_stored_parents = {}
+    new_states = []
+    for registration, old in zip(REGISTRY[sender], old_states):
+        new = registration.contribution(instance)
+        if old is None and not created:
+            # Previous values unknown (deferred load): recount the parent it
+            # had before the save and the one it has now
+            parents = {new[0], stored_parents.get(registration.attname)} - {None}
+            registration.recompute(parents=parents)
+        elif old != new:
+            if old is not None:
+                registration.apply(old, -1)
+            registration.apply(new)
+        new_states.append(new)
+    instance._counter_state = new_states
+
+
+def _deleted(sender, instance, **kwargs):
+    old_states = getattr(instance, '_counter_state', None) or [None] * len(REGISTRY[sender])
+    for registration, old in zip(REGISTRY[sender], old_states):
+        registration.apply(old or registration.contribution(instance), -1)
+
+
+def recompute(models=None):
+    """Rebuild all counters, or those on the given parent models; returns rows touched per registration"""
+    results = []
+    for registration in registrations():
+        if models is None or registration.parent_model in models:
+            results.append((registration, registration.recompute()))
+    return results
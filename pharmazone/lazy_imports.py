@@ -0,0 +1,32 @@
+"""
+Deferred imports for heavy optional dependencies.
+
+Loading the URLconf imports every view module in every worker, so a
+top-level import of a PDF engine costs each process its import time and
+memory even if it never renders a PDF. optional_module() imports on first
+call instead and remembers the result, returning None when the package is
+not installed.
+"""
+import importlib
+import importlib.util
+
+
+_modules = {}
+
+
+def optional_module(name):
+    """Import and return the module, or None if it is not installed"""
+    if name not in _modules:
+        try:
+            _modules[name] = importlib.import_module(name)
+        except ImportError:
+            _modules[name] = None
+    return _modules[name]
+
+
+def is_installed(name):
+    """Whether the module can be imported, without importing it"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
@@ -1,6 +1,17 @@
+import logging
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
 from django.shortcuts import redirect
 from django.urls import reverse
 
+from . import profiling
+
+logger = logging.getLogger('pharmazone.queries')
+
+
 class AdminRedirectMiddleware:
     """
     Middleware to redirect admin users from Django admin to custom dashboard
@@ -24,4 +35,34 @@ class AdminRedirectMiddleware:
                 return redirect('doctor_appointments:admin_dashboard')
         
         response = self.get_response(request)
-        return response
\ No newline at end of file
+        return response
+
+
+class QueryProfilerMiddleware:
+    """
+    Count, time and fingerprint the queries of each request (opt in with
+    QUERY_PROFILER = True); see pharmazone.profiling
+    """
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_PROFILER', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = profiling.QueryRecorder()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+
+        match = request.resolver_match
+        view = match.view_name if match else '(unresolved)'
+        profiling.record(view, request.get_full_path(), recorder)
+
+        response['X-Query-Count'] = str(recorder.count)
+        response['X-Query-Time-Ms'] = f'{recorder.seconds * 1000:.1f}'
+        if recorder.repeats():
+            logger.warning('%s %s (%s): %s', request.method, request.path, view, recorder.report())
+        elif logger.isEnabledFor(logging.DEBUG):
+            logger.debug('%s %s (%s): %s', request.method, request.path, view, recorder.report())
+        return response
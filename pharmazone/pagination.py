@@ -0,0 +1,171 @@
+"""
+Keyset (cursor) pagination.
+
+Django's Paginator counts the whole result and reads past OFFSET rows to
+reach a page, so page 500 costs 500 pages of work. CursorPaginator instead
+remembers the sort key of the row at the edge of the page and asks for the
+rows after it:
+
+    WHERE (name > 'Paracetamol') OR (name = 'Paracetamol' AND id > 812)
+    ORDER BY name, id LIMIT 13
+
+which an index on (name, id) answers with the same short scan for every
+page. Cursors are opaque URL-safe strings; the primary key is always added
+as the last sort key so rows with equal sort values are neither skipped nor
+repeated. Sort keys must not be NULL.
+
+The total is optional: count='exact' runs COUNT(*), count='approximate'
+uses the planner's estimate on PostgreSQL and a count capped at
+APPROXIMATE_COUNT_LIMIT rows elsewhere.
+"""
+import base64
+import datetime
+import decimal
+import json
+import re
+
+from django.db import connections
+from django.db.models import Q
+
+
+APPROXIMATE_COUNT_LIMIT = 1000
+
+_PLAN_ROWS = re.compile(r'rows=(\d+)')
+
+
+class _CursorEncoder(json.JSONEncoder):
+    """Like DjangoJSONEncoder but keeps full microsecond precision, which keyset equality needs"""
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.date, datetime.time)):
+            return o.isoformat()
+        if isinstance(o, decimal.Decimal):
+            return str(o)
+        return super().default(o)
+
+
+def encode_cursor(values, forward):
+    payload = json.dumps([1 if forward else 0, values], cls=_CursorEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    """(values, forward) from a cursor string, or None if it is missing or malformed"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        forward, values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError, UnicodeError):
+        return None
+    if not isinstance(values, list) or len(values) != size:
+        return None
+    return values, bool(forward)
+
+
+def approximate_count(queryset):
+    """(count, is_exact) without scanning the whole result set"""
+    queryset = queryset.order_by()
+    if connections[queryset.db].vendor == 'postgresql':
+        match = _PLAN_ROWS.search(queryset.explain())
+        if match:
+            return int(match.group(1)), False
+    count = queryset[:APPROXIMATE_COUNT_LIMIT + 1].count()
+    if count > APPROXIMATE_COUNT_LIMIT:
+        return APPROXIMATE_COUNT_LIMIT, False
+    return count, True
+
+
+class CursorPage:
+    """One page of results plus the cursors of its neighbours"""
+
+    def __init__(self, object_list, next_cursor, previous_cursor, count=None, count_is_exact=True):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.count = count
+        self.count_is_exact = count_is_exact
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """Paginate a queryset by its sort key instead of by offset"""
+
+    def __init__(self, queryset, per_page, ordering, count=None):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.count = count
+
+        fields = [field for field in ordering if field.lstrip('-') not in ('pk', 'id')]
+        # Tie-break on the primary key in the direction of the leading key
+        descending = fields[0].startswith('-') if fields else False
+        self.ordering = fields + ['-pk' if descending else 'pk']
+
+    def _keys(self):
+        return [(field.lstrip('-'), field.startswith('-')) for field in self.ordering]
+
+    def _values(self, obj):
+        return [getattr(obj, name) for name, descending in self._keys()]
+
+    def _after(self, values, forward):
+        """Rows that sort after values (forward) or before them"""
+        condition = Q()
+        equal = Q()
+        for (name, descending), value in zip(self._keys(), values):
+            lookup = 'gt' if descending != forward else 'lt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def _reversed(self):
+        return [field[1:] if field.startswith('-') else f'-{field}' for field in self.ordering]
+
+    def get_page(self, cursor=None):
+        """The page after (or before) the position in cursor; the first page if cursor is invalid"""
+        position = decode_cursor(cursor, len(self.ordering))
+        queryset = self.queryset
+
+        if position is None:
+            forward = True
+            queryset = queryset.order_by(*self.ordering)
+        else:
+            values, forward = position
+            queryset = queryset.filter(self._after(values, forward))
+            queryset = queryset.order_by(*(self.ordering if forward else self._reversed()))
+
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if not forward:
+            rows.reverse()
+
+        next_cursor = previous_cursor = None
+        if rows:
+            if has_more or not forward:
+                next_cursor = encode_cursor(self._values(rows[-1]), True)
+            if position is not None and (has_more or forward):
+                previous_cursor = encode_cursor(self._values(rows[0]), False)
+
+        count, count_is_exact = None, True
+        if self.count == 'exact':
+            count = self.queryset.count()
+        elif self.count == 'approximate':
+            count, count_is_exact = approximate_count(self.queryset)
+        return CursorPage(rows, next_cursor, previous_cursor, count, count_is_exact)
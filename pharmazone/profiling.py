@@ -0,0 +1,181 @@
+"""
+Per-request query profiling and N+1 detection.
+
+QueryRecorder is installed with connection.execute_wrapper() and sees every
+query the request runs. Each query is reduced to a fingerprint, its SQL
+shape with literals and IN lists collapsed:
+
+    SELECT ... FROM "products_medicine" WHERE "id" = ?
+
+and tagged with the project frames that issued it. The same fingerprint
+from the same call site REPEAT_THRESHOLD or more times in one request is
+reported as a repeat, which is what an N+1 loop looks like:
+
+    20 x SELECT ... WHERE "products_medicine"."id" = ?
+         at cart/views.py:41 in cart_detail
+
+record() folds a request into a per-view summary (requests, query counts,
+DB time, worst repeats) kept in the shared cache (pharmazone.shared_cache)
+for SUMMARY_SECONDS, so the staff query profile page lists requests served
+by every worker process. Each fold is a read and a write, and two processes
+folding the same view at once can drop one request, so the totals are
+approximate. Queries run while a StreamingHttpResponse
+is being iterated happen after the view returns and are not counted.
+"""
+import os
+import re
+import sys
+import time
+
+from django.conf import settings
+from django.utils import timezone
+
+from .shared_cache import shared_cache
+
+
+REPEAT_THRESHOLD = 2
+# Project frames kept per call site, innermost first
+STACK_DEPTH = 4
+# Repeats kept per view, worst first
+MAX_REPEATS_PER_VIEW = 10
+SUMMARY_SECONDS = 24 * 60 * 60
+
+INDEX_KEY = 'query_profile:views'
+
+_STRINGS = re.compile(r"'(?:''|[^'])*'")
+_NUMBERS = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDERS = re.compile(r'%s|\?')
+_LISTS = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_SPACES = re.compile(r'\s+')
+
+_PROJECT_ROOT = os.path.join(str(settings.BASE_DIR), '')
+# The profiler's own frames and the entry point are never the call site
+_SKIPPED_FILES = {
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), name)
+    for name in ('profiling.py', 'middleware.py', 'testing.py', 'manage.py')
+} | {os.path.join(_PROJECT_ROOT, 'manage.py')}
+
+
+def fingerprint(sql):
+    """SQL with literals replaced by ? and IN (...) lists collapsed, so repeats of one shape compare equal"""
+    sql = _STRINGS.sub('?', sql)
+    sql = _NUMBERS.sub('?', sql)
+    sql = _PLACEHOLDERS.sub('?', sql)
+    sql = _LISTS.sub('(...)', sql)
+    return _SPACES.sub(' ', sql).strip()
+
+
+def call_site():
+    """The innermost project frames (not Django, not site-packages) as 'path:line in function' strings"""
+    frames = []
+    frame = sys._getframe(1)
+    while frame is not None and len(frames) < STACK_DEPTH:
+        filename = frame.f_code.co_filename
+        if (
+            filename.startswith(_PROJECT_ROOT)
+            and 'site-packages' not in filename
+            and os.path.abspath(filename) not in _SKIPPED_FILES
+        ):
+            path = os.path.relpath(filename, _PROJECT_ROOT)
+            frames.append(f'{path}:{frame.f_lineno} in {frame.f_code.co_name}')
+        frame = frame.f_back
+    return tuple(frames)
+
+
+class QueryRecorder:
+    """execute_wrapper that counts, times and fingerprints queries"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+            key = (fingerprint(sql), call_site())
+            self.shapes[key] = self.shapes.get(key, 0) + 1
+
+    def repeats(self, threshold=REPEAT_THRESHOLD):
+        """[(count, fingerprint, stack)] of shapes run threshold or more times from one call site, worst first"""
+        found = [
+            (count, sql, stack)
+            for (sql, stack), count in self.shapes.items()
+            if count >= threshold
+        ]
+        return sorted(found, key=lambda repeat: -repeat[0])
+
+    def report(self, threshold=REPEAT_THRESHOLD):
+        """Readable summary of the count, time and repeats"""
+        lines = [f'{self.count} queries in {self.seconds * 1000:.1f} ms']
+        for count, sql, stack in self.repeats(threshold):
+            lines.append(f'  {count} x {sql}')
+            lines.extend(f'       at {frame}' for frame in stack or ('(no project frame)',))
+        return '\n'.join(lines)
+
+
+def _view_key(view):
+    return f'query_profile:view:{view}'
+
+
+def record(view, path, recorder):
+    """Fold one request into the cached summary for view"""
+    cache = shared_cache()
+    summary = cache.get(_view_key(view)) or {
+        'view': view,
+        'requests': 0,
+        'queries': 0,
+        'max_queries': 0,
+        'seconds': 0.0,
+        'max_seconds': 0.0,
+        'repeats': {},
+    }
+    summary['requests'] += 1
+    summary['queries'] += recorder.count
+    summary['seconds'] += recorder.seconds
+    if recorder.count >= summary['max_queries']:
+        summary['max_queries'] = recorder.count
+        summary['worst_path'] = path
+    summary['max_seconds'] = max(summary['max_seconds'], recorder.seconds)
+    summary['last_path'] = path
+    summary['last_seen'] = timezone.now()
+
+    repeats = summary['repeats']
+    for count, sql, stack in recorder.repeats():
+        key = f'{sql}|{"|".join(stack)}'
+        if key in repeats:
+            repeats[key]['requests'] += 1
+            repeats[key]['max_count'] = max(repeats[key]['max_count'], count)
+        else:
+            repeats[key] = {'sql': sql, 'stack': stack, 'max_count': count, 'requests': 1}
+    if len(repeats) > MAX_REPEATS_PER_VIEW:
+        worst = sorted(repeats.items(), key=lambda item: -item[1]['max_count'])
+        summary['repeats'] = dict(worst[:MAX_REPEATS_PER_VIEW])
+    cache.set(_view_key(view), summary, SUMMARY_SECONDS)
+
+    views = cache.get(INDEX_KEY) or []
+    if view not in views:
+        cache.set(INDEX_KEY, views + [view], SUMMARY_SECONDS)
+
+
+def summaries():
+    """Cached per-view summaries, the views with the most queries per request first"""
+    cache = shared_cache()
+    views = cache.get(INDEX_KEY) or []
+    found = [summary for summary in cache.get_many([_view_key(view) for view in views]).values()]
+    for summary in found:
+        summary['avg_queries'] = summary['queries'] / summary['requests']
+        summary['avg_ms'] = summary['seconds'] * 1000 / summary['requests']
+        summary['max_ms'] = summary['max_seconds'] * 1000
+        summary['repeat_list'] = sorted(summary['repeats'].values(), key=lambda repeat: -repeat['max_count'])
+    return sorted(found, key=lambda summary: -summary['max_queries'])
+
+
+def reset():
+    cache = shared_cache()
+    views = cache.get(INDEX_KEY) or []
+    cache.delete_many([_view_key(view) for view in views] + [INDEX_KEY])
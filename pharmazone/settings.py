@@ -47,9 +47,12 @@ INSTALLED_APPS = [
     'pharmacist_chat',
     'doctor_appointments',
     'notifications',
+    'reports',
+    'imaging',
 ]
 
 MIDDLEWARE = [
+    'pharmazone.middleware.QueryProfilerMiddleware',  # Outermost to see every query; inactive unless QUERY_PROFILER
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -60,6 +63,10 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Per-request query counts, DB time and repeated-query (N+1) detection,
+# listed on the staff query profile page
+QUERY_PROFILER = False
+
 ROOT_URLCONF = 'pharmazone.urls'
 
 TEMPLATES = [
@@ -140,6 +147,30 @@ LOGIN_URL = '/accounts/login/'
 # LOGIN_REDIRECT_URL = '/'  # Commented out to use custom redirect logic
 LOGOUT_REDIRECT_URL = '/'
 
+# Caches
+# 'default' is per process, for values any process can rebuild on its own.
+# 'shared' is seen by every worker and holds invalidation state one process
+# writes and the others must read (catalog versions, cart counts, chat
+# stream notices, query profiles). The database table needs no extra service
+# and is created by migrate, but every read of it is a query: each cart
+# badge poll and each open chat stream's once-a-second check. In production
+# point 'shared' at Redis or memcached, where those reads are single cache
+# GETs, e.g.
+#     'shared': {
+#         'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+#         'LOCATION': 'redis://127.0.0.1:6379/1',
+#     },
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'pharmazone_cache',
+        'OPTIONS': {'MAX_ENTRIES': 50000},
+    },
+}
+
 # Session settings
 SESSION_COOKIE_AGE = 86400  # 24 hours
 CART_SESSION_ID = 'cart'
@@ -0,0 +1,60 @@
+"""
+State that every worker process must agree on.
+
+The default cache is per process (LocMemCache), which suits values any
+process can rebuild on its own. Invalidation that one process does and the
+others must see goes through the 'shared' cache alias instead, a database
+table by default (see CACHES in settings).
+
+Versions count writes to something other processes hold a copy of. A
+reader compares the version it built against current_version() and
+rebuilds on a mismatch; a writer calls bump_version(). The backend has no
+atomic increment (DatabaseCache.incr() is a get and a set), so a bump
+claims the next number with add(), which only one process can win:
+
+    version = bump_version('products:autocomplete:version')
+
+Only the last CLAIM_WINDOW claims of a key are kept; each bump deletes the
+one that falls out of the window, so the table does not grow with writes.
+"""
+from django.core.cache import caches
+from django.core.management import call_command
+
+
+SHARED_CACHE = 'shared'
+# How long a claimed version number stays reserved
+CLAIM_SECONDS = 30 * 24 * 60 * 60
+# Claims kept per key; a bump racing this far behind the stored version
+# could claim a number again
+CLAIM_WINDOW = 100
+
+
+def shared_cache():
+    return caches[SHARED_CACHE]
+
+
+def current_version(key):
+    """The latest version stored under key, 0 if nothing was bumped yet"""
+    return shared_cache().get(key, 0)
+
+
+def bump_version(key):
+    """Claim and return a version no other caller of bump_version(key) receives"""
+    cache = shared_cache()
+    version = cache.get(key, 0) + 1
+    while not cache.add(f'{key}:claim:{version}', True, CLAIM_SECONDS):
+        version += 1
+    cache.set(key, version, timeout=None)
+    # A bump that claimed a higher number may have stored it before ours;
+    # move the key back up to it so the stored version never goes back.
+    latest = version
+    while cache.get(f'{key}:claim:{latest + 1}'):
+        latest += 1
+        cache.set(key, latest, timeout=None)
+    cache.delete(f'{key}:claim:{version - CLAIM_WINDOW}')
+    return version
+
+
+def create_cache_tables(using='default', **kwargs):
+    """post_migrate handler creating the DatabaseCache tables, so migrate is the only setup step"""
+    call_command('createcachetable', database=using, verbosity=0)
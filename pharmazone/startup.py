@@ -0,0 +1,99 @@
+"""
+Cold-start measurement for a worker process.
+
+measure_startup() starts a fresh interpreter with -X importtime, runs
+django.setup() and loads the URLconf the way the first request would, and
+reports the time for each step, the import time attributed to each local
+app, peak RSS, and which of the DEFERRED_MODULES got imported anyway.
+"""
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+
+
+# Heavy dependencies that must only be imported when a feature needs them
+DEFERRED_MODULES = ['reportlab', 'weasyprint', 'requests', 'openpyxl', 'pandas', 'matplotlib', 'PIL']
+
+# Regression budget for django.setup() plus URL resolution, in seconds
+STARTUP_BUDGET_SECONDS = 2.0
+
+_PROBE = '''
+import json, resource, sys, time
+started = time.perf_counter()
+import django
+django.setup()
+setup_done = time.perf_counter()
+from django.urls import get_resolver
+get_resolver().url_patterns
+urls_done = time.perf_counter()
+print(json.dumps({
+    'setup_seconds': setup_done - started,
+    'urls_seconds': urls_done - setup_done,
+    'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    'deferred_loaded': [name for name in %r if name in sys.modules],
+}))
+'''
+
+
+def local_apps():
+    """Top-level packages of the project's own apps"""
+    return [app.split('.')[0] for app in settings.INSTALLED_APPS if not app.startswith('django.')]
+
+
+def parse_importtime(output, packages):
+    """
+    Cumulative import microseconds per package from -X importtime output.
+
+    Lines are printed children-first with two spaces of indent per level. A
+    module counts towards its package when its importer is outside that
+    package, so each subtree is counted once and includes the third-party
+    imports it triggered.
+    """
+    def package_of(module):
+        top = module.split('.')[0]
+        return top if top in packages else None
+
+    totals = dict.fromkeys(packages, 0)
+    stack = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        level = (len(name) - len(name.lstrip()) - 1) // 2
+        module = name.strip()
+
+        children = []
+        while stack and stack[-1][0] > level:
+            children.append(stack.pop())
+        for child_level, child_module, child_us in children:
+            child_package = package_of(child_module)
+            if child_package and child_package != package_of(module):
+                totals[child_package] += child_us
+        stack.append((level, module, int(cumulative_us)))
+
+    for level, module, cumulative in stack:
+        if package_of(module):
+            totals[package_of(module)] += cumulative
+    return totals
+
+
+def measure_startup():
+    """Start a fresh worker-like process and return its startup profile"""
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'pharmazone.settings'))
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _PROBE % (DEFERRED_MODULES,)],
+        cwd=settings.BASE_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    profile = json.loads(result.stdout.strip().splitlines()[-1])
+    profile['total_seconds'] = profile['setup_seconds'] + profile['urls_seconds']
+    profile['app_import_ms'] = {
+        app: us / 1000 for app, us in parse_importtime(result.stderr, local_apps()).items()
+    }
+    return profile
@@ -0,0 +1,50 @@
+"""
+Query budgets for tests.
+
+assertNumQueries pins an exact count and only lists the queries when it
+fails. QueryBudgetMixin asserts an upper bound instead, and also fails on
+a query shape repeated from one call site (an N+1 loop), reporting the
+repeated SQL and the project frames that issued it:
+
+    class CartViewTests(QueryBudgetMixin, TestCase):
+
+        def test_cart_page(self):
+            self.assertViewQueryBudget(reverse('cart:cart'), max_queries=8)
+
+    with self.assertQueryBudget(max_queries=3):
+        reserve_stock(order, cart_items)
+"""
+from contextlib import ExitStack, contextmanager
+
+from django.db import connections
+
+from .profiling import QueryRecorder
+
+
+class QueryBudgetMixin:
+    """TestCase mixin for query budgets; max_repeats=None allows any repetition"""
+
+    @contextmanager
+    def assertQueryBudget(self, max_queries, max_repeats=1, using=None):
+        recorder = QueryRecorder()
+        with ExitStack() as stack:
+            aliases = [using] if using else list(connections)
+            for alias in aliases:
+                stack.enter_context(connections[alias].execute_wrapper(recorder))
+            yield recorder
+
+        if recorder.count > max_queries:
+            self.fail(f'Query budget of {max_queries} exceeded: {recorder.report()}')
+        if max_repeats is not None:
+            repeats = recorder.repeats(threshold=max_repeats + 1)
+            if repeats:
+                self.fail(
+                    f'Query repeated {repeats[0][0]} times (at most {max_repeats} allowed): {recorder.report(max_repeats + 1)}'
+                )
+
+    def assertViewQueryBudget(self, url, max_queries, max_repeats=1, method='get', data=None, status_code=200):
+        """Request url with self.client and assert its queries fit the budget; returns the response"""
+        with self.assertQueryBudget(max_queries, max_repeats):
+            response = getattr(self.client, method)(url, data)
+        self.assertEqual(response.status_code, status_code)
+        return response
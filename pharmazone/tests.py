@@ -0,0 +1,303 @@
+import datetime
+import io
+from decimal import Decimal
+from unittest import mock
+
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import TestCase, override_settings
+from django.urls import include, path, reverse
+
+from accounts.models import User
+from doctor_appointments.models import Appointment, AppointmentReview
+from doctor_appointments.tests import create_doctor
+from products.models import Category, Manufacturer, Medicine, MedicineReview
+from .exports import Column, export_response
+from .pagination import CursorPaginator
+from .profiling import fingerprint, summaries
+from .shared_cache import CLAIM_WINDOW, bump_version, current_version, shared_cache
+from .testing import QueryBudgetMixin
+
+
+def medicine_categories(request):
+    """One query per medicine for its category: the N+1 the profiler should catch"""
+    names = [medicine.category.name for medicine in Medicine.objects.all()]
+    return HttpResponse(', '.join(names))
+
+
+MEDICINE_EXPORT = [Column('Name', 'name'), Column('Price', 'price')]
+
+
+def export_medicines(request):
+    return export_response(request, Medicine.objects.order_by('name'), MEDICINE_EXPORT, 'medicines') or HttpResponse('page')
+
+
+urlpatterns = [
+    path('n-plus-one/', medicine_categories, name='n_plus_one'),
+    path('export/', export_medicines, name='export_medicines'),
+    path('', include('pharmazone.urls')),
+]
+
+
+def create_medicines(count):
+    manufacturer = Manufacturer.objects.create(name='Nepal Pharma', country='Nepal')
+    for i in range(count):
+        Medicine.objects.create(
+            name=f'Medicine {i}',
+            description='Test medicine',
+            category=Category.objects.create(name=f'Category {i}'),
+            manufacturer=manufacturer,
+            price=Decimal('50.00'),
+            stock_quantity=10,
+            strength='500mg',
+        )
+
+
+class FingerprintTests(TestCase):
+
+    def test_literals_and_in_lists_collapse(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE id IN (%s, %s, %s) AND name = 'x' LIMIT 21"),
+            fingerprint("SELECT * FROM t WHERE id IN (%s) AND name = 'it''s'  LIMIT 5"),
+        )
+        self.assertEqual(fingerprint('SELECT "t1"."id" FROM "t1" WHERE "t1"."id" = 7'), 'SELECT "t1"."id" FROM "t1" WHERE "t1"."id" = ?')
+
+
+@override_settings(ROOT_URLCONF='pharmazone.tests', QUERY_PROFILER=True)
+class QueryProfilerMiddlewareTests(TestCase):
+
+    def setUp(self):
+        create_medicines(5)
+
+    def test_records_counts_and_repeats_per_view(self):
+        with self.assertLogs('pharmazone.queries', 'WARNING') as logs:
+            response = self.client.get(reverse('n_plus_one'))
+
+        self.assertEqual(response['X-Query-Count'], '6')
+        self.assertIn('5 x SELECT', logs.output[0])
+        # Kept where every worker process can see it
+        self.assertIn('n_plus_one', shared_cache().get('query_profile:views'))
+        [summary] = summaries()
+        self.assertEqual(summary['view'], 'n_plus_one')
+        self.assertEqual(summary['max_queries'], 6)
+        [repeat] = summary['repeat_list']
+        self.assertEqual(repeat['max_count'], 5)
+        self.assertIn('"products_category"', repeat['sql'])
+        # Innermost first: the loop in the view, not Django's ORM frames
+        self.assertTrue(repeat['stack'][0].startswith('pharmazone/tests.py:'))
+        self.assertTrue(any(frame.endswith(' in medicine_categories') for frame in repeat['stack'][:2]))
+
+    def test_staff_page_lists_views(self):
+        with self.assertLogs('pharmazone.queries', 'WARNING'):
+            self.client.get(reverse('n_plus_one'))
+        url = reverse('query_profile')
+
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+        staff = User.objects.create_user(username='staff', password='pass12345', is_staff=True)
+        self.client.force_login(staff)
+        response = self.client.get(url)
+        self.assertContains(response, 'n_plus_one')
+        self.assertContains(response, '5&times;')
+
+        self.client.post(url)
+        self.assertNotIn('n_plus_one', [summary['view'] for summary in summaries()])
+
+
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+
+    def setUp(self):
+        create_medicines(3)
+
+    def test_fails_on_repeated_queries_with_their_call_site(self):
+        with self.assertRaises(AssertionError) as failure:
+            with self.assertQueryBudget(max_queries=10):
+                [medicine.category.name for medicine in Medicine.objects.all()]
+
+        self.assertIn('repeated 3 times', str(failure.exception))
+        self.assertIn('pharmazone/tests.py', str(failure.exception))
+
+    def test_passes_within_budget(self):
+        with self.assertQueryBudget(max_queries=1):
+            [medicine.category.name for medicine in Medicine.objects.select_related('category')]
+
+        with self.assertRaises(AssertionError):
+            with self.assertQueryBudget(max_queries=1, max_repeats=None):
+                [medicine.category.name for medicine in Medicine.objects.all()]
+
+
+class SharedVersionTests(TestCase):
+
+    def test_bumps_claim_distinct_increasing_versions(self):
+        self.assertEqual(current_version('test:version'), 0)
+        versions = [bump_version('test:version') for i in range(3)]
+
+        self.assertEqual(versions, [1, 2, 3])
+        self.assertEqual(current_version('test:version'), 3)
+
+    def test_stored_version_never_goes_back(self):
+        # Another process claimed 1 and 2 but its store of 2 was overwritten by 1
+        shared_cache().add('test:version:claim:1', True)
+        shared_cache().add('test:version:claim:2', True)
+        shared_cache().set('test:version', 0)
+
+        self.assertEqual(bump_version('test:version'), 3)
+        self.assertEqual(current_version('test:version'), 3)
+
+    def test_old_claims_are_deleted(self):
+        for i in range(CLAIM_WINDOW + 2):
+            bump_version('test:version')
+
+        self.assertIsNone(shared_cache().get('test:version:claim:2'))
+        self.assertTrue(shared_cache().get('test:version:claim:3'))
+        self.assertTrue(shared_cache().get(f'test:version:claim:{CLAIM_WINDOW + 2}'))
+
+
+class CounterTests(TestCase):
+
+    def setUp(self):
+        create_medicines(2)
+        self.medicine, self.other_medicine = Medicine.objects.order_by('name')
+        self.users = [User.objects.create_user(username=f'customer{i}', password='pass12345') for i in range(2)]
+
+    def review(self, user, rating, medicine=None):
+        return MedicineReview.objects.create(
+            medicine=medicine or self.medicine, user=user, rating=rating, title='Review', comment='Works',
+        )
+
+    def counters(self, medicine):
+        return tuple(Medicine.objects.filter(pk=medicine.pk).values_list('review_count', 'rating_sum').get())
+
+    def test_create_edit_and_delete(self):
+        first = self.review(self.users[0], 4)
+        self.review(self.users[1], 2)
+        self.assertEqual(self.counters(self.medicine), (2, 6))
+
+        first.rating = 5
+        first.save()
+        self.assertEqual(self.counters(self.medicine), (2, 7))
+
+        first.delete()
+        self.assertEqual(self.counters(self.medicine), (1, 2))
+
+    def test_moving_a_row_updates_both_parents(self):
+        review = self.review(self.users[0], 4)
+
+        review.medicine = self.other_medicine
+        review.save()
+
+        self.assertEqual(self.counters(self.medicine), (0, 0))
+        self.assertEqual(self.counters(self.other_medicine), (1, 4))
+
+    def test_moving_a_partly_loaded_row_recounts_both_parents(self):
+        self.review(self.users[0], 4)
+
+        review = MedicineReview.objects.only('id', 'title').get()
+        review.medicine = self.other_medicine
+        review.save()
+
+        self.assertEqual(self.counters(self.medicine), (0, 0))
+        self.assertEqual(self.counters(self.other_medicine), (1, 4))
+
+    def test_mean_falls_back_to_the_default_without_rows(self):
+        doctor = create_doctor(0)
+        appointment = Appointment.objects.create(
+            patient=self.users[0], doctor=doctor, appointment_date=datetime.date.today(),
+            appointment_time=datetime.time(9, 0), fee=Decimal('800.00'), status='completed',
+            patient_age=30, patient_gender='female', chief_complaint='Headache',
+        )
+        review = AppointmentReview.objects.create(appointment=appointment, doctor=doctor, patient=self.users[0], rating=3)
+        doctor.refresh_from_db()
+        self.assertEqual((doctor.review_count, doctor.rating, doctor.total_appointments), (1, Decimal('3.00'), 1))
+
+        review.delete()
+        doctor.refresh_from_db()
+        self.assertEqual((doctor.review_count, doctor.rating_sum, doctor.rating), (0, 0, Decimal('5.00')))
+
+    def test_recompute_counters_repairs_writes_that_skipped_the_signals(self):
+        self.review(self.users[0], 4)
+        self.review(self.users[1], 2, medicine=self.other_medicine)
+        MedicineReview.objects.filter(medicine=self.other_medicine).update(rating=5)
+        Medicine.objects.update(review_count=9)
+
+        call_command('recompute_counters', 'products.Medicine', stdout=io.StringIO())
+
+        self.assertEqual(self.counters(self.medicine), (1, 4))
+        self.assertEqual(self.counters(self.other_medicine), (1, 5))
+
+
+@override_settings(ROOT_URLCONF='pharmazone.tests')
+class ExportTests(TestCase):
+
+    def setUp(self):
+        create_medicines(3)
+        Medicine.objects.filter(name='Medicine 0').update(name='=HYPERLINK("http://example.com")')
+
+    def test_csv_escapes_formulas(self):
+        response = self.client.get(reverse('export_medicines'), {'export': 'csv'})
+
+        lines = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual(lines[0], 'Name,Price')
+        self.assertIn("\"'=HYPERLINK(\"\"http://example.com\"\")\",50.00", lines)
+        self.assertIn('Medicine 1,50.00', lines)
+
+    def test_xlsx_escapes_formulas(self):
+        import openpyxl
+
+        response = self.client.get(reverse('export_medicines'), {'export': 'xlsx'})
+
+        sheet = openpyxl.load_workbook(io.BytesIO(b''.join(response.streaming_content))).active
+        names = [row[0] for row in sheet.iter_rows(min_row=2, values_only=True)]
+        self.assertEqual(names, ['\'=HYPERLINK("http://example.com")', 'Medicine 1', 'Medicine 2'])
+
+    def test_xlsx_over_the_row_limit_is_sent_as_csv(self):
+        with mock.patch('pharmazone.exports.XLSX_MAX_ROWS', 2):
+            response = self.client.get(reverse('export_medicines'), {'export': 'xlsx', 'search': 'x'})
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response['Location'], '/export/?export=csv&search=x')
+
+
+class CursorPaginatorTests(TestCase):
+
+    def setUp(self):
+        create_medicines(11)
+        # Repeated prices, so pages must tie-break on the primary key
+        for medicine in Medicine.objects.all():
+            Medicine.objects.filter(pk=medicine.pk).update(price=Decimal(10 * (medicine.pk % 3)))
+
+    def walk(self, ordering, per_page=4):
+        """Every page going forward, then every page coming back from the last one"""
+        paginator = CursorPaginator(Medicine.objects.all(), per_page, ordering)
+        forward = [paginator.get_page()]
+        while forward[-1].has_next():
+            forward.append(paginator.get_page(forward[-1].next_cursor))
+        backward = [forward[-1]]
+        while backward[-1].has_previous():
+            backward.append(paginator.get_page(backward[-1].previous_cursor))
+        return [[m.pk for m in page] for page in forward], [[m.pk for m in page] for page in reversed(backward)]
+
+    def test_pages_cover_every_row_once_in_both_directions(self):
+        for ordering in (['price'], ['-price'], ['name']):
+            tie_break = '-pk' if ordering[0].startswith('-') else 'pk'
+            expected = list(Medicine.objects.order_by(*ordering, tie_break).values_list('pk', flat=True))
+
+            forward, backward = self.walk(ordering)
+
+            self.assertEqual([pk for page in forward for pk in page], expected, ordering)
+            self.assertEqual([len(page) for page in forward], [4, 4, 3])
+            self.assertEqual(backward, forward, ordering)
+
+    def test_first_and_bad_cursors_give_the_first_page(self):
+        paginator = CursorPaginator(Medicine.objects.all(), 4, ['name'])
+
+        first = paginator.get_page()
+        self.assertFalse(first.has_previous())
+        self.assertEqual([m.pk for m in paginator.get_page('not-a-cursor')], [m.pk for m in first])
+
+    def test_counts(self):
+        self.assertEqual(CursorPaginator(Medicine.objects.all(), 4, ['name'], count='exact').get_page().count, 11)
+
+        with mock.patch('pharmazone.pagination.APPROXIMATE_COUNT_LIMIT', 5):
+            page = CursorPaginator(Medicine.objects.all(), 4, ['name'], count='approximate').get_page()
+        self.assertEqual((page.count, page.count_is_exact), (5, False))
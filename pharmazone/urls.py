@@ -25,6 +25,8 @@ urlpatterns = [
     path('admin/', admin_views.admin_redirect, name='admin_redirect'),
     # Keep original admin accessible at different URL if needed
     path('django-admin/', admin.site.urls),
+    # Staff-only query profile (see pharmazone.profiling)
+    path('staff/query-profile/', admin_views.query_profile, name='query_profile'),
     path('', include('products.urls')),
     path('accounts/', include('accounts.urls')),
     path('cart/', include('cart.urls')),
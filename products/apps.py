@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class ProductsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'products'
+
+    def ready(self):
+        from pharmazone.shared_cache import create_cache_tables
+
+        from . import signals  # noqa: F401
+
+        post_migrate.connect(create_cache_tables, sender=self)
@@ -0,0 +1,192 @@
+"""
+In-memory autocomplete index for search_suggestions.
+
+Active medicine names and generic names are broken into 2- and 3-character
+grams. A query looks up the posting sets for its grams, intersects them and
+verifies the substring match, so the endpoint answers without touching the
+database. The index is built on first use in each process and kept current
+by the Medicine signals. Every write also bumps a version in the shared
+cache (pharmazone.shared_cache). A process reads that version at most once
+every VERSION_CHECK_SECONDS, so writes made by other workers show up in its
+suggestions within that time, and most keystrokes cost no query at all.
+"""
+import heapq
+import threading
+import time
+
+from pharmazone.shared_cache import bump_version, current_version
+
+from .models import Medicine
+
+
+VERSION_CACHE_KEY = 'products:autocomplete:version'
+MIN_QUERY_LENGTH = 2
+# How often a process looks for writes made by other processes
+VERSION_CHECK_SECONDS = 5
+
+
+def _grams(text):
+    """Return every 2- and 3-character substring of text"""
+    grams = set()
+    for size in (2, 3):
+        for i in range(len(text) - size + 1):
+            grams.add(text[i:i + size])
+    return grams
+
+
+class SuggestionIndex:
+    """Gram index over active medicine names and generic names"""
+
+    def __init__(self):
+        self.entries = {}
+        self.postings = {}
+        self.version = None
+        self.checked_at = 0.0
+        self.lock = threading.Lock()
+        self.built = False
+
+    def _entry_for(self, medicine):
+        return {
+            'name': medicine.name,
+            'slug': medicine.slug,
+            'strength': medicine.strength,
+            'price': float(medicine.current_price),
+            'name_lower': medicine.name.lower(),
+            'generic_lower': (medicine.generic_name or '').lower(),
+        }
+
+    def _add(self, medicine_id, entry):
+        self.entries[medicine_id] = entry
+        for gram in _grams(entry['name_lower']) | _grams(entry['generic_lower']):
+            self.postings.setdefault(gram, set()).add(medicine_id)
+
+    def _discard(self, medicine_id):
+        entry = self.entries.pop(medicine_id, None)
+        if entry is None:
+            return
+        for gram in _grams(entry['name_lower']) | _grams(entry['generic_lower']):
+            ids = self.postings.get(gram)
+            if ids is not None:
+                ids.discard(medicine_id)
+                if not ids:
+                    del self.postings[gram]
+
+    def build(self):
+        """Load every active medicine into a fresh index"""
+        checked_at = time.monotonic()
+        version = current_version(VERSION_CACHE_KEY)
+        medicines = Medicine.objects.filter(is_active=True).only(
+            'id', 'name', 'slug', 'strength', 'generic_name', 'price', 'discount_price'
+        )
+        fresh = SuggestionIndex()
+        for medicine in medicines.iterator(chunk_size=2000):
+            fresh._add(medicine.id, fresh._entry_for(medicine))
+
+        with self.lock:
+            self.entries = fresh.entries
+            self.postings = fresh.postings
+            self.version = version
+            self.checked_at = checked_at
+            self.built = True
+
+    def ensure_current(self):
+        """Build on first use, or rebuild if another process changed the catalog"""
+        now = time.monotonic()
+        if self.built and self.version is not None and now - self.checked_at < VERSION_CHECK_SECONDS:
+            return
+        if not self.built or current_version(VERSION_CACHE_KEY) != self.version:
+            self.build()
+        else:
+            self.checked_at = now
+
+    def update(self, medicine):
+        """Apply a saved medicine to the index"""
+        version = _bump_version()
+        if not self.built:
+            return
+        with self.lock:
+            self._discard(medicine.id)
+            if medicine.is_active:
+                self._add(medicine.id, self._entry_for(medicine))
+            self._advance(version)
+
+    def remove(self, medicine_id):
+        """Drop a deleted medicine from the index"""
+        version = _bump_version()
+        if not self.built:
+            return
+        with self.lock:
+            self._discard(medicine_id)
+            self._advance(version)
+
+    def _advance(self, version):
+        # Only claim the new version if no other process wrote in between;
+        # otherwise stay stale so the next lookup rebuilds.
+        if self.version is not None and version == self.version + 1:
+            self.version = version
+        else:
+            self.version = None
+
+    def suggest(self, query, limit=5):
+        """Return up to limit suggestions whose name or generic name contains query"""
+        query = query.strip().lower()
+        if len(query) < MIN_QUERY_LENGTH:
+            return []
+
+        self.ensure_current()
+
+        with self.lock:
+            gram_size = 3 if len(query) >= 3 else 2
+            grams = {query[i:i + gram_size] for i in range(len(query) - gram_size + 1)}
+            posting_sets = []
+            for gram in grams:
+                ids = self.postings.get(gram)
+                if not ids:
+                    return []
+                posting_sets.append(ids)
+            posting_sets.sort(key=len)
+            candidates = set.intersection(*posting_sets)
+
+            ranked = []
+            for medicine_id in candidates:
+                entry = self.entries[medicine_id]
+                name, generic = entry['name_lower'], entry['generic_lower']
+                if name.startswith(query):
+                    rank = 0
+                elif query in name:
+                    rank = 1
+                elif generic.startswith(query):
+                    rank = 2
+                elif query in generic:
+                    rank = 3
+                else:
+                    continue
+                ranked.append((rank, name, entry))
+
+            top = heapq.nsmallest(limit, ranked, key=lambda item: (item[0], item[1]))
+            return [
+                {
+                    'name': entry['name'],
+                    'slug': entry['slug'],
+                    'strength': entry['strength'],
+                    'price': entry['price'],
+                }
+                for rank, name, entry in top
+            ]
+
+
+def _bump_version():
+    return bump_version(VERSION_CACHE_KEY)
+
+
+suggestion_index = SuggestionIndex()
+
+
+def invalidate_suggestions():
+    """Make every process rebuild its index on next use, after writes that skip the signals"""
+    _bump_version()
+
+
+def get_suggestions(query, limit=5):
+    """Top suggestions for the search box"""
+    return suggestion_index.suggest(query, limit=limit)
@@ -0,0 +1,311 @@
+"""
+Bulk catalog import from CSV or XLSX.
+
+import_catalog() reads the file as a stream (the csv module, or openpyxl in
+read_only mode), converts CHUNK_SIZE rows at a time into Medicine objects
+and writes each chunk with one upsert keyed on slug:
+
+    INSERT ... ON CONFLICT (slug) DO UPDATE SET <columns in the file>
+
+so memory stays bounded by the chunk size, not the file size. Backends
+without ON CONFLICT get a bulk_update of the existing slugs plus a
+bulk_create of the new ones instead.
+
+Categories and manufacturers are matched by name (case-insensitive) from a
+map loaded once, and created on first use unless create_missing is off.
+Only the columns present in the file are updated on existing medicines, so
+a sheet of slug and price changes prices without touching anything else.
+
+Bulk writes bypass the Medicine signals, so the search index, autocomplete
+and facet caches are refreshed once at the end instead of once per row.
+"""
+import csv
+import io
+import time
+from contextlib import nullcontext
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connection, transaction
+from django.utils.text import slugify
+
+from pharmazone.lazy_imports import optional_module
+from .autocomplete import invalidate_suggestions
+from .facets import bump_catalog_version
+from .models import Category, Manufacturer, Medicine
+from . import search
+
+
+CHUNK_SIZE = 1000
+# Only the first errors are kept for the report; the rest are counted
+MAX_REPORTED_ERRORS = 500
+
+REQUIRED_COLUMNS = ['name', 'category', 'manufacturer', 'price']
+VALUE_COLUMNS = [
+    'generic_name', 'description', 'prescription_type', 'dosage_form', 'strength', 'pack_size',
+    'composition', 'indications', 'contraindications', 'side_effects', 'storage_conditions',
+    'expiry_date', 'price', 'discount_price', 'stock_quantity', 'min_order_quantity',
+    'max_order_quantity', 'is_active', 'is_featured', 'requires_prescription',
+]
+COLUMNS = ['slug', 'name', 'category', 'manufacturer'] + VALUE_COLUMNS
+
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 'on'}
+FALSE_VALUES = {'0', 'false', 'no', 'n', 'off'}
+
+
+class CatalogImportError(Exception):
+    """The file as a whole cannot be imported"""
+
+
+class RowError:
+
+    def __init__(self, line, message):
+        self.line = line
+        self.message = message
+
+    def __str__(self):
+        return f'Line {self.line}: {self.message}'
+
+
+class ImportResult:
+
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.updated = 0
+        self.error_count = 0
+        self.errors = []
+        self.seconds = 0.0
+
+    def add_error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(RowError(line, message))
+
+
+def _normalize_header(value):
+    return str(value or '').strip().lower().replace(' ', '_')
+
+
+def _read_csv(file):
+    text = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+    reader = csv.reader(text)
+    header = [_normalize_header(value) for value in next(reader, [])]
+    yield header
+    for row in reader:
+        yield row
+
+
+def _read_xlsx(file):
+    openpyxl = optional_module('openpyxl')
+    if openpyxl is None:
+        raise CatalogImportError('openpyxl is required to import .xlsx files')
+    workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        yield [_normalize_header(value) for value in next(rows, ())]
+        for row in rows:
+            yield ['' if value is None else value for value in row]
+    finally:
+        workbook.close()
+
+
+def read_rows(file, filename):
+    """
+    (columns, rows) for a CSV or XLSX file object: the recognised columns of
+    the header row, and an iterator of (line number, {column: value})
+    """
+    if filename.lower().endswith('.xlsx'):
+        rows = _read_xlsx(file)
+    elif filename.lower().endswith('.csv'):
+        rows = _read_csv(file)
+    else:
+        raise CatalogImportError('Upload a .csv or .xlsx file')
+
+    header = next(rows)
+    missing = [column for column in REQUIRED_COLUMNS if column not in header]
+    if missing:
+        raise CatalogImportError(f'Missing required columns: {", ".join(missing)}')
+    positions = [(index, column) for index, column in enumerate(header) if column in COLUMNS]
+
+    def values():
+        for line, row in enumerate(rows, start=2):
+            row = list(row)
+            values = {}
+            for index, column in positions:
+                value = row[index] if index < len(row) else ''
+                values[column] = value.strip() if isinstance(value, str) else value
+            if any(value not in ('', None) for value in values.values()):
+                yield line, values
+
+    return [column for index, column in positions], values()
+
+
+class _Resolver:
+    """Name -> id for categories or manufacturers, loaded once and filled in as rows need new ones"""
+
+    def __init__(self, model, create_missing, **defaults):
+        self.model = model
+        self.create_missing = create_missing
+        self.defaults = defaults
+        self.ids = {name.lower(): pk for name, pk in model.objects.values_list('name', 'id')}
+
+    def __call__(self, name):
+        name = str(name or '').strip()
+        if not name:
+            raise ValidationError(f'{self.model._meta.verbose_name} is required')
+        pk = self.ids.get(name.lower())
+        if pk is None:
+            if not self.create_missing:
+                raise ValidationError(f'Unknown {self.model._meta.verbose_name} "{name}"')
+            instance = self.model(name=name, **self.defaults)
+            try:
+                instance.full_clean(exclude=['slug', *self.defaults])
+                with transaction.atomic():
+                    instance.save()
+            except (ValidationError, IntegrityError) as e:
+                raise ValidationError(f'Cannot create {self.model._meta.verbose_name} "{name}": {e}')
+            pk = instance.pk
+            self.ids[name.lower()] = pk
+        return pk
+
+
+def _to_python(column, value):
+    field = Medicine._meta.get_field(column)
+    if value in ('', None):
+        if field.null:
+            return None
+        if field.has_default():
+            return field.get_default()
+        if field.get_internal_type() in ('CharField', 'TextField'):
+            return ''
+        raise ValidationError(f'{column} is required')
+    if field.get_internal_type() == 'BooleanField':
+        text = str(value).strip().lower()
+        if text in TRUE_VALUES:
+            return True
+        if text in FALSE_VALUES:
+            return False
+        raise ValidationError(f'{column}: "{value}" is not yes/no')
+    if column == 'expiry_date' and hasattr(value, 'date'):
+        # openpyxl reads date cells as datetimes
+        value = value.date()
+    try:
+        value = field.to_python(value)
+        # Length and range checks, so one bad row cannot fail a whole chunk in the database
+        field.run_validators(value)
+    except ValidationError as e:
+        raise ValidationError(f'{column}: {" ".join(e.messages)}')
+    if field.choices and value not in dict(field.choices):
+        raise ValidationError(f'{column}: "{value}" is not one of {", ".join(dict(field.choices))}')
+    return value
+
+
+def build_medicine(values, categories, manufacturers):
+    """Medicine (unsaved) for one row; raises ValidationError with the reason it is invalid"""
+    name = _to_python('name', values.get('name'))
+    if not name:
+        raise ValidationError('name is required')
+    fields = {
+        column: _to_python(column, values[column])
+        for column in VALUE_COLUMNS
+        if column in values
+    }
+    if 'price' not in fields or fields['price'] is None:
+        raise ValidationError('price is required')
+
+    # The same checks as AdminMedicineForm.clean
+    if fields.get('discount_price') is not None and fields['discount_price'] >= fields['price']:
+        raise ValidationError('Discount price must be less than regular price.')
+    min_order = fields.get('min_order_quantity', 1)
+    max_order = fields.get('max_order_quantity', 100)
+    if min_order > max_order:
+        raise ValidationError('Minimum order quantity cannot be greater than maximum order quantity.')
+
+    # Same default slug as Medicine.save()
+    slug = slugify(values.get('slug') or f"{name}-{fields.get('strength', '')}")
+    if not slug or len(slug) > Medicine._meta.get_field('slug').max_length:
+        raise ValidationError(f'slug: "{slug}" is empty or too long')
+    return Medicine(
+        name=name,
+        slug=slug,
+        category_id=categories(values['category']),
+        manufacturer_id=manufacturers(values['manufacturer']),
+        **fields,
+    )
+
+
+def _write_chunk(medicines, update_fields, result, dry_run=False):
+    slugs = [medicine.slug for medicine in medicines]
+    existing = dict(Medicine.objects.filter(slug__in=slugs).values_list('slug', 'id'))
+    result.updated += len(existing)
+    result.created += len(medicines) - len(existing)
+    if dry_run:
+        return
+
+    with transaction.atomic():
+        if connection.features.supports_update_conflicts_with_target:
+            Medicine.objects.bulk_create(
+                medicines,
+                update_conflicts=True,
+                unique_fields=['slug'],
+                update_fields=update_fields,
+            )
+        else:
+            new = [medicine for medicine in medicines if medicine.slug not in existing]
+            changed = [medicine for medicine in medicines if medicine.slug in existing]
+            for medicine in changed:
+                medicine.pk = existing[medicine.slug]
+            Medicine.objects.bulk_create(new)
+            Medicine.objects.bulk_update(changed, update_fields)
+
+
+def refresh_catalog_indexes():
+    """Bring search, autocomplete and facets up to date after a bulk write"""
+    search.rebuild_index()
+    invalidate_suggestions()
+    bump_catalog_version()
+
+
+def import_catalog(file, filename, chunk_size=CHUNK_SIZE, create_missing=True, dry_run=False):
+    """Upsert the medicines in a CSV/XLSX file object; returns an ImportResult"""
+    started = time.monotonic()
+    result = ImportResult()
+    categories = _Resolver(Category, create_missing)
+    manufacturers = _Resolver(Manufacturer, create_missing, country='')
+
+    columns, rows = read_rows(file, filename)
+    # Existing rows only get the columns the file provides
+    update_fields = ['name', 'category', 'manufacturer', 'updated_at'] + [
+        column for column in VALUE_COLUMNS if column in columns
+    ]
+    chunk = {}
+
+    def flush():
+        if chunk:
+            _write_chunk([medicine for line, medicine in chunk.values()], update_fields, result, dry_run)
+        chunk.clear()
+
+    with transaction.atomic() if dry_run else nullcontext():
+        for line, values in rows:
+            result.rows += 1
+            try:
+                medicine = build_medicine(values, categories, manufacturers)
+            except ValidationError as e:
+                result.add_error(line, ' '.join(e.messages))
+                continue
+
+            if medicine.slug in chunk:
+                earlier_line = chunk.pop(medicine.slug)[0]
+                result.add_error(earlier_line, f'Skipped: line {line} has the same slug "{medicine.slug}"')
+            chunk[medicine.slug] = (line, medicine)
+            if len(chunk) >= chunk_size:
+                flush()
+        flush()
+        if dry_run:
+            # Categories and manufacturers created while validating
+            transaction.set_rollback(True)
+
+    if not dry_run and result.created + result.updated:
+        refresh_catalog_indexes()
+    result.seconds = time.monotonic() - started
+    return result
@@ -0,0 +1,228 @@
+"""
+Concurrent image downloads for catalog refreshes.
+
+ImageDownloader fetches many URLs at once from a bounded thread pool. Each
+thread keeps its own requests.Session, so connections to a host are reused
+(keep-alive) instead of opened per image, and a semaphore per host caps how
+many requests hit any one server at a time. Bodies are streamed and
+abandoned as soon as they pass max_bytes, whatever Content-Length claimed.
+
+DownloadJournal is an append-only JSON Lines file with one entry per stored
+image. A rerun skips the keys it already lists, so an interrupted refresh
+picks up where it stopped, and the SHA-256 of each body lets identical
+images share one stored file.
+"""
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+from urllib.parse import urlsplit
+
+import requests
+from django.core.files.base import ContentFile
+from requests.adapters import HTTPAdapter
+
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'image/webp,image/apng,image/*,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+}
+
+# (connect, read) seconds
+DEFAULT_TIMEOUT = (5, 20)
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+
+EXTENSIONS = {
+    'image/jpeg': 'jpg',
+    'image/png': 'png',
+    'image/gif': 'gif',
+    'image/webp': 'webp',
+}
+
+
+class DownloadError(Exception):
+    """The URL did not yield a usable image"""
+
+
+class Download:
+    """An image body fetched from url"""
+
+    def __init__(self, url, content, content_type):
+        self.url = url
+        self.content = content
+        self.content_type = content_type
+        self.sha256 = hashlib.sha256(content).hexdigest()
+
+    @property
+    def extension(self):
+        return EXTENSIONS.get(self.content_type, 'jpg')
+
+
+class DownloadJournal:
+    """Record of stored downloads; path=None keeps it in memory for one run"""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.entries = {}
+        self.names_by_hash = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # A line cut short by the interruption
+                        continue
+                    self._remember(entry)
+
+    def _remember(self, entry):
+        self.entries[entry['key']] = entry
+        if entry.get('sha256') and entry.get('name'):
+            self.names_by_hash[entry['sha256']] = entry['name']
+
+    def is_done(self, key):
+        return key in self.entries
+
+    def stored_name(self, sha256):
+        """File name an identical image was stored under, if any"""
+        return self.names_by_hash.get(sha256)
+
+    def record(self, key, url, sha256, name):
+        entry = {'key': key, 'url': url, 'sha256': sha256, 'name': name}
+        with self._lock:
+            self._remember(entry)
+            if self.path:
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(entry) + '\n')
+
+    def reset(self):
+        """Forget every entry and truncate the file"""
+        with self._lock:
+            self.entries.clear()
+            self.names_by_hash.clear()
+            if self.path and os.path.exists(self.path):
+                os.remove(self.path)
+
+
+class ImageDownloader:
+    """Bounded-concurrency image fetcher with pooled connections and per-host limits"""
+
+    def __init__(self, workers=8, per_host=2, max_bytes=DEFAULT_MAX_BYTES, timeout=DEFAULT_TIMEOUT, headers=None):
+        self.workers = max(workers, 1)
+        self.per_host = max(per_host, 1)
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.headers = dict(DEFAULT_HEADERS, **(headers or {}))
+        self._local = threading.local()
+        self._sessions = []
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(self.headers)
+            adapter = HTTPAdapter(pool_connections=self.workers, pool_maxsize=self.per_host)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            self._local.session = session
+            with self._lock:
+                self._sessions.append(session)
+        return session
+
+    def _host_slot(self, url):
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            if host not in self._hosts:
+                self._hosts[host] = threading.BoundedSemaphore(self.per_host)
+            return self._hosts[host]
+
+    def fetch(self, url):
+        """Download one image; raises DownloadError if it is not a usable image"""
+        with self._host_slot(url):
+            try:
+                with self._session().get(url, timeout=self.timeout, stream=True, allow_redirects=True) as response:
+                    response.raise_for_status()
+
+                    content_type = response.headers.get('content-type', '').split(';')[0].strip().lower()
+                    if not content_type.startswith('image/'):
+                        raise DownloadError(f'URL returned {content_type or "no content type"}, not an image')
+
+                    content_length = response.headers.get('content-length')
+                    if content_length and content_length.isdigit() and int(content_length) > self.max_bytes:
+                        raise DownloadError(f'Image file too large ({content_length} bytes)')
+
+                    body = bytearray()
+                    for chunk in response.iter_content(CHUNK_SIZE):
+                        body.extend(chunk)
+                        if len(body) > self.max_bytes:
+                            raise DownloadError(f'Image file too large (over {self.max_bytes} bytes)')
+            except requests.exceptions.RequestException as e:
+                raise DownloadError(f'Network error: {e}') from e
+
+        if not body:
+            raise DownloadError('Empty response')
+        return Download(url, bytes(body), content_type)
+
+    def _fetch_job(self, key, url):
+        try:
+            return key, url, self.fetch(url), None
+        except DownloadError as e:
+            return key, url, None, str(e)
+
+    def download_all(self, jobs):
+        """
+        Fetch (key, url) pairs concurrently and yield (key, url, download,
+        error) in completion order; exactly one of download and error is set.
+        At most two jobs per worker are fetched or waiting to be yielded at a
+        time, so memory stays flat however many jobs there are.
+        """
+        jobs = iter(jobs)
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pending = {executor.submit(self._fetch_job, key, url) for key, url in islice(jobs, self.workers * 2)}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                while done:
+                    yield done.pop().result()
+                    for key, url in islice(jobs, 1):
+                        pending.add(executor.submit(self._fetch_job, key, url))
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions:
+                session.close()
+            self._sessions.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def store_image(field_file, download, filename, journal, key):
+    """
+    Save download into an image field (and its model) unless an identical
+    image is already stored, in which case the field points at that file.
+    Returns the stored name.
+    """
+    storage = field_file.storage
+    name = journal.stored_name(download.sha256)
+    instance = field_file.instance
+    if name and storage.exists(name):
+        setattr(instance, field_file.field.attname, name)
+        instance.save(update_fields=[field_file.field.attname])
+    else:
+        # Only the image column: the instance may be older than counters
+        # other writers have bumped since it was loaded
+        field_file.save(f'{filename}.{download.extension}', ContentFile(download.content), save=False)
+        instance.save(update_fields=[field_file.field.attname])
+        name = field_file.name
+    journal.record(key, download.url, download.sha256, name)
+    return name
@@ -0,0 +1,137 @@
+"""
+Filter facets for medicine_list_view.
+
+get_facets() returns, for the current search and filters, how many medicines
+fall under each category, manufacturer, prescription type and price bucket.
+Each facet is one GROUP BY (price buckets one conditional aggregate), run
+with every filter except its own so the sidebar still offers the other
+choices of a facet that is already selected.
+
+The unfiltered facets are the same for every visitor, so each process
+caches them under a catalog version that the Category, Manufacturer and
+Medicine signals bump on every change. The version lives in the shared
+cache (pharmazone.shared_cache), so a change made in one worker moves every
+worker to a fresh key.
+"""
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from pharmazone.shared_cache import bump_version, current_version
+
+from .models import Medicine
+
+
+VERSION_CACHE_KEY = 'products:facets:version'
+CACHE_TIMEOUT = 60 * 60
+
+# (key, label, lower bound inclusive, upper bound exclusive)
+PRICE_BUCKETS = [
+    ('under-100', 'Under Rs. 100', None, Decimal('100')),
+    ('100-500', 'Rs. 100 - 500', Decimal('100'), Decimal('500')),
+    ('500-1000', 'Rs. 500 - 1000', Decimal('500'), Decimal('1000')),
+    ('over-1000', 'Rs. 1000 and above', Decimal('1000'), None),
+]
+
+
+def price_bucket_filter(key):
+    """Q for a price bucket key, or None if the key is unknown"""
+    for bucket_key, label, low, high in PRICE_BUCKETS:
+        if bucket_key == key:
+            condition = Q()
+            if low is not None:
+                condition &= Q(price__gte=low)
+            if high is not None:
+                condition &= Q(price__lt=high)
+            return condition
+    return None
+
+
+def _other_filters(filters, facet):
+    condition = Q()
+    for name, value in filters.items():
+        if name != facet:
+            condition &= value
+    return condition
+
+
+def _grouped(queryset, *fields):
+    return queryset.order_by().values(*fields).annotate(count=Count('id')).order_by(fields[-1])
+
+
+def category_facet(queryset):
+    return [
+        {'id': row['category_id'], 'name': row['category__name'], 'count': row['count']}
+        for row in _grouped(queryset, 'category_id', 'category__name')
+    ]
+
+
+def manufacturer_facet(queryset):
+    return [
+        {'id': row['manufacturer_id'], 'name': row['manufacturer__name'], 'count': row['count']}
+        for row in _grouped(queryset, 'manufacturer_id', 'manufacturer__name')
+    ]
+
+
+def prescription_type_facet(queryset):
+    counts = {row['prescription_type']: row['count'] for row in _grouped(queryset, 'prescription_type')}
+    return [
+        {'value': value, 'label': label, 'count': counts[value]}
+        for value, label in Medicine.PRESCRIPTION_CHOICES
+        if value in counts
+    ]
+
+
+def price_facet(queryset):
+    totals = queryset.order_by().aggregate(**{
+        key: Count('id', filter=price_bucket_filter(key))
+        for key, label, low, high in PRICE_BUCKETS
+    })
+    return [
+        {'key': key, 'label': label, 'count': totals[key]}
+        for key, label, low, high in PRICE_BUCKETS
+        if totals[key]
+    ]
+
+
+FACETS = {
+    'category': category_facet,
+    'manufacturer': manufacturer_facet,
+    'prescription_type': prescription_type_facet,
+    'price': price_facet,
+}
+
+
+def compute_facets(queryset, filters):
+    """Counts for every facet; filters maps facet name -> Q applied to the listing"""
+    return {
+        name: facet(queryset.filter(_other_filters(filters, name)))
+        for name, facet in FACETS.items()
+    }
+
+
+def catalog_version():
+    return current_version(VERSION_CACHE_KEY)
+
+
+def bump_catalog_version():
+    """Invalidate cached facets in every process after a catalog change"""
+    bump_version(VERSION_CACHE_KEY)
+
+
+def get_facets(queryset, filters, searched=False):
+    """
+    Facet counts for the listing queryset (active medicines, after search)
+    and the filters applied on top of it. The no-search, no-filter case is
+    served from the cache.
+    """
+    if searched or filters:
+        return compute_facets(queryset, filters)
+
+    key = f'products:facets:{catalog_version()}'
+    facets = cache.get(key)
+    if facets is None:
+        facets = compute_facets(queryset, filters)
+        cache.set(key, facets, CACHE_TIMEOUT)
+    return facets
@@ -164,3 +164,29 @@ class ManufacturerForm(forms.ModelForm):
         super().__init__(*args, **kwargs)
         self.fields['name'].required = True
         self.fields['country'].required = True
+
+
+class CatalogImportForm(forms.Form):
+    """Upload of a CSV/XLSX catalog file for bulk import"""
+    
+    file = forms.FileField(
+        widget=forms.FileInput(attrs={'class': 'form-control', 'accept': '.csv,.xlsx'}),
+        help_text='CSV or XLSX with a header row. Required columns: name, category, manufacturer, price.',
+    )
+    create_missing = forms.BooleanField(
+        required=False,
+        initial=True,
+        label='Create missing categories and manufacturers',
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'}),
+    )
+    dry_run = forms.BooleanField(
+        required=False,
+        label='Dry run (validate only, save nothing)',
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'}),
+    )
+    
+    def clean_file(self):
+        upload = self.cleaned_data['file']
+        if not upload.name.lower().endswith(('.csv', '.xlsx')):
+            raise forms.ValidationError('Upload a .csv or .xlsx file.')
+        return upload
@@ -0,0 +1,88 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from products.models import Medicine
+from products.autocomplete import SuggestionIndex
+
+
+class Command(BaseCommand):
+    help = 'Compare search_suggestions lookups: ORM icontains query vs in-memory autocomplete index'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=500,
+            help='Number of lookups to time for each implementation',
+        )
+        parser.add_argument(
+            '--query',
+            action='append',
+            dest='queries',
+            help='Query to benchmark (can be repeated). Defaults to fragments of catalog names.',
+        )
+
+    def orm_suggestions(self, query):
+        """The original search_suggestions query"""
+        medicines = Medicine.objects.filter(
+            Q(name__icontains=query) |
+            Q(generic_name__icontains=query)
+        ).filter(is_active=True)[:5]
+        return [
+            {
+                'name': medicine.name,
+                'slug': medicine.slug,
+                'strength': medicine.strength,
+                'price': float(medicine.current_price),
+            }
+            for medicine in medicines
+        ]
+
+    def sample_queries(self, count=50):
+        names = list(
+            Medicine.objects.filter(is_active=True).values_list('name', flat=True)[:1000]
+        )
+        rng = random.Random(42)
+        queries = []
+        for name in rng.choices(names, k=count):
+            name = name.lower()
+            length = rng.randint(2, min(6, len(name)))
+            start = rng.randint(0, len(name) - length)
+            queries.append(name[start:start + length])
+        return queries
+
+    def time_lookups(self, func, queries, iterations):
+        started = time.perf_counter()
+        for i in range(iterations):
+            func(queries[i % len(queries)])
+        return time.perf_counter() - started
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        queries = options['queries'] or self.sample_queries()
+
+        if not queries:
+            self.stdout.write(self.style.WARNING('No active medicines found. Add some medicines first.'))
+            return
+
+        self.stdout.write(f'Active medicines: {Medicine.objects.filter(is_active=True).count()}')
+        self.stdout.write(f'Distinct queries: {len(set(queries))}, iterations: {iterations}')
+        self.stdout.write('')
+
+        index = SuggestionIndex()
+        build_started = time.perf_counter()
+        index.build()
+        build_time = time.perf_counter() - build_started
+        self.stdout.write(f'Index build: {build_time * 1000:.1f} ms ({len(index.entries)} entries, {len(index.postings)} grams)')
+
+        orm_time = self.time_lookups(self.orm_suggestions, queries, iterations)
+        index_time = self.time_lookups(index.suggest, queries, iterations)
+
+        orm_per_query = orm_time / iterations * 1000
+        index_per_query = index_time / iterations * 1000
+        self.stdout.write(f'ORM icontains:   {orm_per_query:.3f} ms/query ({iterations / orm_time:,.0f} queries/s)')
+        self.stdout.write(f'Autocomplete:    {index_per_query:.3f} ms/query ({iterations / index_time:,.0f} queries/s)')
+        self.stdout.write('')
+        self.stdout.write(self.style.SUCCESS(f'Speedup: {orm_time / index_time:.1f}x'))
@@ -1,7 +1,6 @@
+from django.conf import settings
 from django.core.management.base import BaseCommand
-from django.core.files.base import ContentFile
-import requests
-import time
+from products.downloader import DownloadJournal, ImageDownloader, store_image
 from products.models import Medicine
 
 
@@ -14,41 +13,34 @@ class Command(BaseCommand):
             action='store_true',
             help='Force download even if image already exists',
         )
-
-    def download_image_from_url(self, url, medicine):
-        """Download image from URL and save to medicine"""
-        try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-            
-            response = requests.get(url, headers=headers, timeout=15, stream=True, allow_redirects=True)
-            response.raise_for_status()
-            
-            # Check content type
-            content_type = response.headers.get('content-type', '').lower()
-            if 'image' not in content_type:
-                return False
-            
-            # Check file size (should be reasonable)
-            content_length = response.headers.get('content-length')
-            if content_length and int(content_length) > 10 * 1024 * 1024:  # 10MB limit
-                return False
-            
-            # Save the image
-            filename = f"{medicine.slug}.jpg"
-            medicine.image.save(
-                filename,
-                ContentFile(response.content),
-                save=True
-            )
-            return True
-            
-        except Exception as e:
-            self.stdout.write(
-                self.style.ERROR(f'Error downloading image for {medicine.name}: {str(e)}')
-            )
-            return False
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=8,
+            help='Number of images downloaded in parallel',
+        )
+        parser.add_argument(
+            '--per-host',
+            type=int,
+            default=2,
+            help='Maximum concurrent requests to any one host',
+        )
+        parser.add_argument(
+            '--max-size',
+            type=float,
+            default=10,
+            help='Largest image accepted, in MB',
+        )
+        parser.add_argument(
+            '--journal',
+            default=str(settings.BASE_DIR / 'download_medicine_images.jsonl'),
+            help='Resume journal; medicines it lists are skipped on the next run',
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='Ignore the resume journal and start over',
+        )
 
     def handle(self, *args, **options):
         self.stdout.write('Downloading real medicine images from the web...')
@@ -96,46 +88,67 @@ class Command(BaseCommand):
             self.stdout.write(self.style.WARNING('All medicines already have images. Use --force to replace them.'))
             return
         
+        journal = DownloadJournal(options['journal'])
+        if options['restart']:
+            journal.reset()
+        
+        jobs = []
+        by_key = {}
+        skipped_count = 0
+        for medicine in medicines:
+            name_lower = medicine.name.lower()
+            image_url = None
+            
+            # Find matching image URL
+            for key, urls in medicine_image_urls.items():
+                if key in name_lower:
+                    image_url = urls[0]  # Use first URL
+                    break
+            
+            if not image_url:
+                # Use generic placeholder
+                image_url = f'https://via.placeholder.com/800x800/CCCCCC/000000?text={medicine.name.replace(" ", "+")}'
+            
+            job_key = f'medicine:{medicine.id}:{image_url}'
+            if journal.is_done(job_key):
+                skipped_count += 1
+                continue
+            jobs.append((job_key, image_url))
+            by_key[job_key] = medicine
+        
+        if skipped_count:
+            self.stdout.write(f'Resuming: {skipped_count} medicines already done in {options["journal"]}')
+        self.stdout.write(f'Downloading {len(jobs)} images with {options["workers"]} workers...')
+        
         success_count = 0
         failed_count = 0
         
-        for medicine in medicines:
-            try:
-                name_lower = medicine.name.lower()
-                image_url = None
-                
-                # Find matching image URL
-                for key, urls in medicine_image_urls.items():
-                    if key in name_lower:
-                        image_url = urls[0]  # Use first URL
-                        break
-                
-                if not image_url:
-                    # Use generic placeholder
-                    image_url = f'https://via.placeholder.com/800x800/CCCCCC/000000?text={medicine.name.replace(" ", "+")}'
-                
-                self.stdout.write(f'Downloading image for {medicine.name}...')
+        downloader = ImageDownloader(
+            workers=options['workers'],
+            per_host=options['per_host'],
+            max_bytes=int(options['max_size'] * 1024 * 1024),
+        )
+        with downloader:
+            for job_key, image_url, download, error in downloader.download_all(jobs):
+                medicine = by_key[job_key]
+                if error:
+                    self.stdout.write(
+                        self.style.WARNING(f'⚠ Could not download image for {medicine.name}: {error}')
+                    )
+                    failed_count += 1
+                    continue
                 
-                # Download image
-                if self.download_image_from_url(image_url, medicine):
+                try:
+                    store_image(medicine.image, download, medicine.slug, journal, job_key)
                     self.stdout.write(
                         self.style.SUCCESS(f'✓ Successfully downloaded image for {medicine.name}')
                     )
                     success_count += 1
-                else:
+                except Exception as e:
                     self.stdout.write(
-                        self.style.WARNING(f'⚠ Could not download image for {medicine.name}')
+                        self.style.ERROR(f'✗ Error processing {medicine.name}: {str(e)}')
                     )
                     failed_count += 1
-                
-                # Be polite to APIs
-                time.sleep(0.3)
-                
-            except Exception as e:
-                self.stdout.write(
-                    self.style.ERROR(f'✗ Error processing {medicine.name}: {str(e)}')
-                )
-                failed_count += 1
         
         self.stdout.write('')
         self.stdout.write(
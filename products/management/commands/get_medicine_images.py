@@ -1,7 +1,5 @@
 from django.core.management.base import BaseCommand
-from django.core.files.base import ContentFile
-import requests
-import time
+from products.downloader import DownloadError, DownloadJournal, ImageDownloader, store_image
 from products.models import Medicine
 
 
@@ -23,41 +21,14 @@ class Command(BaseCommand):
     def download_image(self, image_url, medicine):
         """Download and save image from URL"""
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                'Accept': 'image/webp,image/apng,image/*,*/*;q=0.8',
-                'Accept-Language': 'en-US,en;q=0.9',
-            }
+            with ImageDownloader(workers=1, per_host=1) as downloader:
+                download = downloader.fetch(image_url)
             
-            response = requests.get(image_url, headers=headers, timeout=20, stream=True, allow_redirects=True)
-            response.raise_for_status()
+            name = store_image(medicine.image, download, medicine.slug, DownloadJournal(), f'medicine:{medicine.id}')
+            return True, f"Image saved as {name}"
             
-            # Check if it's actually an image
-            content_type = response.headers.get('content-type', '').lower()
-            if 'image' not in content_type:
-                return False, f"URL returned {content_type}, not an image"
-            
-            # Check file size (max 5MB)
-            content_length = response.headers.get('content-length')
-            if content_length and int(content_length) > 5 * 1024 * 1024:
-                return False, "Image file too large (>5MB)"
-            
-            # Determine file extension from content type or URL
-            ext = 'jpg'
-            if 'png' in content_type:
-                ext = 'png'
-            elif 'gif' in content_type:
-                ext = 'gif'
-            elif 'webp' in content_type:
-                ext = 'webp'
-            
-            # Save the image
-            filename = f"{medicine.slug}.{ext}"
-            medicine.image.save(filename, ContentFile(response.content), save=True)
-            return True, f"Image saved as {filename}"
-            
-        except requests.exceptions.RequestException as e:
-            return False, f"Network error: {str(e)}"
+        except DownloadError as e:
+            return False, str(e)
         except Exception as e:
             return False, f"Error: {str(e)}"
 
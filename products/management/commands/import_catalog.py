@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+from products.catalog_import import CHUNK_SIZE, CatalogImportError, import_catalog
+
+
+class Command(BaseCommand):
+    help = 'Create or update medicines in bulk from a CSV or XLSX file, matched by slug'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or XLSX file; the first row holds the column names')
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=CHUNK_SIZE,
+            help='Rows written per bulk upsert',
+        )
+        parser.add_argument(
+            '--no-create-missing',
+            action='store_true',
+            help='Reject rows whose category or manufacturer does not exist instead of creating it',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Validate the file and report what would change without writing anything',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['path'], 'rb') as f:
+                result = import_catalog(
+                    f, options['path'],
+                    chunk_size=max(options['chunk_size'], 1),
+                    create_missing=not options['no_create_missing'],
+                    dry_run=options['dry_run'],
+                )
+        except (OSError, CatalogImportError) as exc:
+            raise CommandError(str(exc))
+
+        for error in result.errors:
+            self.stdout.write(self.style.WARNING(str(error)))
+        if result.error_count > len(result.errors):
+            self.stdout.write(self.style.WARNING(f'... and {result.error_count - len(result.errors)} more errors'))
+
+        prefix = 'Dry run: would have' if options['dry_run'] else 'Imported'
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefix} {result.created} created, {result.updated} updated from {result.rows} rows '
+            f'({result.error_count} errors) in {result.seconds:.2f}s'
+        ))
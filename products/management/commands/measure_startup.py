@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from pharmazone.startup import STARTUP_BUDGET_SECONDS, measure_startup
+
+
+class Command(BaseCommand):
+    help = 'Measure worker cold start: django.setup(), URL resolution, import time per app and peak RSS'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--runs',
+            type=int,
+            default=3,
+            help='Number of fresh processes to measure (the fastest run is reported)',
+        )
+
+    def handle(self, *args, **options):
+        profiles = [measure_startup() for _ in range(max(options['runs'], 1))]
+        profile = min(profiles, key=lambda p: p['total_seconds'])
+
+        self.stdout.write('Import time per app (including the libraries it pulls in):')
+        for app, ms in sorted(profile['app_import_ms'].items(), key=lambda item: -item[1]):
+            self.stdout.write(f'  {app:<22} {ms:8.1f} ms')
+        self.stdout.write('')
+        self.stdout.write(f'django.setup():   {profile["setup_seconds"] * 1000:8.1f} ms')
+        self.stdout.write(f'URL resolution:   {profile["urls_seconds"] * 1000:8.1f} ms')
+        self.stdout.write(f'Peak RSS:         {profile["max_rss_kb"] / 1024:8.1f} MB')
+
+        if profile['deferred_loaded']:
+            self.stdout.write(self.style.WARNING(
+                'Heavy modules imported at startup: ' + ', '.join(profile['deferred_loaded'])
+            ))
+
+        style = self.style.SUCCESS if profile['total_seconds'] <= STARTUP_BUDGET_SECONDS else self.style.ERROR
+        self.stdout.write(style(
+            f'Total: {profile["total_seconds"] * 1000:.1f} ms (budget {STARTUP_BUDGET_SECONDS * 1000:.0f} ms)'
+        ))
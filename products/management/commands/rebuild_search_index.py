@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from products import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index for the medicine catalog'
+
+    def handle(self, *args, **options):
+        backend = search.get_backend()
+        self.stdout.write(f'Rebuilding search index using {backend.__class__.__name__}...')
+
+        count, elapsed = search.rebuild_index()
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Indexed {count} medicines in {elapsed:.2f}s')
+        )
@@ -0,0 +1,34 @@
+import time
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from pharmazone import counters
+
+
+class Command(BaseCommand):
+    help = 'Recompute denormalized counters (review counts, ratings, usage counts) from their source tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'models',
+            nargs='*',
+            help='Only recompute counters on these models (app_label.ModelName). Defaults to all.',
+        )
+
+    def handle(self, *args, **options):
+        models = None
+        if options['models']:
+            try:
+                models = [apps.get_model(label) for label in options['models']]
+            except (LookupError, ValueError) as exc:
+                raise CommandError(str(exc))
+
+        started = time.perf_counter()
+        for registration, rows in counters.recompute(models):
+            fields = ', '.join([*registration.counters, *registration.means])
+            self.stdout.write(
+                f'{registration.parent_model._meta.label}.{{{fields}}} '
+                f'from {registration.model._meta.label}: {rows} rows'
+            )
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'Recomputed counters in {elapsed:.2f}s'))
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.7 on 2026-10-16 09:12
+
+from django.db import migrations
+from django.db.utils import OperationalError
+
+
+FTS_TABLE = 'products_medicine_fts'
+SEARCH_COLUMNS = 'name, generic_name, composition, indications'
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        try:
+            schema_editor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+                f"{SEARCH_COLUMNS}, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+            )
+        except OperationalError:
+            # SQLite built without FTS5; search falls back to icontains
+            return
+        schema_editor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, {SEARCH_COLUMNS}) "
+            f"SELECT id, COALESCE(name, ''), COALESCE(generic_name, ''), "
+            f"COALESCE(composition, ''), COALESCE(indications, '') FROM products_medicine"
+        )
+    elif vendor == 'mysql':
+        schema_editor.execute(
+            f"ALTER TABLE products_medicine ADD FULLTEXT INDEX products_medicine_search_ft ({SEARCH_COLUMNS})"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    elif vendor == 'mysql':
+        schema_editor.execute("ALTER TABLE products_medicine DROP INDEX products_medicine_search_ft")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-17 00:02
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_review_counters(apps, schema_editor):
+    Medicine = apps.get_model('products', 'Medicine')
+    MedicineReview = apps.get_model('products', 'MedicineReview')
+    reviews = MedicineReview.objects.filter(medicine=OuterRef('pk')).order_by().values('medicine')
+    Medicine.objects.update(
+        review_count=Coalesce(Subquery(reviews.annotate(n=Count('pk')).values('n')), 0),
+        rating_sum=Coalesce(Subquery(reviews.annotate(n=Sum('rating')).values('n')), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_medicine_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='medicine',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='medicine',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_review_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-17 00:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_medicine_review_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='medicine',
+            index=models.Index(fields=['is_active', 'name', 'id'], name='products_me_is_acti_b6d0fb_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='medicine',
+            index=models.Index(fields=['is_active', 'price', 'id'], name='products_me_is_acti_57f2a2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='medicine',
+            index=models.Index(fields=['is_active', 'created_at', 'id'], name='products_me_is_acti_15819b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='medicine',
+            index=models.Index(fields=['category', 'is_active', 'name', 'id'], name='products_me_categor_555bbf_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='medicine',
+            index=models.Index(fields=['created_at', 'id'], name='products_me_created_8cf49a_idx'),
+        ),
+    ]
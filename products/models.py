@@ -83,6 +83,11 @@ class Medicine(models.Model):
     is_active = models.BooleanField(default=True)
     is_featured = models.BooleanField(default=False)
     requires_prescription = models.BooleanField(default=False)
+    
+    # Maintained from MedicineReview by pharmazone.counters
+    review_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -93,6 +98,12 @@ class Medicine(models.Model):
             models.Index(fields=['category']),
             models.Index(fields=['prescription_type']),
             models.Index(fields=['is_active']),
+            # Keyset pagination: (filter, sort key, id) for each listing order
+            models.Index(fields=['is_active', 'name', 'id']),
+            models.Index(fields=['is_active', 'price', 'id']),
+            models.Index(fields=['is_active', 'created_at', 'id']),
+            models.Index(fields=['category', 'is_active', 'name', 'id']),
+            models.Index(fields=['created_at', 'id']),
         ]
     
     def save(self, *args, **kwargs):
@@ -115,6 +126,11 @@ class Medicine(models.Model):
             return round(((self.price - self.discount_price) / self.price) * 100, 2)
         return 0
     
+    @property
+    def average_rating(self):
+        """Mean review rating, 0 when there are no reviews"""
+        return self.rating_sum / self.review_count if self.review_count else 0
+    
     @property
     def is_in_stock(self):
         """Check if medicine is in stock"""
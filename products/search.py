@@ -0,0 +1,186 @@
+"""
+Full-text search for the medicine catalog.
+
+SQLite uses an FTS5 virtual table that is kept in sync from the Medicine
+post_save/post_delete signals. MySQL uses a native FULLTEXT index that the
+server maintains itself. Any other backend falls back to icontains filters.
+"""
+import re
+import time
+
+from django.db import connection, transaction
+from django.db.models import Q, FloatField, Value
+from django.db.models.expressions import RawSQL
+
+from .models import Medicine
+
+
+FTS_TABLE = 'products_medicine_fts'
+SEARCH_FIELDS = ['name', 'generic_name', 'composition', 'indications']
+
+# Relative weight of each column when ranking (same order as SEARCH_FIELDS)
+FIELD_WEIGHTS = [10.0, 5.0, 2.0, 1.0]
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(query):
+    """Split a user query into lowercase search terms"""
+    return TOKEN_RE.findall(query.lower())
+
+
+class IcontainsSearchBackend:
+    """Fallback search using the original icontains scan"""
+
+    def no_results(self, queryset):
+        """Empty result for a query without searchable terms, still sortable by search_rank"""
+        return queryset.none().annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    def search(self, queryset, query):
+        condition = (
+            Q(name__icontains=query) |
+            Q(generic_name__icontains=query) |
+            Q(composition__icontains=query) |
+            Q(indications__icontains=query)
+        )
+        return queryset.filter(condition).annotate(
+            search_rank=Value(0.0, output_field=FloatField())
+        )
+
+    def index(self, medicine):
+        pass
+
+    def remove(self, medicine_id):
+        pass
+
+    def rebuild(self):
+        return Medicine.objects.count()
+
+
+class SQLiteFTSSearchBackend(IcontainsSearchBackend):
+    """SQLite FTS5 backend ranked with bm25()"""
+
+    def build_match(self, query):
+        # Quote every term so FTS5 operators in user input are treated as text,
+        # and use prefix matching so partially typed words still match.
+        return ' '.join(f'"{term}"*' for term in tokenize(query))
+
+    def search(self, queryset, query):
+        match = self.build_match(query)
+        if not match:
+            return self.no_results(queryset)
+
+        weights = ', '.join(str(weight) for weight in FIELD_WEIGHTS)
+        medicine_table = Medicine._meta.db_table
+        matching_ids = RawSQL(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+            [match]
+        )
+        # bm25() returns smaller values for better matches, so negate it to
+        # let every backend order by "-search_rank".
+        rank = RawSQL(
+            f'SELECT -bm25({FTS_TABLE}, {weights}) FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND rowid = "{medicine_table}"."id"',
+            [match],
+            output_field=FloatField()
+        )
+        return queryset.filter(id__in=matching_ids).annotate(search_rank=rank)
+
+    def index(self, medicine):
+        columns = ', '.join(SEARCH_FIELDS)
+        placeholders = ', '.join(['%s'] * len(SEARCH_FIELDS))
+        values = [getattr(medicine, field) or '' for field in SEARCH_FIELDS]
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [medicine.pk])
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, {columns}) VALUES (%s, {placeholders})',
+                [medicine.pk] + values
+            )
+
+    def remove(self, medicine_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [medicine_id])
+
+    def rebuild(self):
+        columns = ', '.join(SEARCH_FIELDS)
+        source_columns = ', '.join(f"COALESCE({field}, '')" for field in SEARCH_FIELDS)
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, {columns}) '
+                f'SELECT id, {source_columns} FROM {Medicine._meta.db_table}'
+            )
+            cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+            cursor.execute(f'SELECT COUNT(*) FROM {FTS_TABLE}')
+            return cursor.fetchone()[0]
+
+
+class MySQLFullTextSearchBackend(IcontainsSearchBackend):
+    """MySQL FULLTEXT backend using boolean mode MATCH ... AGAINST"""
+
+    def build_against(self, query):
+        # Every term is required and may be a prefix of the indexed word.
+        return ' '.join(f'+{term}*' for term in tokenize(query))
+
+    def search(self, queryset, query):
+        against = self.build_against(query)
+        if not against:
+            return self.no_results(queryset)
+
+        columns = ', '.join(SEARCH_FIELDS)
+        rank = RawSQL(
+            f'MATCH ({columns}) AGAINST (%s IN BOOLEAN MODE)',
+            [against],
+            output_field=FloatField()
+        )
+        return queryset.annotate(search_rank=rank).filter(search_rank__gt=0)
+
+    def rebuild(self):
+        # InnoDB keeps FULLTEXT indexes current on every write; OPTIMIZE
+        # merges the auxiliary index tables after large imports.
+        with connection.cursor() as cursor:
+            cursor.execute(f'OPTIMIZE TABLE {Medicine._meta.db_table}')
+        return Medicine.objects.count()
+
+
+_backend = None
+
+
+def fts_table_exists():
+    """Check whether the FTS5 table was created by the migration"""
+    return FTS_TABLE in connection.introspection.table_names()
+
+
+def get_backend():
+    """Return the search backend for the default database"""
+    global _backend
+    if _backend is None:
+        if connection.vendor == 'sqlite' and fts_table_exists():
+            _backend = SQLiteFTSSearchBackend()
+        elif connection.vendor == 'mysql':
+            _backend = MySQLFullTextSearchBackend()
+        else:
+            _backend = IcontainsSearchBackend()
+    return _backend
+
+
+def search_medicines(queryset, query):
+    """Filter a Medicine queryset by a search query and annotate search_rank"""
+    return get_backend().search(queryset, query)
+
+
+def index_medicine(medicine):
+    """Add or refresh a single medicine in the search index"""
+    get_backend().index(medicine)
+
+
+def remove_medicine(medicine_id):
+    """Remove a single medicine from the search index"""
+    get_backend().remove(medicine_id)
+
+
+def rebuild_index():
+    """Rebuild the whole search index, returning (row count, seconds taken)"""
+    started = time.monotonic()
+    count = get_backend().rebuild()
+    return count, time.monotonic() - started
@@ -0,0 +1,46 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from imaging import variants
+from pharmazone import counters
+from .models import Category, Manufacturer, Medicine, MedicineReview
+from . import search
+from .autocomplete import suggestion_index
+from .facets import bump_catalog_version
+
+
+@receiver(post_save, sender=Medicine)
+def index_medicine_on_save(sender, instance, **kwargs):
+    """Keep the search and autocomplete indexes in sync when a medicine is saved"""
+    search.index_medicine(instance)
+    transaction.on_commit(lambda: suggestion_index.update(instance))
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver(post_delete, sender=Medicine)
+def remove_medicine_on_delete(sender, instance, **kwargs):
+    """Drop deleted medicines from the search and autocomplete indexes"""
+    medicine_id = instance.pk
+    search.remove_medicine(medicine_id)
+    transaction.on_commit(lambda: suggestion_index.remove(medicine_id))
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Manufacturer)
+@receiver(post_delete, sender=Manufacturer)
+def catalog_changed(sender, instance, **kwargs):
+    """Category and manufacturer names and flags feed the cached facets"""
+    transaction.on_commit(bump_catalog_version)
+
+
+counters.register(
+    MedicineReview, 'medicine',
+    review_count=counters.CountOf(),
+    rating_sum=counters.SumOf('rating'),
+)
+
+variants.register(Medicine, 'image')
+variants.register(Category, 'image')
+variants.register(Manufacturer, 'logo')
@@ -1,3 +1,409 @@
-from django.test import TestCase
+import io
+import os
+import shutil
+import tempfile
+import threading
+import time
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db.models import Q
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from pharmazone.shared_cache import bump_version
+
+from .autocomplete import VERSION_CACHE_KEY, VERSION_CHECK_SECONDS, SuggestionIndex
+from .catalog_import import CatalogImportError, import_catalog
+from .downloader import DownloadJournal, ImageDownloader, store_image
+from .facets import compute_facets, get_facets
+from .search import IcontainsSearchBackend, fts_table_exists, rebuild_index, search_medicines
+from .models import Category, Manufacturer, Medicine
+
+
+PNG_HEADER = b'\x89PNG\r\n\x1a\n'
+
+
+class StandInImageHandler(BaseHTTPRequestHandler):
+    """Serves fake images: /img/<name>, /same/<name> (identical bodies), /slow/<name>, /huge, /page"""
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def send_body(self, body, content_type='image/png'):
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.startswith('/img/'):
+            self.send_body(PNG_HEADER + self.path.encode())
+        elif self.path.startswith('/same/'):
+            self.send_body(PNG_HEADER + b'same image')
+        elif self.path.startswith('/slow/'):
+            with self.server.lock:
+                self.server.active += 1
+                self.server.max_active = max(self.server.max_active, self.server.active)
+            time.sleep(0.2)
+            with self.server.lock:
+                self.server.active -= 1
+            self.send_body(PNG_HEADER + self.path.encode())
+        elif self.path == '/huge':
+            # No Content-Length: only the streamed size check can stop it
+            self.send_response(200)
+            self.send_header('Content-Type', 'image/png')
+            self.send_header('Connection', 'close')
+            self.end_headers()
+            self.close_connection = True
+            try:
+                for i in range(64):
+                    self.wfile.write(b'x' * 64 * 1024)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+        elif self.path == '/page':
+            self.send_body(b'<html></html>', content_type='text/html; charset=utf-8')
+        else:
+            self.send_error(404)
+
+
+class StandInServerMixin:
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StandInImageHandler)
+        cls.server.daemon_threads = True
+        cls.server.lock = threading.Lock()
+        cls.server_thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.server_thread.start()
+        cls.base_url = f'http://127.0.0.1:{cls.server.server_address[1]}'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        self.server.connections = self.server.active = self.server.max_active = 0
+
+
+class ImageDownloaderTests(StandInServerMixin, SimpleTestCase):
+
+    def test_downloads_in_parallel_within_the_per_host_limit(self):
+        jobs = [(i, f'{self.base_url}/slow/{i}') for i in range(6)]
+
+        with ImageDownloader(workers=6, per_host=2) as downloader:
+            results = list(downloader.download_all(jobs))
+
+        self.assertEqual(sorted(key for key, url, download, error in results), list(range(6)))
+        self.assertTrue(all(download is not None for key, url, download, error in results))
+        self.assertEqual(self.server.max_active, 2)
+
+    def test_keeps_a_bounded_number_of_jobs_in_flight(self):
+        taken = []
+
+        def jobs():
+            for i in range(20):
+                taken.append(i)
+                yield i, f'{self.base_url}/img/{i}'
+
+        yielded = 0
+        with ImageDownloader(workers=2) as downloader:
+            for key, url, download, error in downloader.download_all(jobs()):
+                self.assertLessEqual(len(taken) - yielded, 4)
+                yielded += 1
+
+        self.assertEqual(yielded, 20)
+
+    def test_reuses_connections(self):
+        jobs = [(i, f'{self.base_url}/img/{i}') for i in range(5)]
+
+        with ImageDownloader(workers=1) as downloader:
+            results = list(downloader.download_all(jobs))
+
+        self.assertEqual(len(results), 5)
+        self.assertEqual(self.server.connections, 1)
+
+    def test_rejects_non_images_and_oversized_bodies(self):
+        jobs = [('page', f'{self.base_url}/page'), ('huge', f'{self.base_url}/huge'), ('missing', f'{self.base_url}/nope')]
+
+        with ImageDownloader(max_bytes=1024 * 1024) as downloader:
+            errors = {key: error for key, url, download, error in downloader.download_all(jobs)}
+
+        self.assertIn('not an image', errors['page'])
+        self.assertIn('too large', errors['huge'])
+        self.assertIn('Network error', errors['missing'])
+
+
+class StoreImageTests(StandInServerMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        category = Category.objects.create(name='Pain Relief')
+        manufacturer = Manufacturer.objects.create(name='Nepal Pharma', country='Nepal')
+        self.medicines = [
+            Medicine.objects.create(
+                name=name, description='Test medicine', category=category, manufacturer=manufacturer,
+                price=Decimal('50.00'), stock_quantity=10, strength='500mg',
+            )
+            for name in ('Paracetamol', 'Ibuprofen', 'Cetirizine')
+        ]
+
+    def test_identical_images_share_one_file_and_the_journal_resumes(self):
+        journal_path = os.path.join(self.media_root, 'journal.jsonl')
+        journal = DownloadJournal(journal_path)
+        jobs = [(medicine.id, f'{self.base_url}/same/{medicine.id}') for medicine in self.medicines[:2]]
+
+        with ImageDownloader() as downloader:
+            for key, url, download, error in downloader.download_all(jobs):
+                medicine = Medicine.objects.get(id=key)
+                store_image(medicine.image, download, medicine.slug, journal, key)
+
+        names = {Medicine.objects.get(id=medicine.id).image.name for medicine in self.medicines[:2]}
+        self.assertEqual(len(names), 1)
+        self.assertEqual(os.listdir(os.path.join(self.media_root, 'medicines')), [os.path.basename(names.pop())])
+
+        # A later run sees what was stored before it was interrupted
+        resumed = DownloadJournal(journal_path)
+        self.assertTrue(resumed.is_done(self.medicines[0].id))
+        self.assertTrue(resumed.is_done(self.medicines[1].id))
+        self.assertFalse(resumed.is_done(self.medicines[2].id))
+
+    def test_storing_keeps_counters_written_since_the_medicine_was_loaded(self):
+        medicine = self.medicines[2]
+        with ImageDownloader() as downloader:
+            [(key, url, download, error)] = downloader.download_all([('new', f'{self.base_url}/img/new')])
+        # A review lands while the run still holds the old instance
+        Medicine.objects.filter(pk=medicine.pk).update(review_count=1, rating_sum=4)
+
+        store_image(medicine.image, download, medicine.slug, DownloadJournal(), 'new')
+
+        medicine.refresh_from_db()
+        self.assertTrue(medicine.image.name.startswith('medicines/'))
+        self.assertEqual((medicine.review_count, medicine.rating_sum), (1, 4))
+
+
+class SuggestionIndexTests(TestCase):
+
+    def setUp(self):
+        self.category = Category.objects.create(name='Pain Relief')
+        self.manufacturer = Manufacturer.objects.create(name='Nepal Pharma', country='Nepal')
+
+    def create_medicine(self, name):
+        return Medicine.objects.create(
+            name=name, description='Test medicine', category=self.category, manufacturer=self.manufacturer,
+            price=Decimal('50.00'), stock_quantity=10, strength='500mg',
+        )
+
+    def test_rebuilds_after_a_write_made_by_another_process(self):
+        index = SuggestionIndex()
+        self.create_medicine('Paracetamol')
+        self.assertEqual([entry['name'] for entry in index.suggest('para')], ['Paracetamol'])
+
+        # Written by another process: this index saw no signal, only the shared version
+        Medicine.objects.filter(name='Paracetamol').update(name='Paramol')
+        bump_version(VERSION_CACHE_KEY)
+        # Noticed at the next version check
+        index.checked_at -= VERSION_CHECK_SECONDS
+
+        self.assertEqual([entry['name'] for entry in index.suggest('para')], ['Paramol'])
+
+    def test_keystrokes_check_the_shared_version_at_most_once_per_interval(self):
+        index = SuggestionIndex()
+        self.create_medicine('Paracetamol')
+        index.suggest('pa')
+
+        with self.assertNumQueries(0):
+            index.suggest('par')
+            index.suggest('para')
+
+        index.checked_at -= VERSION_CHECK_SECONDS
+        with self.assertNumQueries(1):
+            index.suggest('parac')
+        with self.assertNumQueries(0):
+            self.assertEqual([entry['name'] for entry in index.suggest('parace')], ['Paracetamol'])
+
+
+class FacetTests(TestCase):
+
+    def setUp(self):
+        # Facets are cached per process by version, and versions restart with each test's rollback
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.pain = Category.objects.create(name='Pain Relief')
+        self.allergy = Category.objects.create(name='Allergy')
+        self.nepal = Manufacturer.objects.create(name='Nepal Pharma', country='Nepal')
+        self.other = Manufacturer.objects.create(name='Other Pharma', country='India')
+        for name, category, manufacturer, prescription_type, price in (
+            ('Paracetamol', self.pain, self.nepal, 'otc', '50.00'),
+            ('Ibuprofen', self.pain, self.other, 'prescription', '150.00'),
+            ('Cetirizine', self.allergy, self.nepal, 'otc', '1200.00'),
+        ):
+            self.create_medicine(name, category, manufacturer, prescription_type, price)
+
+    def create_medicine(self, name, category, manufacturer, prescription_type='otc', price='50.00'):
+        return Medicine.objects.create(
+            name=name, description='Test medicine', category=category, manufacturer=manufacturer,
+            prescription_type=prescription_type, price=Decimal(price), stock_quantity=10, strength='500mg',
+        )
+
+    def counts(self, facet):
+        return {row.get('name') or row.get('value') or row.get('key'): row['count'] for row in facet}
+
+    def test_each_facet_ignores_only_its_own_filter(self):
+        facets = compute_facets(Medicine.objects.filter(is_active=True), {'category': Q(category=self.pain)})
+
+        self.assertEqual(self.counts(facets['category']), {'Allergy': 1, 'Pain Relief': 2})
+        self.assertEqual(self.counts(facets['manufacturer']), {'Nepal Pharma': 1, 'Other Pharma': 1})
+        self.assertEqual(self.counts(facets['prescription_type']), {'otc': 1, 'prescription': 1})
+        self.assertEqual(self.counts(facets['price']), {'under-100': 1, '100-500': 1})
+
+    def test_cached_facets_follow_catalog_changes(self):
+        medicines = Medicine.objects.filter(is_active=True)
+        self.assertEqual(self.counts(get_facets(medicines, {})['category']), {'Allergy': 1, 'Pain Relief': 2})
+
+        with self.assertNumQueries(1):
+            get_facets(medicines, {})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_medicine('Loratadine', self.allergy, self.other)
+
+        self.assertEqual(self.counts(get_facets(medicines, {})['category']), {'Allergy': 2, 'Pain Relief': 2})
+
+
+class SearchTests(TestCase):
+
+    def setUp(self):
+        category = Category.objects.create(name='Pain Relief')
+        manufacturer = Manufacturer.objects.create(name='Nepal Pharma', country='Nepal')
+        for name, generic_name, indications in (
+            ('Paracetamol', 'Acetaminophen', 'Fever and mild pain'),
+            ('Cetamol', 'Paracetamol', 'Fever'),
+            ('Ibuprofen', 'Ibuprofen', 'Pain; use instead of paracetamol when advised'),
+            ('Cetirizine', 'Cetirizine', 'Allergy'),
+        ):
+            Medicine.objects.create(
+                name=name, generic_name=generic_name, indications=indications, description='Test medicine',
+                category=category, manufacturer=manufacturer, price=Decimal('50.00'), stock_quantity=10,
+            )
+
+    def search(self, query):
+        return list(search_medicines(Medicine.objects.all(), query).order_by('-search_rank', 'name').values_list('name', flat=True))
+
+    def test_ranks_name_matches_above_generic_name_and_indications(self):
+        if connection.vendor != 'sqlite' or not fts_table_exists():
+            self.skipTest('Ranking needs the SQLite full-text index')
+
+        self.assertEqual(self.search('paracetamol'), ['Paracetamol', 'Cetamol', 'Ibuprofen'])
+        # Prefix matching for partly typed words, every term required
+        self.assertEqual(self.search('parac'), ['Paracetamol', 'Cetamol', 'Ibuprofen'])
+        self.assertEqual(self.search('fever mild'), ['Paracetamol'])
+        # FTS5 syntax in the query is searched as text
+        self.assertEqual(self.search('cetirizine" -*'), ['Cetirizine'])
+        self.assertEqual(self.search('!!'), [])
+
+    def test_index_follows_saves_deletes_and_rebuilds(self):
+        medicine = Medicine.objects.get(name='Cetirizine')
+        medicine.name = 'Levocetirizine'
+        medicine.save()
+        self.assertEqual(self.search('levocet'), ['Levocetirizine'])
+
+        medicine.delete()
+        self.assertEqual(self.search('levocet'), [])
+
+        self.assertEqual(rebuild_index()[0], 3)
+        self.assertEqual(self.search('paracetamol')[0], 'Paracetamol')
+
+    def test_fallback_matches_substrings_without_ranking(self):
+        results = IcontainsSearchBackend().search(Medicine.objects.all(), 'cetam').order_by('name')
+
+        self.assertEqual(
+            [(m.name, m.search_rank) for m in results],
+            [('Cetamol', 0.0), ('Ibuprofen', 0.0), ('Paracetamol', 0.0)],
+        )
+
+    def test_listing_survives_a_query_without_terms(self):
+        response = self.client.get(reverse('products:medicine_list'), {'search': '!!'})
+
+        self.assertEqual(response.status_code, 200)
+
+
+class CatalogImportTests(TestCase):
+
+    def setUp(self):
+        self.category = Category.objects.create(name='Pain Relief')
+        self.manufacturer = Manufacturer.objects.create(name='Nepal Pharma', country='Nepal')
+        self.existing = Medicine.objects.create(
+            name='Paracetamol', slug='paracetamol-500mg', description='Fever and pain', category=self.category,
+            manufacturer=self.manufacturer, price=Decimal('50.00'), stock_quantity=40, strength='500mg',
+            is_featured=True,
+        )
+
+    def run_import(self, text, **kwargs):
+        return import_catalog(io.BytesIO(text.encode('utf-8')), 'catalog.csv', **kwargs)
+
+    def test_partial_columns_update_only_those_columns(self):
+        result = self.run_import(
+            'Slug,Name,Category,Manufacturer,Price\n'
+            'paracetamol-500mg,Paracetamol,pain relief,Nepal Pharma,55.00\n'
+            'ibuprofen-400mg,Ibuprofen,Pain Relief,Himalaya Labs,120.00\n'
+        )
+
+        self.assertEqual((result.rows, result.created, result.updated, result.error_count), (2, 1, 1, 0))
+        self.existing.refresh_from_db()
+        self.assertEqual(self.existing.price, Decimal('55.00'))
+        # Columns missing from the file keep their values
+        self.assertEqual(
+            (self.existing.description, self.existing.stock_quantity, self.existing.strength, self.existing.is_featured),
+            ('Fever and pain', 40, '500mg', True),
+        )
+
+        created = Medicine.objects.get(slug='ibuprofen-400mg')
+        self.assertEqual((created.category, created.manufacturer.name), (self.category, 'Himalaya Labs'))
+        self.assertEqual(Medicine.objects.count(), 2)
+        # Bulk writes skip the signals; the search index is rebuilt at the end
+        self.assertEqual(list(search_medicines(Medicine.objects.all(), 'ibuprofen')), [created])
+
+    def test_bad_rows_are_reported_and_the_rest_imported(self):
+        result = self.run_import(
+            'name,category,manufacturer,price,is_featured,discount_price\n'
+            'Cetirizine,Allergy,Nepal Pharma,30.00,yes,\n'
+            'Loratadine,Allergy,Nepal Pharma,cheap,no,\n'
+            'Fexofenadine,Allergy,Nepal Pharma,90.00,perhaps,\n'
+            'Montelukast,Allergy,Nepal Pharma,90.00,no,95.00\n',
+            chunk_size=2,
+        )
+
+        self.assertEqual((result.rows, result.created, result.error_count), (4, 1, 3))
+        self.assertEqual([error.line for error in result.errors], [3, 4, 5])
+        self.assertIn('is_featured', str(result.errors[1]))
+        self.assertTrue(Medicine.objects.get(name='Cetirizine').is_featured)
+
+    def test_dry_run_writes_nothing(self):
+        result = self.run_import('name,category,manufacturer,price\nCetirizine,Allergy,Nepal Pharma,30.00\n', dry_run=True)
+
+        self.assertEqual(result.created, 1)
+        self.assertFalse(Medicine.objects.filter(name='Cetirizine').exists())
+        self.assertFalse(Category.objects.filter(name='Allergy').exists())
+
+    def test_missing_required_columns(self):
+        with self.assertRaisesMessage(CatalogImportError, 'Missing required columns: manufacturer'):
+            self.run_import('name,category,price\nCetirizine,Allergy,30.00\n')
@@ -16,6 +16,7 @@ urlpatterns = [
     path('admin/medicines/', views.admin_medicine_list, name='admin_medicine_list'),
     path('admin/medicine/<int:medicine_id>/', views.admin_medicine_detail, name='admin_medicine_detail'),
     path('admin/medicine/add/', views.admin_medicine_add, name='admin_medicine_add'),
+    path('admin/medicines/import/', views.admin_medicine_import, name='admin_medicine_import'),
     path('admin/medicine/<int:medicine_id>/edit/', views.admin_medicine_edit, name='admin_medicine_edit'),
     path('admin/medicine/<int:medicine_id>/delete/', views.admin_medicine_delete, name='admin_medicine_delete'),
     path('admin/medicine/<int:medicine_id>/toggle-status/', views.admin_medicine_toggle_status, name='admin_medicine_toggle_status'),
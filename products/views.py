@@ -1,12 +1,16 @@
 from django.shortcuts import render, get_object_or_404, redirect
-from django.core.paginator import Paginator
-from django.db.models import Q, Avg
+from django.db.models import Q
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from pharmazone.pagination import CursorPaginator
 from .models import Category, Medicine, Manufacturer, MedicineReview
-from .forms import MedicineReviewForm, AdminMedicineForm, CategoryForm, ManufacturerForm
+from .forms import MedicineReviewForm, AdminMedicineForm, CategoryForm, ManufacturerForm, CatalogImportForm
+from .catalog_import import CatalogImportError, import_catalog
+from .search import search_medicines
+from .autocomplete import get_suggestions
+from .facets import get_facets, price_bucket_filter
 
 
 def is_secure_admin(user):
@@ -40,6 +44,16 @@ def home_view(request):
     return render(request, 'products/home.html', context)
 
 
+# sort_by value -> ordering used for keyset pagination
+MEDICINE_SORTS = {
+    'relevance': ['-search_rank', 'name'],
+    'price_low': ['price'],
+    'price_high': ['-price'],
+    'name': ['name'],
+    'newest': ['-created_at'],
+}
+
+
 def medicine_list_view(request):
     """Medicine listing view with search and filters"""
     medicines = Medicine.objects.filter(is_active=True)
@@ -47,64 +61,62 @@ def medicine_list_view(request):
     # Search functionality
     search_query = request.GET.get('search', '')
     if search_query:
-        medicines = medicines.filter(
-            Q(name__icontains=search_query) |
-            Q(generic_name__icontains=search_query) |
-            Q(composition__icontains=search_query) |
-            Q(indications__icontains=search_query)
-        )
+        medicines = search_medicines(medicines, search_query)
+    
+    # Filters, keyed by the facet they belong to
+    filters = {}
     
-    # Category filter
     category_id = request.GET.get('category')
     if category_id:
-        medicines = medicines.filter(category_id=category_id)
+        filters['category'] = Q(category_id=category_id)
     
-    # Manufacturer filter
     manufacturer_id = request.GET.get('manufacturer')
     if manufacturer_id:
-        medicines = medicines.filter(manufacturer_id=manufacturer_id)
+        filters['manufacturer'] = Q(manufacturer_id=manufacturer_id)
     
-    # Prescription type filter
     prescription_type = request.GET.get('prescription_type')
     if prescription_type:
-        medicines = medicines.filter(prescription_type=prescription_type)
+        filters['prescription_type'] = Q(prescription_type=prescription_type)
     
-    # Price range filter
+    # Price bucket, or an explicit min/max range
+    price_bucket = request.GET.get('price')
     min_price = request.GET.get('min_price')
     max_price = request.GET.get('max_price')
-    if min_price:
-        medicines = medicines.filter(price__gte=min_price)
-    if max_price:
-        medicines = medicines.filter(price__lte=max_price)
-    
-    # Sort by
-    sort_by = request.GET.get('sort_by', 'name')
-    if sort_by == 'price_low':
-        medicines = medicines.order_by('price')
-    elif sort_by == 'price_high':
-        medicines = medicines.order_by('-price')
-    elif sort_by == 'name':
-        medicines = medicines.order_by('name')
-    elif sort_by == 'newest':
-        medicines = medicines.order_by('-created_at')
-    
-    # Pagination
-    paginator = Paginator(medicines, 12)
-    page_number = request.GET.get('page')
-    medicines = paginator.get_page(page_number)
-    
-    # Get filter options
-    categories = Category.objects.filter(is_active=True)
-    manufacturers = Manufacturer.objects.all()
+    price_filter = price_bucket_filter(price_bucket) if price_bucket else None
+    if price_filter is None:
+        price_bucket = None
+        price_filter = Q()
+        if min_price:
+            price_filter &= Q(price__gte=min_price)
+        if max_price:
+            price_filter &= Q(price__lte=max_price)
+    if price_filter:
+        filters['price'] = price_filter
+    
+    # Sidebar counts, computed before the filters narrow the queryset
+    facets = get_facets(medicines, filters, searched=bool(search_query))
+    for condition in filters.values():
+        medicines = medicines.filter(condition)
+    medicines = medicines.select_related('category')
+    
+    # Sort by (search results default to relevance)
+    sort_by = request.GET.get('sort_by') or ('relevance' if search_query else 'name')
+    if sort_by == 'relevance' and not search_query:
+        sort_by = 'name'
+    ordering = MEDICINE_SORTS.get(sort_by, ['-created_at'])
+    
+    # Keyset pagination over the sort key
+    paginator = CursorPaginator(medicines, 12, ordering)
+    medicines = paginator.get_page(request.GET.get('cursor'))
     
     context = {
         'medicines': medicines,
-        'categories': categories,
-        'manufacturers': manufacturers,
+        'facets': facets,
         'search_query': search_query,
         'selected_category': category_id,
         'selected_manufacturer': manufacturer_id,
         'selected_prescription_type': prescription_type,
+        'selected_price': price_bucket,
         'min_price': min_price,
         'max_price': max_price,
         'sort_by': sort_by,
@@ -119,8 +131,8 @@ def medicine_detail_view(request, slug):
     # Get reviews
     reviews = MedicineReview.objects.filter(medicine=medicine).order_by('-created_at')
     
-    # Calculate average rating
-    avg_rating = reviews.aggregate(Avg('rating'))['rating__avg'] or 0
+    # Average rating from the denormalized review counters
+    avg_rating = medicine.average_rating
     
     # Get related medicines
     related_medicines = Medicine.objects.filter(
@@ -161,12 +173,11 @@ def category_detail_view(request, slug):
     medicines = Medicine.objects.filter(
         category=category,
         is_active=True
-    ).order_by('name')
+    )
     
-    # Pagination
-    paginator = Paginator(medicines, 12)
-    page_number = request.GET.get('page')
-    medicines = paginator.get_page(page_number)
+    # Keyset pagination
+    paginator = CursorPaginator(medicines, 12, ['name'])
+    medicines = paginator.get_page(request.GET.get('cursor'))
     
     context = {
         'category': category,
@@ -211,20 +222,9 @@ def search_suggestions(request):
     if request.method == 'GET':
         query = request.GET.get('q', '')
         if len(query) >= 2:
-            medicines = Medicine.objects.filter(
-                Q(name__icontains=query) |
-                Q(generic_name__icontains=query)
-            ).filter(is_active=True)[:5]
-            
-            suggestions = []
-            for medicine in medicines:
-                suggestions.append({
-                    'name': medicine.name,
-                    'slug': medicine.slug,
-                    'strength': medicine.strength,
-                    'price': float(medicine.current_price),
-                })
-            
+            # Served from the in-memory autocomplete index; at most one
+            # version check every few seconds touches the database
+            suggestions = get_suggestions(query, limit=5)
             return JsonResponse({'suggestions': suggestions})
     
     return JsonResponse({'suggestions': []})
@@ -238,7 +238,7 @@ def admin_medicine_list(request):
         messages.error(request, 'Access denied.')
         return redirect('products:home')
     
-    medicines = Medicine.objects.all().order_by('-created_at')
+    medicines = Medicine.objects.select_related('category')
     
     # Search functionality
     search_query = request.GET.get('search', '')
@@ -268,10 +268,9 @@ def admin_medicine_list(request):
     elif status_filter == 'out_of_stock':
         medicines = medicines.filter(stock_quantity=0)
     
-    # Pagination
-    paginator = Paginator(medicines, 20)
-    page_number = request.GET.get('page')
-    medicines = paginator.get_page(page_number)
+    # Keyset pagination, newest first
+    paginator = CursorPaginator(medicines, 20, ['-created_at'], count='approximate')
+    medicines = paginator.get_page(request.GET.get('cursor'))
     
     # Get filter options
     categories = Category.objects.all()
@@ -325,6 +324,41 @@ def admin_medicine_add(request):
     return render(request, 'products/admin_medicine_form.html', context)
 
 
+@login_required
+def admin_medicine_import(request):
+    """Admin view for bulk importing medicines from a CSV/XLSX file"""
+    if not is_secure_admin(request.user):
+        messages.error(request, 'Access denied.')
+        return redirect('products:home')
+    
+    result = None
+    if request.method == 'POST':
+        form = CatalogImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            upload = form.cleaned_data['file']
+            try:
+                result = import_catalog(
+                    upload, upload.name,
+                    create_missing=form.cleaned_data['create_missing'],
+                    dry_run=form.cleaned_data['dry_run'],
+                )
+            except CatalogImportError as e:
+                form.add_error('file', str(e))
+            else:
+                if form.cleaned_data['dry_run']:
+                    messages.info(request, f'Dry run: {result.created} medicines would be added and {result.updated} updated.')
+                else:
+                    messages.success(request, f'Import finished: {result.created} medicines added, {result.updated} updated.')
+    else:
+        form = CatalogImportForm()
+    
+    context = {
+        'form': form,
+        'result': result,
+    }
+    return render(request, 'products/admin_medicine_import.html', context)
+
+
 @login_required
 def admin_medicine_edit(request, medicine_id):
     """Admin view for editing medicine"""
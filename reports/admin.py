@@ -0,0 +1,30 @@
+from django.contrib import admin
+from .models import DailyOrderRollup, DailyCategoryRollup, DailyPaymentRollup, DailyAppointmentRollup
+
+
+@admin.register(DailyOrderRollup)
+class DailyOrderRollupAdmin(admin.ModelAdmin):
+    list_display = ['date', 'status', 'payment_method', 'order_count', 'revenue']
+    list_filter = ['status', 'payment_method']
+    date_hierarchy = 'date'
+
+
+@admin.register(DailyCategoryRollup)
+class DailyCategoryRollupAdmin(admin.ModelAdmin):
+    list_display = ['date', 'category', 'items_sold', 'revenue']
+    list_filter = ['category']
+    date_hierarchy = 'date'
+
+
+@admin.register(DailyPaymentRollup)
+class DailyPaymentRollupAdmin(admin.ModelAdmin):
+    list_display = ['date', 'status', 'payment_method', 'payment_count', 'amount']
+    list_filter = ['status', 'payment_method']
+    date_hierarchy = 'date'
+
+
+@admin.register(DailyAppointmentRollup)
+class DailyAppointmentRollupAdmin(admin.ModelAdmin):
+    list_display = ['date', 'status', 'appointment_count', 'fee_total']
+    list_filter = ['status']
+    date_hierarchy = 'date'
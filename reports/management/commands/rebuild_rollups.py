@@ -0,0 +1,41 @@
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from reports.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Backfill or repair the daily order, category, payment and appointment rollups'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--start',
+            help='First date to rebuild (YYYY-MM-DD). Defaults to the beginning of history.',
+        )
+        parser.add_argument(
+            '--end',
+            help='Last date to rebuild (YYYY-MM-DD). Defaults to no limit.',
+        )
+
+    def parse_date(self, value, option):
+        if not value:
+            return None
+        try:
+            return datetime.strptime(value, '%Y-%m-%d').date()
+        except ValueError:
+            raise CommandError(f'--{option} must be a date in YYYY-MM-DD format')
+
+    def handle(self, *args, **options):
+        start = self.parse_date(options['start'], 'start')
+        end = self.parse_date(options['end'], 'end')
+        if start and end and start > end:
+            raise CommandError('--start must not be after --end')
+
+        started = time.perf_counter()
+        written = rebuild_rollups(start, end)
+        elapsed = time.perf_counter() - started
+
+        for table, rows in written.items():
+            self.stdout.write(f'{table}: {rows} rows')
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt rollups in {elapsed:.2f}s'))
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+def backfill_rollups(apps, schema_editor):
+    # The dashboard reads only the rollups, so fill them from existing history
+    from reports.rollups import rebuild_rollups
+    rebuild_rollups(apps=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0001_initial'),
+        ('orders', '0005_listing_keyset_indexes'),
+        ('payments', '0004_listing_keyset_indexes'),
+        ('doctor_appointments', '0004_doctor_review_counters'),
+        ('products', '0004_listing_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,64 @@
+from django.db import models
+from products.models import Category
+
+
+class DailyOrderRollup(models.Model):
+    """Order count and revenue per day, order status and payment method"""
+    date = models.DateField()
+    status = models.CharField(max_length=20)
+    payment_method = models.CharField(max_length=20)
+    order_count = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    
+    class Meta:
+        unique_together = ['date', 'status', 'payment_method']
+        ordering = ['-date', 'status', 'payment_method']
+    
+    def __str__(self):
+        return f"{self.date} {self.status}/{self.payment_method}: {self.order_count} orders"
+
+
+class DailyCategoryRollup(models.Model):
+    """Units sold and revenue per day and medicine category"""
+    date = models.DateField()
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='daily_rollups')
+    items_sold = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    
+    class Meta:
+        unique_together = ['date', 'category']
+        ordering = ['-date', 'category']
+    
+    def __str__(self):
+        return f"{self.date} {self.category}: {self.items_sold} items"
+
+
+class DailyPaymentRollup(models.Model):
+    """Payment count and amount per day, payment status and method"""
+    date = models.DateField()
+    status = models.CharField(max_length=20)
+    payment_method = models.CharField(max_length=20)
+    payment_count = models.IntegerField(default=0)
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    
+    class Meta:
+        unique_together = ['date', 'status', 'payment_method']
+        ordering = ['-date', 'status', 'payment_method']
+    
+    def __str__(self):
+        return f"{self.date} {self.status}/{self.payment_method}: {self.payment_count} payments"
+
+
+class DailyAppointmentRollup(models.Model):
+    """Appointment count and fees per appointment day and status"""
+    date = models.DateField()
+    status = models.CharField(max_length=20)
+    appointment_count = models.IntegerField(default=0)
+    fee_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    
+    class Meta:
+        unique_together = ['date', 'status']
+        ordering = ['-date', 'status']
+    
+    def __str__(self):
+        return f"{self.date} {self.status}: {self.appointment_count} appointments"
@@ -0,0 +1,175 @@
+"""
+Daily rollups of orders, category sales, payments and appointments.
+
+Every tracked row contributes one (rollup model, bucket key, values) triple,
+e.g. an order adds order_count=1 and revenue=total_amount to its
+(date, status, payment_method) bucket. The signal handlers in signals.py
+subtract a row's previous contribution and add its new one whenever it
+changes, using F() updates so concurrent writers don't lose counts.
+rebuild_rollups() recomputes any date range from the transactional tables
+with GROUP BY queries, for backfills or to repair drift.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.apps import apps as global_apps
+from django.db import IntegrityError, transaction
+from django.db.models import F, Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import DailyOrderRollup, DailyCategoryRollup, DailyPaymentRollup, DailyAppointmentRollup
+
+
+def local_date(value):
+    """Calendar date of a timestamp in the current time zone"""
+    return timezone.localdate(value) if timezone.is_aware(value) else value.date()
+
+
+def apply_delta(model, key, **deltas):
+    """Add deltas to the rollup row for key, creating the row if needed"""
+    if not any(deltas.values()):
+        return
+    increments = {field: F(field) + value for field, value in deltas.items()}
+    if model.objects.filter(**key).update(**increments):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**key, **deltas)
+    except IntegrityError:
+        # Another transaction created the row first
+        model.objects.filter(**key).update(**increments)
+
+
+def apply_contribution(contribution, sign=1):
+    model, key, values = contribution
+    apply_delta(model, key, **{field: value * sign for field, value in values.items()})
+
+
+def order_contribution(order):
+    return (
+        DailyOrderRollup,
+        {'date': local_date(order.created_at), 'status': order.status, 'payment_method': order.payment_method},
+        {'order_count': 1, 'revenue': order.total_amount},
+    )
+
+
+def payment_contribution(payment):
+    return (
+        DailyPaymentRollup,
+        {'date': local_date(payment.created_at), 'status': payment.status, 'payment_method': payment.payment_method},
+        {'payment_count': 1, 'amount': payment.amount},
+    )
+
+
+def appointment_contribution(appointment):
+    return (
+        DailyAppointmentRollup,
+        {'date': appointment.appointment_date, 'status': appointment.status},
+        {'appointment_count': 1, 'fee_total': appointment.fee},
+    )
+
+
+def record_order_items(order, items, sign=1):
+    """Add order items to (or with sign=-1 remove them from) the category rollup"""
+    from orders.models import OrderItem
+    from products.models import Medicine
+
+    uncached = {item.medicine_id for item in items if not OrderItem.medicine.is_cached(item)}
+    category_ids = dict(
+        Medicine.objects.filter(id__in=uncached).values_list('id', 'category_id')
+    ) if uncached else {}
+
+    totals = defaultdict(lambda: [0, Decimal('0.00')])
+    for item in items:
+        if OrderItem.medicine.is_cached(item):
+            category_id = item.medicine.category_id
+        else:
+            category_id = category_ids.get(item.medicine_id)
+        if category_id is None:
+            continue
+        totals[category_id][0] += item.quantity
+        totals[category_id][1] += item.total_price
+
+    date = local_date(order.created_at)
+    for category_id, (quantity, revenue) in totals.items():
+        apply_delta(
+            DailyCategoryRollup,
+            {'date': date, 'category_id': category_id},
+            items_sold=quantity * sign,
+            revenue=revenue * sign,
+        )
+
+
+def _rebuild(model, queryset, date_field, key_fields, values):
+    """Insert one rollup row per GROUP BY result of queryset"""
+    rows = queryset.annotate(
+        rollup_date=date_field
+    ).values('rollup_date', *key_fields.values()).annotate(**values).order_by()
+
+    objects = []
+    for row in rows:
+        key = {name: row[source] for name, source in key_fields.items()}
+        objects.append(model(date=row['rollup_date'], **key, **{field: row[field] for field in values}))
+    model.objects.bulk_create(objects, batch_size=500)
+    return len(objects)
+
+
+def rebuild_rollups(start=None, end=None, apps=global_apps):
+    """
+    Recompute all rollups for dates between start and end (inclusive, either
+    may be None for open-ended) and return the number of rows written per table.
+    apps is the model registry, so migrations can pass their historical one.
+    """
+    Order = apps.get_model('orders', 'Order')
+    OrderItem = apps.get_model('orders', 'OrderItem')
+    Payment = apps.get_model('payments', 'Payment')
+    Appointment = apps.get_model('doctor_appointments', 'Appointment')
+    rollup_models = [
+        apps.get_model('reports', name)
+        for name in ('DailyOrderRollup', 'DailyCategoryRollup', 'DailyPaymentRollup', 'DailyAppointmentRollup')
+    ]
+    DailyOrderRollup, DailyCategoryRollup, DailyPaymentRollup, DailyAppointmentRollup = rollup_models
+
+    def date_filter(field):
+        lookups = {}
+        if start:
+            lookups[f'{field}__gte'] = start
+        if end:
+            lookups[f'{field}__lte'] = end
+        return lookups
+
+    written = {}
+    with transaction.atomic():
+        for model in rollup_models:
+            model.objects.filter(**date_filter('date')).delete()
+
+        written['orders'] = _rebuild(
+            DailyOrderRollup,
+            Order.objects.filter(**date_filter('created_at__date')),
+            TruncDate('created_at'),
+            {'status': 'status', 'payment_method': 'payment_method'},
+            {'order_count': Count('id'), 'revenue': Sum('total_amount')},
+        )
+        written['categories'] = _rebuild(
+            DailyCategoryRollup,
+            OrderItem.objects.filter(**date_filter('order__created_at__date')),
+            TruncDate('order__created_at'),
+            {'category_id': 'medicine__category_id'},
+            {'items_sold': Sum('quantity'), 'revenue': Sum('total_price')},
+        )
+        written['payments'] = _rebuild(
+            DailyPaymentRollup,
+            Payment.objects.filter(**date_filter('created_at__date')),
+            TruncDate('created_at'),
+            {'status': 'status', 'payment_method': 'payment_method'},
+            {'payment_count': Count('id'), 'amount': Sum('amount')},
+        )
+        written['appointments'] = _rebuild(
+            DailyAppointmentRollup,
+            Appointment.objects.filter(**date_filter('appointment_date')),
+            F('appointment_date'),
+            {'status': 'status'},
+            {'appointment_count': Count('id'), 'fee_total': Sum('fee')},
+        )
+    return written
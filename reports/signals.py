@@ -0,0 +1,119 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from doctor_appointments.models import Appointment
+from orders.models import Order, OrderItem
+from orders.signals import order_items_created
+from payments.models import Payment
+from .rollups import (
+    apply_contribution, appointment_contribution, local_date, order_contribution,
+    payment_contribution, rebuild_rollups, record_order_items,
+)
+
+# Tracked model -> (contribution function, fields it reads)
+TRACKED = {
+    Order: (order_contribution, {'created_at', 'status', 'payment_method', 'total_amount'}),
+    Payment: (payment_contribution, {'created_at', 'status', 'payment_method', 'amount'}),
+    Appointment: (appointment_contribution, {'appointment_date', 'status', 'fee'}),
+}
+
+
+def _snapshot(instance, fields, contribution):
+    """The row's current contribution, or None if it is unsaved or only partly loaded"""
+    if instance.pk is None or fields & instance.get_deferred_fields():
+        return None
+    return contribution(instance)
+
+
+def remember_contribution(sender, instance, **kwargs):
+    contribution, fields = TRACKED[sender]
+    instance._rollup_contribution = _snapshot(instance, fields, contribution)
+
+
+def update_rollups(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    contribution, fields = TRACKED[sender]
+    old = getattr(instance, '_rollup_contribution', None)
+    new = contribution(instance)
+
+    if old is None and not created:
+        # Previous values unknown (deferred load): recount the day instead
+        model, key, values = new
+        rebuild_rollups(key['date'], key['date'])
+    elif old != new:
+        if old is not None:
+            apply_contribution(old, -1)
+        apply_contribution(new)
+    instance._rollup_contribution = new
+
+
+def remove_from_rollups(sender, instance, **kwargs):
+    contribution, fields = TRACKED[sender]
+    old = getattr(instance, '_rollup_contribution', None)
+    if old is None:
+        old = contribution(instance)
+    apply_contribution(old, -1)
+
+
+for model in TRACKED:
+    post_init.connect(remember_contribution, sender=model, dispatch_uid=f'rollup_init_{model.__name__}')
+    post_save.connect(update_rollups, sender=model, dispatch_uid=f'rollup_save_{model.__name__}')
+    post_delete.connect(remove_from_rollups, sender=model, dispatch_uid=f'rollup_delete_{model.__name__}')
+
+
+# Order items are written in bulk by reserve_stock, so the category rollup
+# is fed per order rather than per row, after commit so checkout doesn't hold
+# its stock locks any longer. Items edited or deleted on their own (admin)
+# are handled individually below.
+
+ITEM_FIELDS = {'order_id', 'medicine_id', 'quantity', 'total_price'}
+
+
+def _item_state(item):
+    return (item.order_id, item.medicine_id, item.quantity, item.total_price)
+
+
+def _remove_item(state):
+    order_id, medicine_id, quantity, total_price = state
+    order = Order.objects.filter(pk=order_id).only('created_at').first()
+    if order is not None:
+        item = OrderItem(medicine_id=medicine_id, quantity=quantity, total_price=total_price)
+        record_order_items(order, [item], sign=-1)
+
+
+@receiver(order_items_created, sender=OrderItem)
+def order_items_added(sender, order, items, **kwargs):
+    transaction.on_commit(lambda: record_order_items(order, items))
+    for item in items:
+        item._rollup_state = _item_state(item)
+
+
+@receiver(post_init, sender=OrderItem)
+def remember_item(sender, instance, **kwargs):
+    if instance.pk is None or ITEM_FIELDS & instance.get_deferred_fields():
+        instance._rollup_state = None
+    else:
+        instance._rollup_state = _item_state(instance)
+
+
+@receiver(post_save, sender=OrderItem)
+def order_item_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old = getattr(instance, '_rollup_state', None)
+    new = _item_state(instance)
+    if old is None and not created:
+        date = local_date(instance.order.created_at)
+        rebuild_rollups(date, date)
+    elif old != new:
+        if old is not None:
+            _remove_item(old)
+        record_order_items(instance.order, [instance])
+    instance._rollup_state = new
+
+
+@receiver(post_delete, sender=OrderItem)
+def order_item_deleted(sender, instance, **kwargs):
+    _remove_item(getattr(instance, '_rollup_state', None) or _item_state(instance))
@@ -0,0 +1,120 @@
+import datetime
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+
+from accounts.models import User
+from cart.models import CartItem
+from doctor_appointments.models import Appointment
+from doctor_appointments.tests import create_doctor
+from orders.inventory import reserve_stock
+from orders.tests import create_medicine, create_order, fill_cart
+from payments.models import Payment
+from .models import DailyAppointmentRollup, DailyCategoryRollup, DailyOrderRollup, DailyPaymentRollup
+from .rollups import rebuild_rollups
+
+
+ROLLUPS = {
+    DailyOrderRollup: ('status', 'payment_method', 'order_count', 'revenue'),
+    DailyCategoryRollup: ('category_id', 'items_sold', 'revenue'),
+    DailyPaymentRollup: ('status', 'payment_method', 'payment_count', 'amount'),
+    DailyAppointmentRollup: ('status', 'appointment_count', 'fee_total'),
+}
+
+
+def rollup_rows():
+    """Every non-empty rollup row; rows emptied by deletes are left at zero, which a rebuild skips"""
+    rows = set()
+    for model, fields in ROLLUPS.items():
+        for row in model.objects.values_list('date', *fields):
+            if any(row[-2:]):
+                rows.add((model.__name__,) + row)
+    return rows
+
+
+class RollupMaintenanceTests(TestCase):
+    """The signal-maintained rollups must match a full recompute after every kind of change"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='customer', password='pass12345')
+
+    def assertMatchesRebuild(self):
+        maintained = rollup_rows()
+        rebuild_rollups()
+        self.assertEqual(maintained, rollup_rows())
+        return maintained
+
+    def place_order(self, *lines):
+        order = create_order(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            reserve_stock(order, fill_cart(self.user, *lines))
+        CartItem.objects.filter(cart__user=self.user).delete()
+        order.total_amount = sum(item.total_price for item in order.items.all())
+        order.save()
+        return order
+
+    def test_orders_and_items(self):
+        paracetamol = create_medicine('Paracetamol', stock=20, price='50.00')
+        ibuprofen = create_medicine('Ibuprofen', stock=20, price='80.00')
+        self.place_order((paracetamol, 2), (ibuprofen, 1))
+        second = self.place_order((paracetamol, 3))
+        rows = self.assertMatchesRebuild()
+        # Both medicines are in one category: 5 x 50.00 + 1 x 80.00
+        self.assertIn(('DailyCategoryRollup', timezone.localdate(), paracetamol.category_id, 6, Decimal('330.00')), rows)
+
+        second.status = 'cancelled'
+        second.save()
+        self.assertMatchesRebuild()
+
+        item = second.items.get()
+        item.quantity = 1
+        item.total_price = Decimal('50.00')
+        item.save()
+        self.assertMatchesRebuild()
+
+        second.delete()
+        rows = self.assertMatchesRebuild()
+        self.assertEqual(len([row for row in rows if row[0] == 'DailyOrderRollup']), 1)
+
+    def test_payments(self):
+        order = create_order(self.user)
+        payment = Payment.objects.create(
+            payment_id='PAY-1', order=order, user=self.user, amount=Decimal('200.00'), payment_method='cod',
+        )
+        self.assertMatchesRebuild()
+
+        payment.status = 'completed'
+        payment.save()
+        self.assertMatchesRebuild()
+
+        payment.delete()
+        rows = self.assertMatchesRebuild()
+        self.assertFalse([row for row in rows if row[0] == 'DailyPaymentRollup'])
+
+    def test_appointments(self):
+        doctor = create_doctor(1)
+        appointments = [
+            Appointment.objects.create(
+                patient=self.user, doctor=doctor, appointment_date=datetime.date.today(),
+                appointment_time=datetime.time(9 + i), fee=Decimal('800.00'),
+                patient_age=30, patient_gender='female', chief_complaint='Headache',
+            )
+            for i in range(3)
+        ]
+        self.assertMatchesRebuild()
+
+        appointments[0].status = 'confirmed'
+        appointments[0].save()
+        appointments[1].appointment_date += datetime.timedelta(days=1)
+        appointments[1].save()
+        self.assertMatchesRebuild()
+
+        appointments[2].delete()
+        self.assertMatchesRebuild()
+
+        # Saves of a partly loaded row fall back to recounting the day
+        partial = Appointment.objects.only('id', 'status').get(pk=appointments[0].pk)
+        partial.status = 'completed'
+        partial.save()
+        self.assertMatchesRebuild()